@@ -1,11 +1,41 @@
 import pytest
-import logging
 import os
+from contextlib import ExitStack
 from datetime import datetime
-from core.constants import ROOT_WORKING_DIRECTORY, LOGS_FOLDER
+from core.constants import (ROOT_WORKING_DIRECTORY, LOGS_FOLDER, LOG_HTTP_REQUESTS, PROFILES_FOLDER, TRAFFIC_CAPTURE,
+                            TRAFFIC_LOG_FILE)
+from core.http_cache import load_http_cache_stats
+from core.log_pipeline import LoggingPipeline, log_request_timing, merge_worker_logs, set_log_test_id
+from core.profiling import TestProfiler, hotspots_table, load_hotspots
+from core.rate_limiter import get_rate_limiter, load_rate_limit_stats
+from core.request_builder import get_transport
+from core.request_timing import add_timing_observer, remove_timing_observer, timings_summary, timings_html_table
+from core.shared_storage import get_run_id, remove_run_directory
+from core.single_flight import get_single_flight, load_single_flight_stats
+from core.traffic import merge_traffic_logs, reset_traffic_log
+from modules.stub_server import StubServer, StubServerConfig
 
+pytest_plugins = ("pytester",)  # runs pytest in a subprocess for the tests of the framework's own plugins
 
-def pytest_configure():
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--local-server", action="store_true", default=False,
+        help="Run the tests against the bundled JSONPlaceholder stand-in server (configured via STUB_* env vars)"
+    )
+    parser.addoption(
+        "--duration-schedule", action="store_true", default=False,
+        help="With -n: give workers the longest tests first (durations of the previous runs) and keep tests "
+             "sharing the same data on the same worker"
+    )
+    parser.addoption(
+        "--profile-tests", action="store_true", default=False,
+        help="Run every test under cProfile and tracemalloc, write per test reports and flame graphs "
+             "(speedscope) to output/profiles/ and print the hot spots at the end"
+    )
+
+
+def pytest_configure(config):
     """
     pytest.logger.debug("This is a DEBUG message")       # Show in console, NOT in files
     pytest.logger.info("This is an INFO message")
@@ -16,6 +46,18 @@ def pytest_configure():
     log_dir = os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER)
     os.makedirs(log_dir, exist_ok=True)
 
+    # generated once by the first process and inherited by all xdist workers through the environment
+    get_run_id()
+
+    # every run captures its own traffic (TRAFFIC_CAPTURE=1), the workers' files are merged in pytest_unconfigure
+    if TRAFFIC_CAPTURE and not os.environ.get("PYTEST_XDIST_WORKER"):
+        reset_traffic_log()
+
+    # the first process starts the stand-in server, the workers inherit its URL through the environment
+    if config.getoption("--local-server") and not os.environ.get("PYTEST_XDIST_WORKER"):
+        config.stub_server = StubServer(StubServerConfig.from_env()).start()
+        os.environ["JSONPLACEHOLDER_BASE_URL"] = config.stub_server.base_url
+
     # if no log file is set -> generate a new one for the first worker
     if not os.environ.get("PYTEST_LOG_FILE"):
         timestamp = datetime.now().isoformat(timespec="seconds").replace(":", "-")
@@ -24,30 +66,178 @@ def pytest_configure():
     else:
         log_file = os.environ["PYTEST_LOG_FILE"]  # all the other workers use the same file
 
-    logger = logging.getLogger("pytest-logger")
-    logger.setLevel(logging.DEBUG)
+    # records are written by a background thread, each xdist worker to its own file (merged in pytest_unconfigure)
+    config.logging_pipeline = LoggingPipeline("pytest-logger", log_file)
+    logger = config.logging_pipeline.start()
+    if LOG_HTTP_REQUESTS:
+        add_timing_observer(log_request_timing)
 
-    # just prevent duplicate handlers
-    if not logger.handlers:
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
-        file_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
-        file_handler.setFormatter(file_formatter)
-        file_handler.setLevel(logging.DEBUG)
-        logger.addHandler(file_handler)
-
-        console_handler = logging.StreamHandler()
-        console_formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
-        console_handler.setFormatter(console_formatter)
-        console_handler.setLevel(logging.DEBUG)
-        logger.addHandler(console_handler)
+    # the profiler only exists with --profile-tests, so tests run without any instrumentation otherwise
+    if config.getoption("--profile-tests"):
+        if not os.environ.get("PYTEST_PROFILE_DIR"):
+            os.environ["PYTEST_PROFILE_DIR"] = os.path.join(
+                log_dir, PROFILES_FOLDER, os.path.splitext(os.path.basename(log_file))[0])
+        config.test_profiler = TestProfiler(os.environ["PYTEST_PROFILE_DIR"])
 
     pytest.logger = logger
 
 
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if not config.getoption("--duration-schedule"):
+        return None
+    from core.xdist_scheduler import DurationAwareScheduling  # xdist is only needed by distributed runs
+    config.duration_scheduler = DurationAwareScheduling(config, log)
+    return config.duration_scheduler
+
+
+def pytest_runtest_setup(item):
+    # helper results are memoized within a test only: a test about the request itself still sends it
+    get_single_flight().clear()
+
+
+def pytest_runtest_logstart(nodeid, location):
+    set_log_test_id(nodeid)
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    set_log_test_id(None)
+
+
+@pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_call(item):
     """
-    Hook to log test docstrings before execution.
+    Hook to log test docstrings before execution, to profile the test with `--profile-tests` and to keep the
+    HTTP cache and the helper memo out of the tests marked `no_http_cache` (they check that the API serves fresh
+    data).
     """
     test_docstring = item.function.__doc__
     if test_docstring:
-        pytest.logger.info(f"\nRunning Test: {item.name}\n{test_docstring.strip()}\n")
+        pytest.logger.info("\nRunning Test: %s\n%s\n", item.name, test_docstring.strip())
+
+    with ExitStack() as stack:
+        http_cache = get_transport().cache
+        if item.get_closest_marker("no_http_cache"):
+            if http_cache is not None:
+                stack.enter_context(http_cache.bypass())
+            stack.enter_context(get_single_flight().bypass())
+        profiler = getattr(item.config, "test_profiler", None)
+        if profiler is not None:
+            stack.enter_context(profiler.profile(item.nodeid))
+        yield
+
+
+@pytest.fixture(autouse=True)
+def request_timings(record_property):
+    """
+    Collects the phase timings of every HTTP request made by the test and attaches their summary to the
+    test as JUnit properties (`http_<phase>_sum_ms` / `http_<phase>_max_ms`) and to the HTML report.
+    """
+    timings = []
+    observer = timings.append
+    add_timing_observer(observer)
+    yield timings
+    remove_timing_observer(observer)
+
+    if timings:
+        for name, value in timings_summary(timings).items():
+            record_property(f"http_{name}", value)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    pytest_html = item.config.pluginmanager.getplugin("html")
+    if report.when != "call" or pytest_html is None:
+        return
+
+    extras = getattr(report, "extras", [])
+    timings = getattr(item, "funcargs", {}).get("request_timings")
+    if timings:
+        extras.append(pytest_html.extras.html(f"<h4>HTTP request timings</h4>{timings_html_table(timings)}"))
+    comparison = getattr(item, "performance_comparison", None)
+    if comparison is not None:
+        extras.append(pytest_html.extras.html(f"<h4>Performance trend</h4>{comparison.html_table()}"))
+    report.extras = extras
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    Release the pooled connections of this process (each xdist worker owns its own transport) and store its
+    rate limiting, HTTP cache and helper coalescing stats for the terminal summary. The xdist controller stores
+    the test durations of the run.
+    """
+    get_rate_limiter().save_stats()
+    if get_transport().cache is not None:
+        get_transport().cache.save_stats()
+    get_single_flight().save_stats()
+    profiler = getattr(session.config, "test_profiler", None)
+    if profiler:
+        profiler.save_hotspots()
+    scheduler = getattr(session.config, "duration_scheduler", None)
+    if scheduler:
+        scheduler.save_durations()
+    get_transport().close()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """
+    Requests sent by the whole run (all xdist workers), achieved throughput and retries of throttled requests,
+    the HTTP cache hit ratio, the helper fetches coalesced or memoized, where the traffic was captured, the
+    makespan / worker idle time of a `--duration-schedule` run and the hot spots of a `--profile-tests` run.
+    """
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        return
+    stats = load_rate_limit_stats()
+    if stats.requests:
+        terminalreporter.write_sep("-", "HTTP requests")
+        terminalreporter.write_line(stats.summary())
+
+    cache_stats = load_http_cache_stats()
+    if cache_stats.requests or cache_stats.bypassed:
+        terminalreporter.write_sep("-", "HTTP cache")
+        terminalreporter.write_line(cache_stats.summary())
+
+    single_flight_stats = load_single_flight_stats()
+    if single_flight_stats.calls or single_flight_stats.bypassed:
+        terminalreporter.write_sep("-", "helper request coalescing")
+        terminalreporter.write_line(single_flight_stats.summary())
+
+    if TRAFFIC_CAPTURE:
+        terminalreporter.write_sep("-", "traffic capture")
+        terminalreporter.write_line(f"Requests captured to {TRAFFIC_LOG_FILE}, replay them with "
+                                    f"`python -m core.replay {TRAFFIC_LOG_FILE} --base-url URL --speed 1`")
+
+    scheduler = getattr(config, "duration_scheduler", None)
+    if scheduler:
+        terminalreporter.write_sep("-", "xdist scheduling")
+        terminalreporter.write_line(scheduler.summary())
+
+    profiler = getattr(config, "test_profiler", None)
+    if profiler:
+        terminalreporter.write_sep("-", f"profiling hot spots (per test reports in {profiler.output_dir})")
+        terminalreporter.write_line(hotspots_table(load_hotspots(profiler.output_dir)))
+
+
+def pytest_unconfigure(config):
+    """
+    The xdist controller (or the single process of a non distributed run) removes the run scratch directory
+    once every worker is done with it, and merges the workers' log files into the run log (and their traffic
+    files into the traffic log).
+    """
+    pipeline = getattr(config, "logging_pipeline", None)
+    if pipeline:
+        remove_timing_observer(log_request_timing)
+        pipeline.stop()
+
+    if not os.environ.get("PYTEST_XDIST_WORKER"):
+        remove_run_directory()
+        if pipeline:
+            merge_worker_logs(os.environ["PYTEST_LOG_FILE"])
+        if TRAFFIC_CAPTURE:
+            merge_traffic_logs()
+
+    stub_server = getattr(config, "stub_server", None)
+    if stub_server:
+        stub_server.stop()
@@ -1,2 +1,7 @@
 from .constants import *
+from .rate_limiter import *
 from .request_builder import *
+from .shared_storage import *
+from .latency_histogram import *
+from .load_generator import *
+from .request_timing import *
@@ -0,0 +1,175 @@
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from core.constants import COMMENT_STRUCTURE
+
+INT_FIELDS = tuple(field for field, field_type in COMMENT_STRUCTURE.items() if field_type is int)
+STRING_FIELDS = tuple(field for field, field_type in COMMENT_STRUCTURE.items() if field_type is str)
+
+
+class StringColumn:
+    """
+    Strings stored back to back as UTF-8 in one buffer, with an `array('q')` of offsets: about the length of the
+    text plus 8 bytes per value, instead of a full `str` object (49+ bytes of header) per value.
+    """
+    __slots__ = ("data", "offsets")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def append(self, value: str):
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def raw(self, index: int) -> bytes:
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        data, offsets = self.data, self.offsets
+        for index in range(len(offsets) - 1):
+            yield data[offsets[index]:offsets[index + 1]].decode()
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.data) + sys.getsizeof(self.offsets)
+
+
+class CommentRow(Mapping):
+    """
+    Read-only view of one comment of a `CommentStore`, usable wherever a comment dict is read
+    (`row["email"]`, `row.get("body")`, `dict(row)`). Values are materialized on access.
+    """
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "CommentStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, field: str):
+        try:
+            return self._store.columns[field][self._index]
+        except KeyError:
+            raise KeyError(field) from None
+
+    def __iter__(self):
+        return iter(self._store.columns)
+
+    def __len__(self) -> int:
+        return len(self._store.columns)
+
+    def __repr__(self) -> str:
+        return f"CommentRow({dict(self)!r})"
+
+
+class CommentStore:
+    """
+    Columnar store of decoded comments: `id`/`postId` in `array('q')`, `name`/`email`/`body` in `StringColumn`s.
+    Aggregating comments over many posts and users costs a few bytes over the raw text per comment, where a list
+    of dicts costs several hundred (dict, boxed ints, one `str` object per field).
+
+        store = CommentStore()
+        for post_id in post_ids:
+            store.extend(helper.iter_post_comments(post_id))
+        store.count_by_post()[post_id], store.duplicates("id")
+
+    Comments must follow `COMMENT_STRUCTURE`: one that misses a field or has a value of another type is refused
+    with a `ValueError` naming it (run `COMMENT_VALIDATOR` first for a report of every violation). Fields outside
+    `COMMENT_STRUCTURE` are dropped.
+    """
+
+    def __init__(self, comments=()):
+        self.ids = array("q")
+        self.post_ids = array("q")
+        self.columns = {"id": self.ids, "postId": self.post_ids}
+        self.columns.update((field, StringColumn()) for field in STRING_FIELDS)
+        self.extend(comments)
+
+    def append(self, comment: dict):
+        self.extend((comment,))
+
+    def extend(self, comments):
+        """
+        Add decoded comments (a list, or the generator of a streamed response: nothing else is kept in memory).
+
+        Raises:
+            ValueError: If a comment misses a field of `COMMENT_STRUCTURE` or has a value of another type. The
+                comments before it are kept, nothing of it is stored.
+        """
+        columns = [(field, COMMENT_STRUCTURE[field], column.append) for field, column in self.columns.items()]
+        for comment in comments:
+            try:
+                values = [comment[field] for field, _, _ in columns]
+            except (KeyError, TypeError) as error:
+                missing = f"no {error.args[0]!r} field" if isinstance(error, KeyError) else "no fields"
+                raise ValueError(f"Comment {len(self)} of the store has {missing}: {comment!r}") from None
+            for (field, field_type, _), value in zip(columns, values):
+                if not isinstance(value, field_type):
+                    raise ValueError(f"Comment {len(self)} of the store has a {type(value).__name__} {field!r}, "
+                                     f"expected {field_type.__name__}: {comment!r}")
+            for (_, _, append), value in zip(columns, values):
+                append(value)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> CommentRow:
+        if not -len(self) <= index < len(self):
+            raise IndexError("comment index out of range")
+        return CommentRow(self, index % len(self))
+
+    def __iter__(self):
+        return (CommentRow(self, index) for index in range(len(self)))
+
+    def count_by_post(self) -> Counter:
+        """
+        Returns:
+            Counter: Number of comments per post ID.
+        """
+        return Counter(self.post_ids)
+
+    def group_by_post(self) -> dict:
+        """
+        Returns:
+            dict: Post ID -> `array('q')` of the row indexes of its comments, in insertion order.
+        """
+        groups = {}
+        for index, post_id in enumerate(self.post_ids):
+            rows = groups.get(post_id)
+            if rows is None:
+                rows = groups[post_id] = array("q")
+            rows.append(index)
+        return groups
+
+    def duplicates(self, field: str = "id") -> dict:
+        """
+        Returns:
+            dict: Value -> number of occurrences, for the values of `field` found more than once.
+        """
+        column = self.columns[field]
+        if field in INT_FIELDS:
+            if len(set(column)) == len(column):  # the common case: C speed, no Counter
+                return {}
+            values = Counter(column)
+        else:
+            values = Counter(column.raw(index) for index in range(len(column)))
+        return {value.decode() if isinstance(value, bytes) else value: count
+                for value, count in values.items() if count > 1}
+
+    def is_unique(self, field: str = "id") -> bool:
+        return not self.duplicates(field)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by the columns (allocated buffers included).
+        """
+        return sum(sys.getsizeof(column) if isinstance(column, array) else column.nbytes
+                   for column in self.columns.values())
@@ -3,11 +3,109 @@ from enum import Enum
 
 ROOT_WORKING_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOGS_FOLDER = 'output'
+RUNS_FOLDER = 'runs'  # per run scratch space under LOGS_FOLDER, shared by all xdist workers of a run
 JSONPLACEHOLDER_BASE_URL = "https://jsonplaceholder.typicode.com"
 EMAIL_REGEX = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
-RESPONSE_TIME_MS = 500
+RESPONSE_TIME_MS = 500  # p99 latency budget of the load tests
 MINIMAL_TOTAL_COMMENTS = 10
 
+# load tests (tests/performance)
+LOAD_TEST_RATE = float(os.environ.get("LOAD_TEST_RATE", 10))  # requests/s in open loop mode
+LOAD_TEST_CONCURRENCY = int(os.environ.get("LOAD_TEST_CONCURRENCY", 5))
+LOAD_TEST_DURATION_S = float(os.environ.get("LOAD_TEST_DURATION_S", 5))
+LOAD_TEST_RAMP_UP_S = float(os.environ.get("LOAD_TEST_RAMP_UP_S", 1))
+LOAD_TEST_PROCESSES = int(os.environ.get("LOAD_TEST_PROCESSES", 2))  # load worker processes of the sharded tests
+LOAD_TEST_MIN_THROUGHPUT_RATIO = 0.9  # achieved / target arrival rate
+LOAD_TEST_MIN_THROUGHPUT = float(os.environ.get("LOAD_TEST_MIN_THROUGHPUT", 5))  # requests/s in fixed concurrency mode
+LOAD_TEST_MAX_ERROR_RATE = 0.0
+
+# performance history (core/performance_history.py): every load test run is compared against the previous ones
+PERF_HISTORY_FILE = os.environ.get("PERF_HISTORY_FILE",
+                                   os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, "performance_history.jsonl"))
+PERF_BASELINE_RUNS = int(os.environ.get("PERF_BASELINE_RUNS", 10))  # rolling baseline: the last N runs of the test
+PERF_MIN_BASELINE_RUNS = int(os.environ.get("PERF_MIN_BASELINE_RUNS", 3))  # no gate before that many runs
+PERF_SIGNIFICANCE = float(os.environ.get("PERF_SIGNIFICANCE", 0.01))  # one-sided Mann-Whitney U p-value
+PERF_MIN_EFFECT_SIZE = float(os.environ.get("PERF_MIN_EFFECT_SIZE", 0.64))  # Vargha-Delaney A, 0.64 = medium
+PERF_MIN_SLOWDOWN_MS = float(os.environ.get("PERF_MIN_SLOWDOWN_MS", 5))  # smaller p50 shifts are never regressions
+
+# soak runs (core/soak.py, tests marked soak): sustained load sampled every window to catch slow drifts
+SOAK_DURATION_S = float(os.environ.get("SOAK_DURATION_S", 0))  # 0 = soak tests skipped, they are opt-in
+SOAK_WINDOW_S = float(os.environ.get("SOAK_WINDOW_S", 60))  # one time series sample per window
+SOAK_RATE = float(os.environ.get("SOAK_RATE", 10))  # requests/s, open loop
+SOAK_CONCURRENCY = int(os.environ.get("SOAK_CONCURRENCY", 10))
+SOAK_WARMUP_WINDOWS = int(os.environ.get("SOAK_WARMUP_WINDOWS", 2))  # left out of the drift fit (pools, caches)
+SOAK_MAX_LATENCY_DRIFT = float(os.environ.get("SOAK_MAX_LATENCY_DRIFT", 0.25))  # p99 rise over the run / median p99
+SOAK_MIN_LATENCY_DRIFT_MS = float(os.environ.get("SOAK_MIN_LATENCY_DRIFT_MS", 5))  # smaller p99 rises never fail
+SOAK_MAX_MEMORY_DRIFT_MB = float(os.environ.get("SOAK_MAX_MEMORY_DRIFT_MB", 20))  # RSS / traced memory growth
+SOAK_TRACEMALLOC = os.environ.get("SOAK_TRACEMALLOC", "1") != "0"  # allocation sites of the growth (slows requests)
+SOAK_FOLDER = "soak"  # time series written to output/soak/
+
+# benchmarks (tests/benchmarks)
+BENCHMARK_COMMENTS = int(os.environ.get("BENCHMARK_COMMENTS", 1_000_000))
+BENCHMARK_USERS = int(os.environ.get("BENCHMARK_USERS", 100_000))
+BENCHMARK_HTTP_REQUESTS = int(os.environ.get("BENCHMARK_HTTP_REQUESTS", 2000))  # per HTTP backend and thread count
+
+# xdist scheduling (core/xdist_scheduler.py, `--duration-schedule`): durations of the previous runs per test
+TEST_DURATIONS_FILE = os.environ.get("TEST_DURATIONS_FILE",
+                                     os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, "test_durations.json"))
+TEST_DURATION_DEFAULT_S = 1.0  # estimate of a test never run before, when no duration is known at all
+TEST_DURATION_SMOOTHING = 0.5  # weight of the last run in the stored durations
+
+# per test profiling (core/profiling.py, `--profile-tests`), written to output/profiles/<run>/
+PROFILES_FOLDER = "profiles"
+PROFILE_TOP_N = int(os.environ.get("PROFILE_TOP_N", 20))  # functions / allocation sites listed per test and overall
+PROFILE_MAX_DEPTH = 128  # stack depth of the exported flame graphs
+
+# HTTP transport (one pooled session per process, i.e. per xdist worker)
+HTTP_KEEP_ALIVE = os.environ.get("HTTP_KEEP_ALIVE", "1") != "0"
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))  # number of hosts kept in the pool
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))  # max connections kept per host
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 0))  # retries are opt-in
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.5))
+HTTP_RETRY_STATUS_CODES = (502, 504)  # 429 and 503 are retried by the rate limiter (RATE_LIMIT_*)
+HTTP_TIMEOUT_S = float(os.environ.get("HTTP_TIMEOUT_S", 30))
+HTTP_BACKEND = os.environ.get("HTTP_BACKEND", "requests")  # requests, urllib3, http.client or asyncio
+# on-disk cache revalidated with ETag / Last-Modified (core/http_cache.py), kept across runs
+HTTP_CACHE = os.environ.get("HTTP_CACHE", "0") == "1"
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, "http_cache"))
+HTTP_CACHE_MAX_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# traffic capture (core/traffic.py): every request of the run appended to a JSONL log, replayed by core/replay.py
+TRAFFIC_CAPTURE = os.environ.get("TRAFFIC_CAPTURE", "0") == "1"
+TRAFFIC_LOG_FILE = os.environ.get("TRAFFIC_LOG_FILE",
+                                  os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, "traffic.jsonl"))
+
+# rate limiting (core/rate_limiter.py): token bucket per host shared by all xdist workers + adaptive concurrency
+RATE_LIMIT_RPS = float(os.environ.get("RATE_LIMIT_RPS", 0))  # requests/s per host for the whole run, 0 = no limit
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", 10))
+# upper bound of the adaptive concurrency per host and process (it only goes below once the host throttles)
+RATE_LIMIT_MAX_CONCURRENCY = int(os.environ.get("RATE_LIMIT_MAX_CONCURRENCY", 100))
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("RATE_LIMIT_MAX_RETRIES", 0))  # retries are opt-in: tests see 429/503
+RATE_LIMIT_BACKOFF_S = float(os.environ.get("RATE_LIMIT_BACKOFF_S", 0.5))  # without Retry-After, doubled each retry
+RATE_LIMIT_MAX_WAIT_S = float(os.environ.get("RATE_LIMIT_MAX_WAIT_S", 30))  # cap on the honoured Retry-After
+RATE_LIMIT_STATUS_CODES = (429, 503)
+
+# pytest.logger (core/log_pipeline.py): records are formatted and written by a background thread, one file per worker
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "DEBUG")
+LOG_JSONL = os.environ.get("LOG_JSONL", "0") == "1"  # also write structured records to output/<run>.jsonl
+LOG_HTTP_REQUESTS = os.environ.get("LOG_HTTP_REQUESTS", "0") == "1"  # log every request (endpoint, status, latency)
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))  # size of a log file before it is rotated
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+
+# number of parallel requests used by the helper fan-out calls (keep it <= HTTP_POOL_MAXSIZE to reuse connections)
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", 10))
+
+# helper single-flight (core/single_flight.py): identical concurrent helper fetches share one request and one
+# decoded result, completed results are memoized (cleared before every test)
+HELPER_SINGLE_FLIGHT = os.environ.get("HELPER_SINGLE_FLIGHT", "1") != "0"
+HELPER_MEMO_TTL_S = float(os.environ.get("HELPER_MEMO_TTL_S", 30))  # 0 = coalescing only, nothing memoized
+HELPER_MEMO_MAX_ENTRIES = int(os.environ.get("HELPER_MEMO_MAX_ENTRIES", 1024))
+
+# set to 1 to make the shared dataset fixture always hit the API instead of the per run cache
+DATASET_LIVE = os.environ.get("DATASET_LIVE", "0") == "1"
+
+# in-memory part of the duplicate detector (core/dedupe.py), the seen digests spill to disk past it
+DEDUPE_MEMORY_BUDGET = int(os.environ.get("DEDUPE_MEMORY_BUDGET", 64 * 1024 * 1024))
+
 
 class HTTPStatusCodes(Enum):
     OK = 200
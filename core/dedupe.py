@@ -0,0 +1,258 @@
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import shutil
+import tempfile
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from core.constants import DEDUPE_MEMORY_BUDGET
+from core.shared_storage import get_run_directory
+
+ENTRY_BYTES = 100  # approximate cost of one digest -> offset entry of the in-memory dict (boxed ints + slot)
+MAX_RUNS = 8  # spilled runs are merged into one past this, so a lookup never searches more than MAX_RUNS files
+RUN_CHUNK = 8 * 1024  # entries written per chunk when spilling or merging runs
+# what a comment says, not where it is: a copy on another post (or by another user) has another id and postId
+COMMENT_CONTENT_FIELDS = ("name", "email", "body")
+
+
+class BloomFilter:
+    """
+    Bit array front end: "not seen" answers are certain, "maybe seen" ones are wrong with `error_rate`
+    probability (at `capacity` items). The positions come from the item's 64-bit digest (double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest: int) -> bool:
+        """
+        Add a digest.
+
+        Returns:
+            bool: True if it may have been added before, False if it certainly was not.
+        """
+        bits, size = self.bits, self.size
+        first, step = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        seen = True
+        for number in range(self.hashes):
+            position = (first + number * step) % size
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                seen = False
+                bits[byte] |= mask
+        return seen
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+class _SpilledRun:
+    """
+    Sorted digests and their record offsets spilled to disk, searched in place through a memory map.
+    """
+
+    def __init__(self, path: str, entries):
+        # `entries`: (digest, offset) pairs sorted by digest, written chunk by chunk (never all in memory)
+        self.path = path
+        count = 0
+        with open(path, "wb") as run, tempfile.TemporaryFile(dir=os.path.dirname(path)) as offsets:
+            entries = iter(entries)
+            while True:
+                chunk = list(itertools.islice(entries, RUN_CHUNK))
+                if not chunk:
+                    break
+                array("Q", (digest for digest, _ in chunk)).tofile(run)
+                array("Q", (offset for _, offset in chunk)).tofile(offsets)
+                count += len(chunk)
+            offsets.seek(0)
+            shutil.copyfileobj(offsets, run)
+        with open(path, "rb") as run:
+            self._map = mmap.mmap(run.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map).cast("Q")
+        self.digests, self.offsets = self._view[:count], self._view[count:]
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def lookup(self, digest: int) -> list:
+        index = bisect_left(self.digests, digest)
+        offsets = []
+        while index < len(self.digests) and self.digests[index] == digest:
+            offsets.append(self.offsets[index])
+            index += 1
+        return offsets
+
+    def close(self):
+        self.digests.release()
+        self.offsets.release()
+        self._view.release()
+        self._map.close()
+        os.remove(self.path)
+
+
+@dataclass
+class DedupeStats:
+    items: int = 0
+    duplicates: int = 0
+    candidates: int = 0  # digest already seen: confirmed against the stored records
+    collisions: int = 0  # same digest, different content
+    bloom_negatives: int = 0  # new items the Bloom filter let through without any lookup
+    spilled_runs: int = 0
+
+    def summary(self) -> str:
+        return (f"{self.items} items, {self.duplicates} duplicates, {self.candidates} digest matches checked "
+                f"({self.collisions} collisions), {self.bloom_negatives} settled by the Bloom filter, "
+                f"{self.spilled_runs} runs spilled to disk")
+
+
+class DuplicateDetector:
+    """
+    Streaming duplicate detection over any number of items (comments by default) in bounded memory.
+
+    Every item is fingerprinted with a 64-bit BLAKE2b digest of its `fields`: by default the content of a comment,
+    so a copy on another post matches (`fields=("id",)` checks that the ids are unique). The digests seen so far
+    are kept in an in-memory dict up to `memory_budget`, then spilled to disk as sorted runs searched through memory
+    maps (merged into one past `MAX_RUNS`).
+    A digest match is only a candidate: the earlier item is read back from the record file and compared byte for
+    byte, so a digest collision never reports a false duplicate. With `bloom_capacity` (the expected number of
+    items), a Bloom filter settles most new items without looking at the runs at all. Digests are `digest_size`
+    bytes (1 to 8, fewer only to provoke collisions in tests).
+
+        with DuplicateDetector() as detector:
+            for comment in comments:
+                duplicate = detector.add(comment)
+                assert duplicate is None, f"Duplicate comment {comment}, first seen as {duplicate}"
+
+    Records and runs are written to a temporary directory of the run, removed by `close()`.
+    """
+
+    def __init__(self, fields=COMMENT_CONTENT_FIELDS, memory_budget: int = DEDUPE_MEMORY_BUDGET,
+                 bloom_capacity: int = 0, bloom_error_rate: float = 0.01, directory: str = None,
+                 digest_size: int = 8):
+        if not 1 <= digest_size <= 8:
+            raise ValueError(f"digest_size must be 1 to 8 bytes (the spilled runs store 64-bit digests), "
+                             f"got {digest_size}")
+        self.fields = tuple(fields)
+        self.digest_size = digest_size
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self.max_entries = max(1, (memory_budget - (self.bloom.nbytes if self.bloom else 0)) // ENTRY_BYTES)
+        self.directory = tempfile.mkdtemp(prefix="dedupe-", dir=directory or get_run_directory("dedupe"))
+        self.stats = DedupeStats()
+        self._entries = {}  # digest -> record offset, or list of offsets after a collision
+        self._runs = []
+        self._run_number = 0
+        self._records = open(os.path.join(self.directory, "records.jsonl"), "w+b")
+        self._records_end = 0
+
+    def fingerprint(self, item: dict) -> tuple:
+        """
+        A missing field counts as null: the item is still checked, its missing fields are left to the tests of
+        the structure.
+
+        Returns:
+            tuple: (digest as int, canonical JSON encoding of the item's fields)
+        """
+        record = json.dumps([item.get(field) for field in self.fields], ensure_ascii=False,
+                            separators=(",", ":")).encode()
+        return int.from_bytes(hashlib.blake2b(record, digest_size=self.digest_size).digest(), "little"), record
+
+    def add(self, item: dict) -> dict:
+        """
+        Returns:
+            dict: The fields of the earlier identical item if `item` is a duplicate, None otherwise.
+        """
+        self.stats.items += 1
+        digest, record = self.fingerprint(item)
+        if self.bloom is not None and not self.bloom.add(digest):
+            self.stats.bloom_negatives += 1
+        else:
+            offsets = self._lookup(digest)
+            if offsets:
+                self.stats.candidates += 1
+                for offset in offsets:
+                    if self._read_record(offset) == record:
+                        self.stats.duplicates += 1
+                        return dict(zip(self.fields, json.loads(record)))
+                self.stats.collisions += 1
+        self._store(digest, record)
+        return None
+
+    def find_duplicates(self, items) -> list:
+        """
+        Returns:
+            list: (item, earlier identical item) for every duplicate of `items`.
+        """
+        duplicates = []
+        for item in items:
+            earlier = self.add(item)
+            if earlier is not None:
+                duplicates.append((item, earlier))
+        return duplicates
+
+    def _lookup(self, digest: int) -> list:
+        offsets = self._entries.get(digest, ())
+        offsets = [offsets] if isinstance(offsets, int) else list(offsets)
+        for run in self._runs:
+            offsets += run.lookup(digest)
+        return offsets
+
+    def _store(self, digest: int, record: bytes):
+        offset = self._records_end
+        self._records.write(len(record).to_bytes(4, "little") + record)
+        self._records_end += 4 + len(record)
+
+        previous = self._entries.get(digest)
+        if previous is None:
+            self._entries[digest] = offset
+        else:
+            self._entries[digest] = (previous if isinstance(previous, list) else [previous]) + [offset]
+        if len(self._entries) >= self.max_entries:
+            self._spill()
+
+    def _read_record(self, offset: int) -> bytes:
+        # only digest matches are read back: seeking (which flushes the pending writes) is rare enough
+        records = self._records
+        records.seek(offset)
+        length = int.from_bytes(records.read(4), "little")
+        record = records.read(length)
+        records.seek(self._records_end)
+        return record
+
+    def _spill(self):
+        entries = self._entries
+        self._runs.append(_SpilledRun(self._run_path(), (
+            (digest, offset) for digest in sorted(entries)
+            for offset in (entries[digest] if isinstance(entries[digest], list) else (entries[digest],)))))
+        self._entries = {}
+        self.stats.spilled_runs += 1
+        if len(self._runs) > MAX_RUNS:
+            runs = self._runs
+            merged = _SpilledRun(self._run_path(), heapq.merge(*(zip(run.digests, run.offsets) for run in runs)))
+            for run in runs:
+                run.close()
+            self._runs = [merged]
+
+    def _run_path(self) -> str:
+        self._run_number += 1
+        return os.path.join(self.directory, f"run-{self._run_number}.bin")
+
+    def close(self):
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._records.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,133 @@
+import inspect
+import string
+from dataclasses import dataclass, field
+from urllib.parse import quote, quote_plus
+from core.request_builder import http_request
+
+
+def encode_path_value(value) -> str:
+    return quote(str(value), safe="")
+
+
+def encode_query_value(value) -> str:
+    return quote_plus(str(value))
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """
+    Declaration of one endpoint.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Path template, placeholders are the parameter names (E.g. "/users/{user_id}/posts").
+        switcher (str): Key of the endpoint in the route table.
+        query (dict): Required query parameters: {query name: parameter name} (E.g. {"postId": "post_id"}).
+        optional_query (dict): Query parameters left out of the URL when their value is None.
+        client_method (str): Name of the generated client method.
+    """
+    method: str
+    path: str
+    switcher: str
+    query: dict = field(default_factory=dict)
+    optional_query: dict = field(default_factory=dict)
+    client_method: str = None
+
+    def __hash__(self):
+        return hash((self.method, self.path, self.switcher))
+
+    @property
+    def template(self) -> str:
+        """
+        Path and query as one `str.format` template (E.g. "/comments?postId={post_id}").
+        """
+        if not self.query:
+            return self.path
+        return f"{self.path}?" + "&".join(f"{name}={{{param}}}" for name, param in self.query.items())
+
+
+class Route:
+    """
+    An `Endpoint` compiled once: the path template is split into literal segments and parameter slots, the
+    query string prefixes are precomputed, so building a URL is a join over a few encoded values.
+    """
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        self.name = endpoint.switcher
+        self.method = endpoint.method
+        self.client_method = endpoint.client_method or endpoint.switcher.lower()
+
+        self._path_parts = []
+        self.path_params = []
+        for literal, param, _, _ in string.Formatter().parse(endpoint.path):
+            if literal:
+                self._path_parts.append((literal, None))
+            if param is not None:
+                self._path_parts.append(("", param))
+                self.path_params.append(param)
+        self._query = [(f"{name}=", param) for name, param in endpoint.query.items()]
+        self._optional_query = [(f"{name}=", param) for name, param in endpoint.optional_query.items()]
+        self.required_params = frozenset(self.path_params) | {param for _, param in self._query}
+        self.params = self.required_params | {param for _, param in self._optional_query}
+
+    def url(self, base_url: str, params: dict) -> str:
+        missing = self.required_params.difference(params)
+        if missing:
+            raise ValueError(f"Missing parameters for {self.name}: {sorted(missing)}")
+        unknown = params.keys() - self.params
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.name}: {sorted(unknown)}")
+
+        parts = [base_url]
+        for literal, param in self._path_parts:
+            parts.append(literal if param is None else encode_path_value(params[param]))
+        query = [f"{prefix}{encode_query_value(params[param])}" for prefix, param in self._query]
+        query += [f"{prefix}{encode_query_value(params[param])}" for prefix, param in self._optional_query
+                  if params.get(param) is not None]
+        if query:
+            parts.append("?")
+            parts.append("&".join(query))
+        return "".join(parts)
+
+    def request(self, base_url: str, headers=None, request_body=None, stream: bool = False, **params):
+        return http_request(self.method, self.url(base_url, params), headers=headers, json=request_body,
+                            stream=stream)
+
+    def signature(self) -> inspect.Signature:
+        parameters = [inspect.Parameter("self", inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+        parameters += [inspect.Parameter(param, inspect.Parameter.KEYWORD_ONLY)
+                       for param in self.path_params + [param for _, param in self._query]]
+        parameters += [inspect.Parameter(param, inspect.Parameter.KEYWORD_ONLY, default=None)
+                       for _, param in self._optional_query]
+        parameters += [inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, default=default)
+                       for name, default in (("headers", None), ("request_body", None), ("stream", False))]
+        return inspect.Signature(parameters)
+
+
+def compile_routes(endpoints) -> dict:
+    """
+    Returns:
+        dict: switcher key -> `Route`, built once (at import of the module declaring the endpoints).
+    """
+    return {endpoint.switcher: Route(endpoint) for endpoint in endpoints}
+
+
+def build_client(class_name: str, routes: dict, base_url_fn, doc: str = None) -> type:
+    """
+    Generate a client class with one method per route (named after `Endpoint.client_method`), E.g.
+    `client.get_post_comments(post_id=1)`. `base_url_fn()` is resolved on every call.
+    """
+    def make_method(route: Route):
+        def method(self, headers=None, request_body=None, stream=False, **params):
+            return route.request(base_url_fn(), headers, request_body, stream, **params)
+
+        method.__name__ = method.__qualname__ = route.client_method
+        method.__doc__ = f"{route.method} {route.endpoint.template}"
+        method.__signature__ = route.signature()
+        return method
+
+    namespace = {route.client_method: make_method(route) for route in routes.values()}
+    namespace["__doc__"] = doc
+    namespace["routes"] = routes
+    return type(class_name, (), namespace)
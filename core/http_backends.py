@@ -0,0 +1,639 @@
+import asyncio
+import concurrent.futures
+import http.client
+import json as json_module
+import os
+import socket
+import ssl
+import threading
+import time
+from time import perf_counter_ns
+from urllib.parse import urlsplit
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+from requests.utils import default_user_agent, get_encoding_from_headers
+from urllib3.util.retry import Retry
+from core.constants import HTTP_RETRY_STATUS_CODES
+from core.request_timing import (RequestTiming, TimedHTTPAdapter, TimedHTTPConnectionPool, TimedHTTPSConnectionPool,
+                                 TimedResponse)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+BODY_CHUNK_SIZE = 64 * 1024  # read size of the backends that download the body themselves
+# sent by the backends that build their own requests, like requests does (without compression: they do not
+# decode gzip, the stand-in server does not compress anyway)
+DEFAULT_HEADERS = {"User-Agent": default_user_agent(), "Accept": "*/*"}
+
+
+def encode_body(headers, json, files) -> tuple:
+    """
+    Encode a JSON or multipart body the way requests does, for the backends that send raw bytes.
+
+    Returns:
+        tuple: (headers with Content-Type, body bytes or None)
+    """
+    headers = dict(DEFAULT_HEADERS, **(headers or {}))
+    if files is not None:
+        prepared = requests.PreparedRequest()
+        prepared.headers = CaseInsensitiveDict()
+        prepared.prepare_body(None, files, json)
+        headers.update(prepared.headers)
+        return headers, prepared.body
+    if json is not None:
+        headers.setdefault("Content-Type", "application/json")
+        return headers, json_module.dumps(json, allow_nan=False).encode()
+    return headers, None
+
+
+def merge_headers(pairs) -> CaseInsensitiveDict:
+    # repeated headers are folded into one comma separated value, like requests does
+    headers = CaseInsensitiveDict()
+    for name, value in pairs:
+        headers[name] = f"{headers[name]}, {value}" if name in headers else value
+    return headers
+
+
+def build_response(url: str, status: int, reason: str, headers: CaseInsensitiveDict, raw,
+                   timing: RequestTiming) -> TimedResponse:
+    """
+    Wrap a response received by another HTTP stack into a `requests.Response`, so the helpers and controllers
+    use the same object whatever the backend. `raw` needs `read(amt)`, `close()` and (to reuse the connection)
+    `release_conn()`.
+    """
+    response = TimedResponse()
+    response.status_code = status
+    response.reason = reason
+    response.url = url
+    response.headers = headers
+    response.encoding = get_encoding_from_headers(headers)
+    response.raw = raw
+    response.connection = None
+    response.timing = timing
+    return response
+
+
+def download(response: TimedResponse, timing: RequestTiming):
+    started_ns = perf_counter_ns()
+    response.content
+    timing.download_ns = perf_counter_ns() - started_ns
+
+
+class HTTPBackend:
+    """
+    One HTTP stack behind `core.request_builder.HTTPTransport` (`HTTP_BACKEND`).
+
+    `send` returns a `TimedResponse` whatever the stack: without `stream` the body is already downloaded (timed
+    as `timing.download_ns`), with `stream` the caller reads it and closing the response hands the connection
+    back to the pool. Connection errors are raised as `requests.ConnectionError` / `requests.Timeout`.
+
+    502/504 and connection errors are retried `max_retries` times (idempotent methods only), like the urllib3
+    `Retry` the requests backend is configured with.
+    """
+    name = None
+
+    def __init__(self, keep_alive: bool = True, pool_connections: int = 10, pool_maxsize: int = 10,
+                 max_retries: int = 0, backoff_factor: float = 0.5, timeout: float = 30):
+        self.keep_alive = keep_alive
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+
+    def send(self, timing: RequestTiming, method, url, headers, json, files, stream) -> TimedResponse:
+        retries = self.max_retries if method in Retry.DEFAULT_ALLOWED_METHODS else 0
+        for attempt in range(retries + 1):
+            try:
+                response = self._send_once(timing, method, url, headers, json, files, stream)
+            except requests.ConnectionError:
+                if attempt == retries:
+                    raise
+            else:
+                if attempt == retries or response.status_code not in HTTP_RETRY_STATUS_CODES:
+                    return response
+                response.close()
+            time.sleep(self.backoff_factor * 2 ** attempt)
+
+    def _send_once(self, timing: RequestTiming, method, url, headers, json, files, stream) -> TimedResponse:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsBackend(HTTPBackend):
+    """
+    One pooled, keep-alive `requests.Session` per process, with the instrumented urllib3 connection pools.
+    With `keep_alive=False` every request runs on a fresh session closed right after.
+    """
+    name = "requests"
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        retries = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=HTTP_RETRY_STATUS_CODES,
+            raise_on_status=False,
+        )
+        adapter = TimedHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                                   max_retries=retries)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def session(self) -> requests.Session:
+        # a forked process must not share the parent's sockets -> rebuild the session per pid
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def send(self, timing: RequestTiming, method, url, headers, json, files, stream) -> TimedResponse:
+        if self.keep_alive:
+            return self._send(self.session, timing, method, url, headers, json, files, stream)
+        if stream:
+            # the throwaway session is closed together with the response
+            session = self._build_session()
+            response = self._send(session, timing, method, url, headers, json, files, stream)
+            response.raw.release_conn = session.close
+            return response
+        with self._build_session() as session:
+            return self._send(session, timing, method, url, headers, json, files, stream)
+
+    def _send(self, session, timing, method, url, headers, json, files, stream) -> TimedResponse:
+        # stream the body ourselves, so the download is timed apart from the time to first byte
+        try:
+            response = session.request(method=method, url=url, headers=headers, json=json, files=files,
+                                       timeout=self.timeout, stream=True)
+        except requests.ConnectionError as error:
+            # requests reports a read timeout that used up the urllib3 retries as a connection error
+            reason = getattr(error.args[0] if error.args else None, "reason", None)
+            if not isinstance(error, requests.Timeout) and isinstance(reason, urllib3.exceptions.TimeoutError):
+                raise requests.Timeout(*error.args, request=error.request, response=error.response)
+            raise
+        response.__class__ = TimedResponse
+        response.timing = timing
+        if not stream:
+            download(response, timing)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+class Urllib3Backend(HTTPBackend):
+    """
+    A bare `urllib3.PoolManager` (the instrumented pools of the requests backend, without the `requests.Session`
+    layer: no cookies, hooks, redirects or environment proxy lookup on every request).
+    """
+    name = "urllib3"
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._manager = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _build_manager(self) -> urllib3.PoolManager:
+        retries = Retry(total=self.max_retries, backoff_factor=self.backoff_factor,
+                        status_forcelist=HTTP_RETRY_STATUS_CODES, raise_on_status=False)
+        manager = urllib3.PoolManager(num_pools=self.pool_connections, maxsize=self.pool_maxsize, retries=retries,
+                                      timeout=urllib3.Timeout(self.timeout),
+                                      headers=dict(DEFAULT_HEADERS, **urllib3.make_headers(accept_encoding=True)))
+        manager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+        return manager
+
+    @property
+    def manager(self) -> urllib3.PoolManager:
+        if self._manager is None or self._pid != os.getpid():
+            with self._lock:
+                if self._manager is None or self._pid != os.getpid():
+                    self._manager = self._build_manager()
+                    self._pid = os.getpid()
+        return self._manager
+
+    def send(self, timing: RequestTiming, method, url, headers, json, files, stream) -> TimedResponse:
+        manager = self.manager if self.keep_alive else self._build_manager()
+        headers, body = encode_body(dict(manager.headers, **(headers or {})), json, files)
+        try:
+            raw = manager.urlopen(method, url, body=body, headers=headers, redirect=False, preload_content=False,
+                                  decode_content=True)
+        except urllib3.exceptions.TimeoutError as error:
+            raise requests.Timeout(error)
+        except urllib3.exceptions.MaxRetryError as error:
+            if isinstance(error.reason, urllib3.exceptions.TimeoutError):
+                raise requests.Timeout(error)
+            raise requests.ConnectionError(error)
+        except urllib3.exceptions.HTTPError as error:
+            raise requests.ConnectionError(error)
+        if not self.keep_alive:
+            raw.release_conn = manager.clear
+        response = build_response(raw.geturl() or url, raw.status, raw.reason, CaseInsensitiveDict(raw.headers),
+                                  raw, timing)
+        if not stream:
+            download(response, timing)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._manager is not None and self._pid == os.getpid():
+                self._manager.clear()
+            self._manager = None
+            self._pid = None
+
+
+class _PooledBody:
+    """
+    `raw` of a `http.client` response: the connection goes back to the pool once the body is read to the end,
+    and is closed if the response is closed before that.
+    """
+
+    def __init__(self, response: http.client.HTTPResponse, release):
+        self._response = response
+        self._release = release
+        self._complete = False
+
+    def read(self, amt=None) -> bytes:
+        try:
+            data = self._response.read(amt)
+        except (OSError, http.client.HTTPException) as error:
+            self.close()
+            raise requests.ConnectionError(error)
+        if self._response.isclosed():  # http.client closes the response at the end of the body
+            self._complete = True
+            self.release_conn()
+        return data
+
+    def close(self):
+        self._response.close()
+        self.release_conn()
+
+    def release_conn(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release(self._complete and not self._response.will_close)
+
+
+class HTTPClientBackend(HTTPBackend):
+    """
+    Standard library `http.client` connections kept alive in a small LIFO pool per host (at most `pool_maxsize`
+    idle connections). No redirects, no proxies, no content decoding: the thinnest synchronous stack.
+    A reused connection the server closed in the meantime is replaced by a fresh one transparently.
+    """
+    name = "http.client"
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._idle = {}  # (scheme, host, port) -> idle connections, most recently used last
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def _checkout(self, key: tuple) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._pid != os.getpid():  # forked: the parent's sockets are not ours
+                self._idle, self._pid = {}, os.getpid()
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def _checkin(self, key: tuple, connection: http.client.HTTPConnection, reusable: bool):
+        if reusable and self.keep_alive:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.pool_maxsize and self._pid == os.getpid():
+                    idle.append(connection)
+                    return
+        connection.close()
+
+    def _connect(self, timing: RequestTiming, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        timing.reused_connection = False
+        started_ns = perf_counter_ns()
+        try:
+            address = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][4]
+            resolved_ns = perf_counter_ns()
+            timing.dns_ns += resolved_ns - started_ns
+            sock = socket.create_connection(address[:2], self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connected_ns = perf_counter_ns()
+            timing.connect_ns += connected_ns - resolved_ns
+            if scheme == "https":
+                sock = self._ssl_context.wrap_socket(sock, server_hostname=host)
+                timing.tls_ns += perf_counter_ns() - connected_ns
+        except socket.timeout as error:
+            raise requests.ConnectTimeout(error)
+        except OSError as error:
+            raise requests.ConnectionError(error)
+        timing._connected_ns = perf_counter_ns()
+        connection = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        connection.sock = sock
+        return connection
+
+    def _send_once(self, timing: RequestTiming, method, url, headers, json, files, stream) -> TimedResponse:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or DEFAULT_PORTS[parts.scheme])
+        target = f"{parts.path or '/'}?{parts.query}" if parts.query else (parts.path or "/")
+        headers, body = encode_body(headers, json, files)
+
+        while True:
+            connection = self._checkout(key) if self.keep_alive else None
+            reused = connection is not None
+            if connection is None:
+                connection = self._connect(timing, *key)
+            try:
+                connection.request(method, target, body=body, headers=headers)
+                raw = connection.getresponse()
+                break
+            except (OSError, http.client.HTTPException) as error:
+                connection.close()
+                if isinstance(error, socket.timeout):
+                    raise requests.Timeout(error)
+                if not reused:  # a fresh connection failing is a real error, a stale idle one is retried
+                    raise requests.ConnectionError(error)
+        timing.ttfb_ns = perf_counter_ns() - max(timing._request_start_ns, timing._connected_ns)
+
+        body = _PooledBody(raw, lambda reusable: self._checkin(key, connection, reusable))
+        response = build_response(url, raw.status, raw.reason, merge_headers(raw.getheaders()), body, timing)
+        if not stream:
+            download(response, timing)
+        return response
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            if self._pid != os.getpid():
+                return
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+class _AsyncBody:
+    """
+    Incremental reader of a response body on an asyncio stream (Content-Length, chunked or until close).
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, headers: CaseInsensitiveDict, has_body: bool):
+        self.reader = reader
+        self.chunked = "chunked" in headers.get("Transfer-Encoding", "").lower()
+        length = headers.get("Content-Length")
+        self.remaining = None if self.chunked or length is None else int(length)
+        self.until_close = has_body and not self.chunked and self.remaining is None
+        self.complete = not has_body or self.remaining == 0
+        self.chunk_left = 0
+
+    async def read(self, amt: int = BODY_CHUNK_SIZE) -> bytes:
+        if self.complete:
+            return b""
+        if self.chunked:
+            if not self.chunk_left:
+                self.chunk_left = int((await self.reader.readline()).split(b";")[0], 16)
+                if not self.chunk_left:
+                    while (await self.reader.readline()).strip():  # trailers
+                        pass
+                    self.complete = True
+                    return b""
+            data = await self.reader.read(min(amt, self.chunk_left))
+            self.chunk_left -= len(data)
+            if not self.chunk_left:
+                await self.reader.readexactly(2)  # CRLF after the chunk
+        elif self.until_close:
+            data = await self.reader.read(amt)
+            self.complete = not data
+            return data
+        else:
+            data = await self.reader.read(min(amt, self.remaining))
+            self.remaining -= len(data)
+            self.complete = not self.remaining
+        if not data:
+            raise asyncio.IncompleteReadError(b"", None)
+        return data
+
+    async def read_all(self) -> bytes:
+        if self.remaining is not None and not self.complete:
+            data = await self.reader.readexactly(self.remaining)
+            self.remaining = 0
+            self.complete = True
+            return data
+        parts = []
+        while not self.complete:
+            parts.append(await self.read())
+        return b"".join(parts)
+
+
+class _AsyncStreamBody:
+    """
+    `raw` of a streamed response of the asyncio backend: every read runs on the backend's event loop.
+    """
+
+    def __init__(self, backend: "AsyncioBackend", body: _AsyncBody, release):
+        self._backend = backend
+        self._body = body
+        self._release = release
+
+    def read(self, amt=None) -> bytes:
+        if self._body.complete:
+            self.release_conn()
+            return b""
+        try:
+            data = self._backend.run(self._body.read_all() if amt is None else self._body.read(amt))
+        except Exception:
+            self.close()
+            raise
+        if self._body.complete:
+            self.release_conn()
+        return data
+
+    def close(self):
+        self.release_conn()
+
+    def release_conn(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            self._backend.loop.call_soon_threadsafe(release, self._body.complete)
+
+
+class AsyncioBackend(HTTPBackend):
+    """
+    HTTP/1.1 client on asyncio streams, running on one event loop thread per process: the calling threads
+    only hand requests over to the loop and wait, so any number of requests in flight share one thread for all
+    the socket work. Keep-alive connections are pooled per host on the loop. Like the `http.client` backend it
+    does not follow redirects nor decode compressed bodies.
+    """
+    name = "asyncio"
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._idle = {}  # (scheme, host, port) -> idle (reader, writer), only touched from the loop
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    self._loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=self._loop.run_forever, name="http-asyncio",
+                                                    daemon=True)
+                    self._thread.start()
+                    self._idle = {}
+                    self._pid = os.getpid()
+        return self._loop
+
+    def run(self, coroutine):
+        """
+        Run `coroutine` on the backend's loop and wait for its result, with the errors of the other backends.
+        """
+        try:
+            return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+        # the future converts the loop's asyncio.TimeoutError to its own class (a distinct one before Python 3.11)
+        except (asyncio.TimeoutError, concurrent.futures.TimeoutError, socket.timeout) as error:
+            raise requests.Timeout(error)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as error:
+            raise requests.ConnectionError(error)
+
+    def _send_once(self, timing: RequestTiming, method, url, headers, json, files, stream) -> TimedResponse:
+        headers, body = encode_body(headers, json, files)
+        status, reason, response_headers, content, raw = self.run(
+            self._fetch(timing, method, url, headers, body, stream))
+        response = build_response(url, status, reason, response_headers, raw, timing)
+        if content is not None:
+            response._content = content
+            response._content_consumed = True
+        return response
+
+    async def _connect(self, timing: RequestTiming, scheme: str, host: str, port: int) -> tuple:
+        timing.reused_connection = False
+        started_ns = perf_counter_ns()
+        address = (await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM))[0][4]
+        resolved_ns = perf_counter_ns()
+        timing.dns_ns += resolved_ns - started_ns
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(address[0], address[1]), self.timeout)
+        connected_ns = perf_counter_ns()
+        timing.connect_ns += connected_ns - resolved_ns
+        if scheme == "https":
+            await asyncio.wait_for(writer.start_tls(self._ssl_context, server_hostname=host), self.timeout)
+            timing.tls_ns += perf_counter_ns() - connected_ns
+        timing._connected_ns = perf_counter_ns()
+        return reader, writer
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> tuple:
+        while True:
+            status_line = await reader.readline()
+            if not status_line:  # closed by the server (e.g. an idle keep-alive connection)
+                raise asyncio.IncompleteReadError(b"", None)
+            _, _, status_reason = status_line.decode("latin-1").rstrip("\r\n").partition(" ")
+            status, _, reason = status_reason.partition(" ")
+            pairs = []
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n"):
+                    break
+                if not line:
+                    raise asyncio.IncompleteReadError(b"", None)
+                name, _, value = line.decode("latin-1").partition(":")
+                pairs.append((name.strip(), value.strip()))
+            if int(status) != 100:  # skip interim 100 Continue
+                return int(status), reason, merge_headers(pairs)
+
+    def _release(self, key: tuple, connection: tuple, reusable: bool):
+        idle = self._idle.setdefault(key, [])
+        if reusable and self.keep_alive and len(idle) < self.pool_maxsize:
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def _fetch(self, timing: RequestTiming, method, url, headers, body, stream) -> tuple:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or DEFAULT_PORTS[parts.scheme])
+        target = f"{parts.path or '/'}?{parts.query}" if parts.query else (parts.path or "/")
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {parts.netloc.rpartition('@')[2]}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body or b'')}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+        while True:
+            idle = self._idle.get(key) if self.keep_alive else None
+            connection = idle.pop() if idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = await self._connect(timing, *key)
+            reader, writer = connection
+            try:
+                writer.write(request)
+                status, reason, response_headers = await asyncio.wait_for(self._read_head(reader), self.timeout)
+                break
+            except (OSError, asyncio.IncompleteReadError, ValueError) as error:
+                writer.close()
+                # a fresh connection failing (or a timeout) is a real error, a stale idle one is retried
+                if not reused or isinstance(error, TimeoutError):
+                    raise
+        timing.ttfb_ns = perf_counter_ns() - max(timing._request_start_ns, timing._connected_ns)
+
+        has_body = method != "HEAD" and status not in (204, 304) and status >= 200
+        reader_body = _AsyncBody(reader, response_headers, has_body)
+        reusable = not reader_body.until_close and "close" not in response_headers.get("Connection", "").lower()
+        if stream:
+            raw = _AsyncStreamBody(self, reader_body, lambda complete: self._release(key, connection,
+                                                                                    complete and reusable))
+            return status, reason, response_headers, None, raw
+
+        download_started_ns = perf_counter_ns()
+        try:
+            content = await asyncio.wait_for(reader_body.read_all(), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        timing.download_ns = perf_counter_ns() - download_started_ns
+        self._release(key, connection, reusable)
+        return status, reason, response_headers, content, None
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+            if loop is None or self._pid != os.getpid():
+                return
+
+        async def close_idle():
+            for connections in self._idle.values():
+                for _, writer in connections:
+                    writer.close()
+            self._idle = {}
+
+        asyncio.run_coroutine_threadsafe(close_idle(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+
+HTTP_BACKENDS = {backend.name: backend for backend in (RequestsBackend, Urllib3Backend, HTTPClientBackend,
+                                                       AsyncioBackend)}
+
+
+def create_backend(name: str, **options) -> HTTPBackend:
+    """
+    Returns:
+        HTTPBackend: A new backend of `HTTP_BACKENDS` (`options` are the `HTTPBackend` keyword arguments).
+    """
+    if name not in HTTP_BACKENDS:
+        raise ValueError(f"Unknown HTTP backend {name!r}, expected one of {sorted(HTTP_BACKENDS)}")
+    return HTTP_BACKENDS[name](**options)
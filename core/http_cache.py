@@ -0,0 +1,231 @@
+import hashlib
+import io
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from core.constants import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES
+from core.shared_storage import (BypassCounter, FileLock, MergeableStats, load_process_stats, read_json,
+                                 save_process_stats, write_json)
+
+HTTP_CACHE_FOLDER = "http_cache"
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body_hash: str
+    size: int
+    headers: dict  # STORED_HEADERS of the response
+
+    def conditional_headers(self) -> dict:
+        """
+        Returns:
+            dict: The validators to revalidate the entry with (If-None-Match / If-Modified-Since).
+        """
+        headers = {}
+        if self.headers.get("ETag"):
+            headers["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+
+@dataclass
+class HTTPCacheStats(MergeableStats):
+    requests: int = 0  # cacheable requests
+    hits: int = 0  # 304 answered from the cache
+    stored: int = 0
+    bypassed: int = 0
+    bytes_saved: int = 0  # body bytes not downloaded thanks to a 304
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.requests} cacheable requests, {self.hits} served from the cache ({self.hit_ratio:.1%}), "
+                f"{self.bytes_saved / 1024 / 1024:.2f} MiB not downloaded, {self.stored} bodies stored, "
+                f"{self.bypassed} requests bypassed the cache")
+
+
+class HTTPCache:
+    """
+    On-disk HTTP cache shared by the xdist workers and kept across runs (`HTTP_CACHE=1`).
+
+    Bodies of GET responses carrying a validator (ETag / Last-Modified) are stored once under their SHA-256
+    (`bodies/`), and every URL points to its body through a small entry file (`entries/`). Entries are always
+    revalidated with a conditional request (`If-None-Match` / `If-Modified-Since`, like `Cache-Control: no-cache`):
+    on a 304 the body is served from disk through a memory map, so only the headers travel on the network.
+
+    The bodies are kept under `max_bytes`, evicting the least recently used first (the mtime of a body is
+    refreshed every time it is served). Responses with `Cache-Control: no-store` are never stored.
+    """
+
+    def __init__(self, directory: str = HTTP_CACHE_DIR, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = HTTPCacheStats()
+        self._stats_lock = threading.Lock()
+        self._bypass = BypassCounter()
+        os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "entries"), exist_ok=True)
+
+    @property
+    def bypassed(self) -> bool:
+        return bool(self._bypass)
+
+    def bypass(self) -> BypassCounter:
+        """
+        Send every request of the block (from any thread of the process) to the server without the cache.
+        """
+        return self._bypass
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.directory, "entries", hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.directory, "bodies", body_hash)
+
+    def lookup(self, url: str) -> CacheEntry:
+        """
+        Returns:
+            CacheEntry: The stored entry of `url` (None if there is none or its body was evicted).
+        """
+        self._count(requests=1)
+        data = read_json(self._entry_path(url))
+        if data is None or not os.path.exists(self._body_path(data["body_hash"])):
+            return None
+        return CacheEntry(**data)
+
+    def count_bypass(self):
+        self._count(bypassed=1)
+
+    @staticmethod
+    def storable(response) -> bool:
+        return (response.status_code == 200
+                and bool(response.headers.get("ETag") or response.headers.get("Last-Modified"))
+                and "no-store" not in response.headers.get("Cache-Control", ""))
+
+    def store(self, url: str, response, stream: bool):
+        """
+        Store the body of a 200 response. A streamed body is copied to disk chunk by chunk (constant memory)
+        and the response is replaced by one reading the stored copy.
+
+        Returns:
+            requests.Response: The response to hand to the caller.
+        """
+        tmp_path = os.path.join(self.directory, "bodies", f".{os.getpid()}.{threading.get_ident()}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        with open(tmp_path, "wb") as body:
+            chunks = response.iter_content(BODY_CHUNK_SIZE) if stream else [response.content]
+            for chunk in chunks:
+                digest.update(chunk)
+                body.write(chunk)
+                size += len(chunk)
+        body_hash = digest.hexdigest()
+        os.replace(tmp_path, self._body_path(body_hash))  # same content, same name: no duplicate bodies
+        entry = CacheEntry(url, body_hash, size,
+                           {name: response.headers[name] for name in STORED_HEADERS if name in response.headers})
+        write_json(self._entry_path(url), entry.__dict__)
+        self._count(stored=1)
+
+        if stream:
+            # mapped before the eviction, so the caller gets the body even if it does not fit in the cache
+            response = self._serve(entry, response, stream)
+        self._evict()
+        return response
+
+    def serve(self, entry: CacheEntry, not_modified, stream: bool):
+        """
+        Answer a 304 with the stored body.
+
+        Returns:
+            requests.Response: A 200 response with the cached body (`from_cache=True`), None if the body was
+            evicted in the meantime.
+        """
+        _ = not_modified.content  # empty, read so a streamed 304 keeps its pooled connection
+        response = self._serve(entry, not_modified, stream)
+        if response is not None:
+            self._count(hits=1, bytes_saved=entry.size)
+        return response
+
+    def _serve(self, entry: CacheEntry, original, stream: bool):
+        path = self._body_path(entry.body_hash)
+        try:
+            with open(path, "rb") as body:
+                # the map stays valid after the file is closed (or evicted by another worker)
+                mapped = mmap.mmap(body.fileno(), 0, access=mmap.ACCESS_READ) if entry.size else None
+            os.utime(path)  # LRU: most recently used
+        except FileNotFoundError:
+            return None
+
+        response = original.__class__()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = original.url
+        response.request = original.request
+        response.connection = original.connection
+        response.elapsed = original.elapsed
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.headers["Content-Length"] = str(entry.size)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.timing = getattr(original, "timing", None)
+        response.from_cache = True
+        original.close()
+        if stream:
+            response.raw = mapped if mapped is not None else io.BytesIO()
+        else:
+            response._content = mapped[:] if mapped is not None else b""
+            response._content_consumed = True
+            if mapped is not None:
+                mapped.close()
+        return response
+
+    def _evict(self):
+        """
+        Remove the least recently used bodies until the cache fits in `max_bytes`.
+        """
+        with FileLock(os.path.join(self.directory, "evict.lock")):
+            bodies = []
+            for body in os.scandir(os.path.join(self.directory, "bodies")):
+                if not body.name.startswith("."):
+                    stat = body.stat()
+                    bodies.append((stat.st_mtime, stat.st_size, body.path))
+            total = sum(size for _, size, _ in bodies)
+            for _, size, path in sorted(bodies):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)  # entries pointing to it become misses
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def save_stats(self):
+        """
+        Store the stats of this process in the run directory (aggregated by `load_http_cache_stats`).
+        """
+        if self.stats.requests or self.stats.bypassed:
+            save_process_stats(HTTP_CACHE_FOLDER, self.stats.__dict__)
+
+
+def load_http_cache_stats() -> HTTPCacheStats:
+    """
+    Returns:
+        HTTPCacheStats: The stats saved by every process of the run, merged.
+    """
+    total = HTTPCacheStats()
+    for stats in load_process_stats(HTTP_CACHE_FOLDER):
+        total.merge(HTTPCacheStats(**stats))
+    return total
@@ -0,0 +1,76 @@
+import codecs
+import json
+import re
+
+STREAM_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s*")
+
+
+def iter_json_array(chunks, encoding: str = "utf-8"):
+    """
+    Yield the items of a top-level JSON array one at a time while its bytes arrive.
+
+    Only the current item and the unread part of the last chunk are kept in memory, so the memory used does
+    not depend on the size of the array (unlike `response.json()`, which holds the whole body and every
+    decoded item at once).
+
+    Args:
+        chunks (iterable): Byte chunks of the body, e.g. `response.iter_content(STREAM_CHUNK_SIZE)`.
+        encoding (str): Encoding of the body.
+
+    Raises:
+        json.JSONDecodeError: If the body is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ""
+    position = 0
+    started = False
+    expect_item = True  # an item (or the closing bracket) is expected, as opposed to a separator
+    finished = False
+    chunks = iter(chunks)
+
+    while True:
+        chunk = next(chunks, None)
+        final = chunk is None
+        buffer = buffer[position:] + text_decoder.decode(chunk or b"", final=final)
+        position = 0
+
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise json.JSONDecodeError("Expected a JSON array", buffer, position)
+                started = True
+                position += 1
+                continue
+            if finished:
+                raise json.JSONDecodeError("Extra data after the JSON array", buffer, position)
+            if buffer[position] == "]":
+                finished = True
+                position += 1
+                continue
+            if not expect_item:
+                if buffer[position] != ",":
+                    raise json.JSONDecodeError("Expected ',' or ']'", buffer, position)
+                expect_item = True
+                position += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break  # incomplete item, wait for the next chunk
+            if end == len(buffer) and not final:
+                break  # a number may continue in the next chunk, decode it again once more data is there
+            position = end
+            expect_item = False
+            yield item
+
+        if final:
+            if not finished:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, position)
+            return
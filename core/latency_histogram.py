@@ -0,0 +1,121 @@
+import math
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram: values (integer microseconds) are kept in log-linear buckets with a fixed
+    relative precision of `significant_digits`, so memory does not depend on the number of samples.
+
+    Values below `2 * 10 ** significant_digits` are stored exactly, larger values with a relative error
+    below 10 ** -significant_digits. Two histograms with the same precision merge exactly (bucket counts
+    are added), which is what makes percentiles from several workers exact instead of averaged.
+    """
+
+    def __init__(self, significant_digits: int = 3):
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.counts = [0] * self.sub_bucket_count
+        self.total_count = 0
+        self.total_sum = 0
+        self.min_value = None
+        self.max_value = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (value >> shift) - self.sub_bucket_half
+
+    def _highest_equivalent_value(self, index: int) -> int:
+        if index < self.sub_bucket_count:
+            return index
+        shift, offset = divmod(index - self.sub_bucket_count, self.sub_bucket_half)
+        shift += 1
+        return ((offset + self.sub_bucket_half + 1) << shift) - 1
+
+    def record(self, value_us: int, count: int = 1):
+        value_us = max(int(value_us), 0)
+        index = self._index(value_us)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.total_count += count
+        self.total_sum += value_us * count
+        if self.min_value is None or value_us < self.min_value:
+            self.min_value = value_us
+        if value_us > self.max_value:
+            self.max_value = value_us
+
+    def merge(self, other: "LatencyHistogram"):
+        assert other.significant_digits == self.significant_digits, \
+            "Only histograms with the same precision can be merged exactly"
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total_count += other.total_count
+        self.total_sum += other.total_sum
+        if other.min_value is not None and (self.min_value is None or other.min_value < self.min_value):
+            self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+        return self
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """
+        Returns:
+            int: The value (us) below or equal to which `percentile` % of the samples fall.
+        """
+        if not self.total_count:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.total_count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_equivalent_value(index), self.max_value)
+        return self.max_value
+
+    @property
+    def mean(self) -> float:
+        return self.total_sum / self.total_count if self.total_count else 0.0
+
+    def summary_ms(self) -> dict:
+        """
+        Returns:
+            dict: count, mean, p50, p90, p99, p99.9 and max in milliseconds.
+        """
+        return {
+            "count": self.total_count,
+            "mean": self.mean / 1000,
+            "p50": self.value_at_percentile(50) / 1000,
+            "p90": self.value_at_percentile(90) / 1000,
+            "p99": self.value_at_percentile(99) / 1000,
+            "p99.9": self.value_at_percentile(99.9) / 1000,
+            "max": self.max_value / 1000,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "significant_digits": self.significant_digits,
+            "counts": {index: count for index, count in enumerate(self.counts) if count},
+            "total_sum": self.total_sum,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["significant_digits"])
+        for index, count in data["counts"].items():
+            index = int(index)
+            if index >= len(histogram.counts):
+                histogram.counts.extend([0] * (index + 1 - len(histogram.counts)))
+            histogram.counts[index] = count
+            histogram.total_count += count
+        histogram.total_sum = data["total_sum"]
+        histogram.min_value = data["min_value"]
+        histogram.max_value = data["max_value"]
+        return histogram
@@ -0,0 +1,311 @@
+import asyncio
+import functools
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from core.latency_histogram import LatencyHistogram
+from core.rate_limiter import get_rate_limiter
+from core.request_builder import http_request
+
+# load tests measure the API, never the HTTP cache, and their requests are not part of the captured traffic
+uncached_request = functools.partial(http_request, cache=False, capture=False)
+
+RATE_MODE = "rate"
+CONCURRENCY_MODE = "concurrency"
+
+
+@dataclass
+class LoadTarget:
+    name: str
+    method: str
+    url: str
+    headers: dict = None
+
+
+@dataclass
+class LoadProfile:
+    """
+    How the load is generated.
+
+    - `rate` mode (open loop): requests are started at a constant arrival rate (`rate` requests/s), whatever
+      the response times are. Latency is measured from the *intended* start time, so requests that queue up
+      behind slow ones are charged for the wait (no coordinated omission). `concurrency` caps the requests
+      in flight.
+    - `concurrency` mode (closed loop): `concurrency` workers send requests back to back.
+
+    The arrival rate (or the number of active workers) grows linearly during `ramp_up_s`. The run stops after
+    `duration_s` seconds or `max_requests` requests, whichever comes first.
+    """
+    mode: str = RATE_MODE
+    rate: float = 10.0
+    concurrency: int = 10
+    duration_s: float = 10.0
+    ramp_up_s: float = 0.0
+    max_requests: int = None
+    phase_s: float = 0.0  # shifts the whole arrival schedule, used to interleave the shards of a sharded run
+
+    def __post_init__(self):
+        # the arrival times are spaced by 1 / rate
+        if self.mode == RATE_MODE and not self.rate > 0:
+            raise ValueError(f"A {RATE_MODE} mode load profile needs a rate above 0 requests/s (LOAD_TEST_RATE), "
+                             f"got {self.rate}")
+
+    @property
+    def offered_rate(self) -> float:
+        """
+        Average arrival rate of a `rate` mode run over its whole duration, ramp-up included.
+        """
+        if not self.ramp_up_s:
+            return self.rate
+        if self.ramp_up_s >= self.duration_s:
+            return self.rate * self.duration_s / (2 * self.ramp_up_s)
+        return self.rate * (1 - self.ramp_up_s / (2 * self.duration_s))
+
+
+@dataclass
+class LoadResult:
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service_histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    histograms: dict = field(default_factory=dict)
+    errors: Counter = field(default_factory=Counter)
+    elapsed_s: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        return self.histogram.total_count
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors.values()) / self.requests if self.requests else 0.0
+
+    def record(self, target_name: str, latency_us: int, service_us: int, error: str = None):
+        self.histogram.record(latency_us)
+        self.service_histogram.record(service_us)
+        if target_name not in self.histograms:
+            self.histograms[target_name] = LatencyHistogram(self.histogram.significant_digits)
+        self.histograms[target_name].record(latency_us)
+        if error:
+            self.errors[error] += 1
+
+    def merge(self, other: "LoadResult"):
+        """
+        Exact merge: histogram buckets and error counters are added, the elapsed time is the longest one
+        (the shards of a sharded run start together).
+        """
+        self.histogram.merge(other.histogram)
+        self.service_histogram.merge(other.service_histogram)
+        for name, histogram in other.histograms.items():
+            if name in self.histograms:
+                self.histograms[name].merge(histogram)
+            else:
+                self.histograms[name] = histogram
+        self.errors.update(other.errors)
+        self.elapsed_s = max(self.elapsed_s, other.elapsed_s)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "histogram": self.histogram.to_dict(),
+            "service_histogram": self.service_histogram.to_dict(),
+            "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            "errors": dict(self.errors),
+            "elapsed_s": self.elapsed_s,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LoadResult":
+        return cls(
+            histogram=LatencyHistogram.from_dict(data["histogram"]),
+            service_histogram=LatencyHistogram.from_dict(data["service_histogram"]),
+            histograms={name: LatencyHistogram.from_dict(value) for name, value in data["histograms"].items()},
+            errors=Counter(data["errors"]),
+            elapsed_s=data["elapsed_s"],
+        )
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Human readable table with the latency percentiles per target and overall.
+        """
+        lines = [f"{'target':<28}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}  (ms)"]
+        rows = list(self.histograms.items()) + [("TOTAL", self.histogram)]
+        for name, histogram in rows:
+            summary = histogram.summary_ms()
+            lines.append(f"{name:<28}{summary['count']:>8}{summary['p50']:>10.2f}{summary['p90']:>10.2f}"
+                         f"{summary['p99']:>10.2f}{summary['p99.9']:>10.2f}{summary['max']:>10.2f}")
+        lines.append(f"throughput: {self.throughput:.2f} req/s over {self.elapsed_s:.2f}s, "
+                     f"errors: {dict(self.errors) or 0} ({self.error_rate:.2%})")
+        return "\n".join(lines)
+
+
+def arrival_offset_s(index: int, rate: float, ramp_up_s: float) -> float:
+    """
+    Intended start (seconds from the beginning) of request `index` for a rate that grows linearly from 0 to
+    `rate` during `ramp_up_s` and stays constant afterwards (inverse of the cumulative arrival function).
+    """
+    ramp_requests = rate * ramp_up_s / 2
+    if index < ramp_requests:
+        return math.sqrt(2 * ramp_up_s * index / rate)
+    return ramp_up_s + (index - ramp_requests) / rate
+
+
+class LoadGenerator:
+    """
+    Drives `targets` (round robin) with the given `LoadProfile` from an asyncio event loop. The blocking
+    requests run on a thread pool of `profile.concurrency` workers through `request_fn`
+    (`http_request` without the HTTP cache by default, so the pooled transport is used).
+
+        result = LoadGenerator(targets, LoadProfile(rate=50, duration_s=30)).run()
+        result.histogram.value_at_percentile(99)
+    """
+
+    def __init__(self, targets: list, profile: LoadProfile, request_fn=uncached_request):
+        assert targets, "At least one load target is required"
+        assert profile.mode in (RATE_MODE, CONCURRENCY_MODE), f"Unknown load mode: {profile.mode}"
+        self.targets = targets
+        self.profile = profile
+        self.request_fn = request_fn
+
+    def run(self) -> LoadResult:
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> LoadResult:
+        result = LoadResult()
+        with ThreadPoolExecutor(max_workers=max(1, self.profile.concurrency)) as executor:
+            start_ns = time.perf_counter_ns()
+            if self.profile.mode == RATE_MODE:
+                await self._run_open_loop(executor, result, start_ns)
+            else:
+                await self._run_closed_loop(executor, result, start_ns)
+            result.elapsed_s = (time.perf_counter_ns() - start_ns) / 1e9
+        return result
+
+    def _send(self, target: LoadTarget):
+        """
+        Runs on the executor. Returns the actual start/end timestamps and the error label, if any.
+        """
+        started_ns = time.perf_counter_ns()
+        try:
+            response = self.request_fn(target.method, target.url, headers=target.headers)
+            error = f"HTTP {response.status_code}" if response.status_code >= 400 else None
+        except Exception as exception:
+            error = type(exception).__name__
+        return started_ns, time.perf_counter_ns(), error
+
+    async def _issue(self, loop, executor, result: LoadResult, target: LoadTarget, intended_ns: int):
+        started_ns, finished_ns, error = await loop.run_in_executor(executor, self._send, target)
+        result.record(target.name, (finished_ns - intended_ns) // 1000, (finished_ns - started_ns) // 1000,
+                      error)
+
+    async def _run_open_loop(self, executor, result: LoadResult, start_ns: int):
+        loop = asyncio.get_running_loop()
+        profile = self.profile
+        pending = set()
+        index = 0
+        while profile.max_requests is None or index < profile.max_requests:
+            offset_s = arrival_offset_s(index, profile.rate, profile.ramp_up_s) + profile.phase_s
+            if offset_s >= profile.duration_s:
+                break
+            intended_ns = start_ns + int(offset_s * 1e9)
+            delay_s = (intended_ns - time.perf_counter_ns()) / 1e9
+            if delay_s > 0:
+                await asyncio.sleep(delay_s)
+            target = self.targets[index % len(self.targets)]
+            task = asyncio.ensure_future(self._issue(loop, executor, result, target, intended_ns))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            index += 1
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def _run_closed_loop(self, executor, result: LoadResult, start_ns: int):
+        loop = asyncio.get_running_loop()
+        profile = self.profile
+        deadline_ns = start_ns + int(profile.duration_s * 1e9)
+        counter = itertools.count() if profile.max_requests is None else iter(range(profile.max_requests))
+
+        async def worker(worker_index: int):
+            # workers are started evenly over the ramp-up period
+            await asyncio.sleep(profile.ramp_up_s * worker_index / profile.concurrency)
+            for index in counter:
+                intended_ns = time.perf_counter_ns()
+                if intended_ns >= deadline_ns:
+                    break
+                target = self.targets[index % len(self.targets)]
+                await self._issue(loop, executor, result, target, intended_ns)
+
+        await asyncio.gather(*(worker(worker_index) for worker_index in range(profile.concurrency)))
+
+
+def _run_shard(targets: list, profile: LoadProfile, request_fn, start_at: float) -> dict:
+    """
+    Entry point of a load worker process: it has its own event loop and its own `http_request` transport
+    (the module level transport is created on import in the new process).
+    """
+    delay_s = start_at - time.time()
+    if delay_s > 0:
+        time.sleep(delay_s)
+    result = LoadGenerator(targets, profile, request_fn).run().to_dict()
+    get_rate_limiter().save_stats()  # counted in the run's rate limiting summary
+    return result
+
+
+class ShardedLoadGenerator:
+    """
+    Runs the load from `processes` worker processes, to get past the GIL / single core limit of one
+    generator. The target rate, the concurrency and the request limit are split between the shards and the
+    shard schedules are interleaved, so together they produce the same arrival stream as one generator would.
+    All the shards start at the same wall clock time; their histograms and error counters are merged exactly.
+
+        result = ShardedLoadGenerator(targets, LoadProfile(rate=2000, concurrency=200), processes=8).run()
+    """
+
+    def __init__(self, targets: list, profile: LoadProfile, processes: int = None, request_fn=uncached_request,
+                 startup_s: float = 2.0):
+        self.targets = targets
+        self.profile = profile
+        self.processes = processes or os.cpu_count() or 1
+        self.request_fn = request_fn
+        self.startup_s = startup_s  # time given to the processes to start before the common start time
+
+    @staticmethod
+    def _split(value: int, parts: int, index: int) -> int:
+        return value // parts + (1 if index < value % parts else 0)
+
+    def shard_profiles(self) -> list:
+        profile = self.profile
+        shards = []
+        for index in range(self.processes):
+            shards.append(LoadProfile(
+                mode=profile.mode,
+                rate=profile.rate / self.processes,
+                concurrency=max(1, self._split(profile.concurrency, self.processes, index)),
+                duration_s=profile.duration_s,
+                ramp_up_s=profile.ramp_up_s,
+                max_requests=(None if profile.max_requests is None
+                              else self._split(profile.max_requests, self.processes, index)),
+                phase_s=profile.phase_s + index / profile.rate if profile.mode == RATE_MODE else profile.phase_s,
+            ))
+        return shards
+
+    def run(self) -> LoadResult:
+        shards = self.shard_profiles()
+        start_at = time.time() + self.startup_s
+        context = multiprocessing.get_context("spawn")  # no inherited sockets or event loop state
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as pool:
+            futures = [pool.submit(_run_shard, self.targets, shard, self.request_fn, start_at) for shard in shards]
+            results = [LoadResult.from_dict(future.result()) for future in futures]
+
+        merged = results[0]
+        for result in results[1:]:
+            merged.merge(result)
+        return merged
@@ -0,0 +1,235 @@
+import glob
+import heapq
+import json
+import logging
+import os
+import queue
+import re
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from urllib.parse import urlsplit
+from core.constants import LOG_LEVEL, LOG_JSONL, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+FILE_TEXT_FORMAT = "%(asctime)s [%(levelname)s] [%(worker_id)s] %(message)s"
+JSONL_EXTENSION = ".jsonl"
+REQUEST_FIELDS = ("method", "endpoint", "status", "latency_ms")
+_RECORD_START = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+_context = {"test_id": None}
+
+
+def get_worker_id() -> str:
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+def set_log_test_id(test_id: str = None):
+    """
+    Test id attached to the records logged from now on (None between tests).
+    """
+    _context["test_id"] = test_id
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamps every record with the worker id and the running test, on the logging thread (so the test is the one
+    running when the record was created, not when the listener writes it).
+    """
+
+    def __init__(self, worker_id: str = None):
+        super().__init__()
+        self.worker_id = worker_id or get_worker_id()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.worker_id = self.worker_id
+        record.test_id = _context["test_id"]
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Enqueues the record as is: `msg % args` and the traceback are formatted by the listener thread, so a log
+    call only costs the record creation and a queue put. The queue stays in the process, so nothing has to be
+    made picklable (mutable args are formatted as they are when the listener gets to them).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, worker, test, message, plus the request fields of the
+    `log_request_timing` records. `ts` comes first so the lines of several files sort by time.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="microseconds"),
+            "level": record.levelname,
+            "worker": getattr(record, "worker_id", None),
+            "test": getattr(record, "test_id", None),
+            "message": record.getMessage(),
+        }
+        for name in REQUEST_FIELDS:
+            if hasattr(record, name):
+                entry[name] = getattr(record, name)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def worker_log_file(log_file: str, worker_id: str = None) -> str:
+    """
+    Returns:
+        str: File written by an xdist worker (output/<run>.gw0.log), the run file itself for the main process.
+    """
+    worker_id = worker_id or get_worker_id()
+    if worker_id == "main":
+        return log_file
+    root, extension = os.path.splitext(log_file)
+    return f"{root}.{worker_id}{extension}"
+
+
+def jsonl_log_file(log_file: str) -> str:
+    return os.path.splitext(log_file)[0] + JSONL_EXTENSION
+
+
+class LoggingPipeline:
+    """
+    Asynchronous logging for `pytest.logger`: the logger only holds a `LazyQueueHandler`, and a `QueueListener`
+    thread formats the records and writes them to the console and to this process's size-rotated log file
+    (plus a JSONL file with `structured=True`). Each xdist worker writes its own files, merged by
+    `merge_worker_logs` at the end of the run, so writes of different workers never interleave.
+
+        pipeline = LoggingPipeline("pytest-logger", log_file)
+        logger = pipeline.start()
+        ...
+        pipeline.stop()  # flushes the queue
+    """
+
+    def __init__(self, name: str, log_file: str, level: str = LOG_LEVEL, structured: bool = LOG_JSONL,
+                 max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT, console: bool = True,
+                 worker_id: str = None):
+        self.name = name
+        self.worker_id = worker_id or get_worker_id()
+        self.log_file = worker_log_file(log_file, self.worker_id)
+        self.level = level
+        self.structured = structured
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.console = console
+        self.logger = logging.getLogger(name)
+        self._queue_handler = None
+        self._listener = None
+
+    def _file_handler(self, path: str, formatter: logging.Formatter) -> logging.Handler:
+        handler = RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                                      encoding="utf-8", delay=True)
+        handler.setFormatter(formatter)
+        return handler
+
+    def start(self) -> logging.Logger:
+        if self._listener is not None:
+            return self.logger
+
+        handlers = [self._file_handler(self.log_file, logging.Formatter(FILE_TEXT_FORMAT))]
+        if self.structured:
+            handlers.append(self._file_handler(jsonl_log_file(self.log_file), JsonLinesFormatter()))
+        if self.console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        self._queue_handler = LazyQueueHandler(log_queue)
+        self._queue_handler.addFilter(ContextFilter(self.worker_id))
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
+        self.logger.setLevel(self.level)
+        self.logger.addHandler(self._queue_handler)
+        return self.logger
+
+    def stop(self):
+        """
+        Write the records still queued and close the files.
+        """
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._queue_handler)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+        self._queue_handler = None
+
+
+def log_request_timing(timing):
+    """
+    Timing observer (`core.request_timing.add_timing_observer`) logging every request at DEBUG with its
+    endpoint, status and latency as record fields (kept as columns in the JSONL output).
+    """
+    logger = logging.getLogger("pytest-logger")
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    endpoint = urlsplit(timing.url).path
+    latency_ms = timing.total_ns / 1e6
+    logger.debug("%s %s -> %s in %.1fms", timing.method, endpoint, timing.status, latency_ms,
+                 extra={"method": timing.method, "endpoint": endpoint, "status": timing.status,
+                        "latency_ms": round(latency_ms, 3)})
+
+
+def _rotated_files(path: str) -> list:
+    """
+    `path` and its RotatingFileHandler backups, oldest first.
+    """
+    backups = sorted(glob.glob(f"{glob.escape(path)}.[0-9]*"), key=lambda backup: -int(backup.rsplit(".", 1)[1]))
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+def _read_records(paths: list, multiline: bool):
+    """
+    Yield the records of the files in order. Text records can span several lines (tracebacks, docstrings):
+    a record starts at a line beginning with its timestamp.
+    """
+    record = ""
+    for path in paths:
+        with open(path, encoding="utf-8") as log:
+            for line in log:
+                if multiline and record and not _RECORD_START.match(line):
+                    record += line
+                    continue
+                if record:
+                    yield record
+                record = line
+    if record:
+        yield record
+
+
+def merge_worker_logs(log_file: str) -> str:
+    """
+    Merge the log files of every process of the run (main process + xdist workers, rotated backups included)
+    into `log_file` ordered by time, and remove the per-worker files. Same for the JSONL files.
+
+    Returns:
+        str: `log_file`
+    """
+    for path, multiline in ((log_file, True), (jsonl_log_file(log_file), False)):
+        root, extension = os.path.splitext(path)
+        worker_files = [file for file in glob.glob(f"{glob.escape(root)}.gw*{extension}*")
+                        if re.fullmatch(r"\.gw\d+" + re.escape(extension) + r"(\.\d+)?", file[len(root):])]
+        if not worker_files:
+            continue
+
+        workers = sorted({file[len(root):].split(extension)[0] for file in worker_files})
+        sources = [_rotated_files(path)] + [_rotated_files(f"{root}{worker}{extension}") for worker in workers]
+        merged_path = f"{path}.merging"
+        with open(merged_path, "w", encoding="utf-8") as merged:
+            # every file is already in time order and records start with their timestamp
+            merged.writelines(heapq.merge(*(_read_records(files, multiline) for files in sources)))
+
+        for file in set(sum(sources, [])):
+            os.remove(file)
+        os.replace(merged_path, path)
+    return log_file
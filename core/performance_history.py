@@ -0,0 +1,222 @@
+import html
+import json
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from core.constants import (PERF_HISTORY_FILE, PERF_BASELINE_RUNS, PERF_MIN_BASELINE_RUNS, PERF_SIGNIFICANCE,
+                            PERF_MIN_EFFECT_SIZE, PERF_MIN_SLOWDOWN_MS, LOAD_TEST_MAX_ERROR_RATE)
+from core.latency_histogram import LatencyHistogram
+from core.shared_storage import FileLock, get_run_id
+
+TOTAL = "TOTAL"
+
+
+@dataclass
+class MannWhitneyResult:
+    u: float
+    p_value: float  # one-sided: probability of a shift this large towards slower if nothing changed
+    effect_size: float  # Vargha-Delaney A: P(current > baseline) + P(equal) / 2, 0.5 = no difference
+
+
+def mann_whitney_u(current: LatencyHistogram, baseline: LatencyHistogram) -> MannWhitneyResult:
+    """
+    One-sided Mann-Whitney U test (is `current` slower than `baseline`?) computed on the histogram buckets:
+    the samples of one bucket are ties, so U and the tie-corrected variance come from the bucket counts
+    instead of the raw samples. Uses the normal approximation, fine for the sample sizes of a load test.
+    """
+    assert current.significant_digits == baseline.significant_digits, \
+        "Only histograms with the same precision can be compared bucket by bucket"
+    n1, n2 = current.total_count, baseline.total_count
+    if not n1 or not n2:
+        return MannWhitneyResult(0.0, 1.0, 0.5)
+
+    u = 0.0
+    baseline_below = 0
+    ties = 0
+    for index in range(max(len(current.counts), len(baseline.counts))):
+        current_count = current.counts[index] if index < len(current.counts) else 0
+        baseline_count = baseline.counts[index] if index < len(baseline.counts) else 0
+        u += current_count * (baseline_below + baseline_count / 2)
+        baseline_below += baseline_count
+        tied = current_count + baseline_count
+        ties += tied ** 3 - tied
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:  # every sample in the same bucket
+        return MannWhitneyResult(u, 1.0, 0.5)
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return MannWhitneyResult(u, 0.5 * math.erfc(z / math.sqrt(2)), u / (n1 * n2))
+
+
+@dataclass
+class EndpointComparison:
+    endpoint: str
+    current: dict  # LatencyHistogram.summary_ms()
+    baseline: dict = None  # None until the history holds PERF_MIN_BASELINE_RUNS runs
+    test: MannWhitneyResult = None
+    regressed: bool = False
+
+
+@dataclass
+class PerformanceComparison:
+    test: str
+    baseline_runs: int
+    endpoints: list = field(default_factory=list)
+    trend: list = field(default_factory=list)  # previous runs (oldest first) + this one: time, throughput, p50, p99
+
+    @property
+    def regressions(self) -> list:
+        return [endpoint for endpoint in self.endpoints if endpoint.regressed]
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Human readable table of the current p50/p99 against the baseline, per endpoint.
+        """
+        if not self.baseline_runs:
+            return f"No performance baseline for {self.test} yet, this run starts the history"
+        lines = [f"{'endpoint':<28}{'p50':>10}{'base p50':>10}{'p99':>10}{'base p99':>10}{'A':>7}{'p-value':>10}"]
+        for comparison in self.endpoints:
+            if comparison.baseline is None:
+                continue
+            lines.append(f"{comparison.endpoint:<28}{comparison.current['p50']:>10.2f}"
+                         f"{comparison.baseline['p50']:>10.2f}{comparison.current['p99']:>10.2f}"
+                         f"{comparison.baseline['p99']:>10.2f}{comparison.test.effect_size:>7.2f}"
+                         f"{comparison.test.p_value:>10.1e}{'  REGRESSION' if comparison.regressed else ''}")
+        lines.append(f"baseline: last {self.baseline_runs} runs (ms, A = probability of a slower request)")
+        return "\n".join(lines)
+
+    def html_table(self) -> str:
+        rows = []
+        for run in self.trend:
+            excluded = "" if run["baseline"] else " (not in the baseline)"
+            rows.append(f"<tr><td>{html.escape(run['time'])}{excluded}</td><td>{run['requests']}</td>"
+                        f"<td>{run['throughput']:.2f}</td><td>{run['p50']:.2f}</td><td>{run['p99']:.2f}</td></tr>")
+        regressions = "".join(f"<p>Regression on {html.escape(comparison.endpoint)}: p50 "
+                              f"{comparison.baseline['p50']:.2f} -> {comparison.current['p50']:.2f} ms "
+                              f"(A = {comparison.test.effect_size:.2f}, p = {comparison.test.p_value:.1e})</p>"
+                              for comparison in self.regressions)
+        return (f"<table><tr><th>run</th><th>requests</th><th>throughput (req/s)</th><th>p50 (ms)</th>"
+                f"<th>p99 (ms)</th></tr>{''.join(rows)}</table>{regressions}")
+
+
+class PerformanceHistory:
+    """
+    Append-only JSONL store of the load test results (one line per test and run: throughput and the latency
+    histogram of every endpoint), kept across runs in `output/` so each run is compared against the previous ones.
+
+        comparison = PerformanceHistory().record(test_key, load_result)
+        assert not comparison.regressions, comparison.report()
+
+    A regression is a one-sided Mann-Whitney U test below `significance`, an effect size (Vargha-Delaney A) of at
+    least `min_effect_size` *and* a p50 at least `min_slowdown_ms` above the baseline's: with thousands of samples
+    tiny shifts are significant, and the baseline pools several runs, so the test alone does not see the
+    run-to-run noise of a sub-millisecond local server. Nothing is gated until `min_baseline_runs` runs are in
+    the history.
+
+    Every run is stored (and shown in the trend), but a run that regressed or failed more than `max_error_rate`
+    of its requests is flagged out of the baseline: a few slow runs in a row cannot become the new normal.
+    """
+
+    def __init__(self, path: str = PERF_HISTORY_FILE, baseline_runs: int = PERF_BASELINE_RUNS,
+                 min_baseline_runs: int = PERF_MIN_BASELINE_RUNS, significance: float = PERF_SIGNIFICANCE,
+                 min_effect_size: float = PERF_MIN_EFFECT_SIZE, min_slowdown_ms: float = PERF_MIN_SLOWDOWN_MS,
+                 max_error_rate: float = LOAD_TEST_MAX_ERROR_RATE):
+        self.path = path
+        self.baseline_runs = baseline_runs
+        self.min_baseline_runs = min_baseline_runs
+        self.significance = significance
+        self.min_effect_size = min_effect_size
+        self.min_slowdown_ms = min_slowdown_ms
+        self.max_error_rate = max_error_rate
+
+    def load(self, test: str) -> list:
+        """
+        Returns:
+            list: The entries of `test`, oldest first.
+        """
+        entries = []
+        try:
+            with open(self.path, encoding="utf-8") as history:
+                for line in history:
+                    # cheap substring check first, most lines belong to other tests
+                    if test in line:
+                        entry = json.loads(line)
+                        if entry["test"] == test:
+                            entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def append(self, entry: dict):
+        # xdist workers append to the same file
+        with FileLock(f"{self.path}.lock"):
+            with open(self.path, "a", encoding="utf-8") as history:
+                history.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def record(self, test: str, result) -> PerformanceComparison:
+        """
+        Compare a `LoadResult` against the rolling baseline of `test`, then add it to the history (out of the
+        baseline of the next runs if it regressed or had too many errors).
+        """
+        histograms = dict(result.histograms, **{TOTAL: result.histogram})
+        entry = {
+            "test": test,
+            "run_id": get_run_id(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "requests": result.requests,
+            "throughput": round(result.throughput, 3),
+            "error_rate": result.error_rate,
+            "histograms": {name: histogram.to_dict() for name, histogram in histograms.items()},
+        }
+        previous = [past for past in self.load(test) if past["run_id"] != entry["run_id"]]
+        baseline = [past for past in previous if past.get("baseline", True)][-self.baseline_runs:]
+        comparison = self.compare(test, histograms, baseline)
+        entry["baseline"] = not comparison.regressions and result.error_rate <= self.max_error_rate
+        comparison.trend = [self._trend_row(past) for past in previous[-self.baseline_runs:] + [entry]]
+        self.append(entry)
+        return comparison
+
+    def compare(self, test: str, histograms: dict, previous: list) -> PerformanceComparison:
+        gated = len(previous) >= self.min_baseline_runs
+        comparison = PerformanceComparison(test, len(previous) if gated else 0)
+        for name, histogram in histograms.items():
+            endpoint = EndpointComparison(name, histogram.summary_ms())
+            baseline = self._baseline(name, histogram.significant_digits, previous) if gated else None
+            if baseline is not None:
+                endpoint.baseline = baseline.summary_ms()
+                endpoint.test = mann_whitney_u(histogram, baseline)
+                endpoint.regressed = (endpoint.test.p_value < self.significance
+                                      and endpoint.test.effect_size >= self.min_effect_size
+                                      and endpoint.current["p50"] - endpoint.baseline["p50"] >= self.min_slowdown_ms)
+            comparison.endpoints.append(endpoint)
+        return comparison
+
+    @staticmethod
+    def _baseline(name: str, significant_digits: int, previous: list) -> LatencyHistogram:
+        """
+        Returns:
+            LatencyHistogram: The histograms of `name` in the previous runs merged, None if it was never measured.
+        """
+        baseline = None
+        for past in previous:
+            data = past["histograms"].get(name)
+            if data is None or data["significant_digits"] != significant_digits:
+                continue
+            histogram = LatencyHistogram.from_dict(data)
+            baseline = histogram if baseline is None else baseline.merge(histogram)
+        return baseline
+
+    @staticmethod
+    def _trend_row(entry: dict) -> dict:
+        total = LatencyHistogram.from_dict(entry["histograms"][TOTAL]).summary_ms()
+        return {"time": entry["time"], "requests": entry["requests"], "throughput": entry["throughput"],
+                "p50": total["p50"], "p99": total["p99"], "baseline": entry.get("baseline", True)}
+
+
+def performance_history_key(test: str, environment: str) -> str:
+    """
+    History key of a test: results against different servers (API, local stand-in) are never compared.
+    """
+    return f"{test}@{environment}" if environment else test
@@ -0,0 +1,197 @@
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import re
+import tracemalloc
+from contextlib import contextmanager
+from core.constants import PROFILE_TOP_N, PROFILE_MAX_DEPTH
+from core.shared_storage import read_json, write_json
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+MIN_SAMPLE_S = 1e-6  # flame graph branches lighter than this are dropped
+# allocations of the profiling itself and of the import machinery are not the test's
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def function_label(function: tuple) -> str:
+    """
+    Readable name of a pstats function key (file, line, name).
+    """
+    file_name, line, name = function
+    if file_name == "~":  # built-in
+        return name
+    return f"{name} ({os.path.basename(file_name)}:{line})"
+
+
+def speedscope_profile(stats: pstats.Stats, name: str) -> dict:
+    """
+    speedscope "sampled" profile built from the cProfile call graph: the cumulative time of every function is
+    split between its callees in proportion to the time of each call edge, which gives approximate stacks
+    (cProfile keeps callers, not full stacks). Also readable by the other flame graph viewers speedscope exports to.
+    """
+    children = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            children.setdefault(caller, []).append((function, edge_cumulative))
+
+    frames, frame_index = [], {}
+    samples, weights = [], []
+
+    def frame(function) -> int:
+        if function not in frame_index:
+            frame_index[function] = len(frames)
+            file_name, line, _ = function
+            frames.append({"name": function_label(function), "file": file_name, "line": line})
+        return frame_index[function]
+
+    def walk(function, total_s: float, stack: list):
+        _, _, own, cumulative, _ = stats.stats[function]
+        stack = stack + [frame(function)]
+        scale = total_s / cumulative if cumulative else 0.0
+        if own * scale >= MIN_SAMPLE_S:
+            samples.append(stack)
+            weights.append(own * scale)
+        if len(stack) >= PROFILE_MAX_DEPTH:
+            return
+        for child, edge_cumulative in children.get(function, ()):
+            if frame_index.get(child) in stack:  # recursion: its time is already in the outer call
+                continue
+            if edge_cumulative * scale >= MIN_SAMPLE_S:
+                walk(child, edge_cumulative * scale, stack)
+
+    roots = [function for function, (_, _, _, _, callers) in stats.stats.items()
+             if not any(caller in stats.stats for caller in callers)]
+    for root in roots:
+        walk(root, stats.stats[root][3], [])
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "core.profiling",
+        "shared": {"frames": frames},
+        "profiles": [{"type": "sampled", "name": name, "unit": "seconds", "startValue": 0,
+                      "endValue": sum(weights), "samples": samples, "weights": weights}],
+    }
+
+
+class TestProfiler:
+    """
+    `--profile-tests`: every test call runs under cProfile and tracemalloc. For each test it writes to
+    `output_dir`:
+
+    - `<test>.prof`: the pstats dump (snakeviz, gprof2dot, flameprof...);
+    - `<test>.speedscope.json`: flame graph for https://www.speedscope.app;
+    - `<test>.txt`: top functions (cumulative time) and top allocation sites (memory still held at the end of
+      the test, by line).
+
+    Hot spots are aggregated per process into `hotspots-<pid>.json`, merged by `load_hotspots` for the session
+    summary (one file per xdist worker). Nothing is instrumented for the tests when the option is off: the
+    profiler is simply not created.
+    """
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, output_dir: str, top: int = PROFILE_TOP_N):
+        self.output_dir = output_dir
+        self.top = top
+        self.functions = {}  # label -> [calls, own s, cumulative s, tests]
+        self.allocations = {}  # site -> [bytes, blocks, tests]
+        os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def profile(self, test_id: str):
+        profiler = cProfile.Profile()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            self._store(test_id, profiler, after.filter_traces(SNAPSHOT_FILTERS).compare_to(
+                before.filter_traces(SNAPSHOT_FILTERS), "lineno"), peak)
+
+    def _store(self, test_id: str, profiler: cProfile.Profile, allocations: list, peak_bytes: int):
+        stats = pstats.Stats(profiler)
+        base = os.path.join(self.output_dir, re.sub(r"[^\w.-]+", "_", test_id).strip("_")[:150])
+        stats.dump_stats(f"{base}.prof")
+        with open(f"{base}.speedscope.json", "w", encoding="utf-8") as speedscope:
+            json.dump(speedscope_profile(stats, test_id), speedscope)
+
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(self.top)
+        growth = [statistic for statistic in allocations if statistic.size_diff > 0][:self.top]
+        report.write(f"Peak traced memory: {peak_bytes / 1024:.1f} KiB\nTop allocation sites (held at the end):\n")
+        for statistic in growth:
+            report.write(f"  {statistic.size_diff / 1024:10.1f} KiB {statistic.count_diff:8} blocks  "
+                         f"{statistic.traceback[0]}\n")
+        with open(f"{base}.txt", "w", encoding="utf-8") as summary:
+            summary.write(report.getvalue())
+
+        for function, (_, calls, own, cumulative, _) in stats.stats.items():
+            totals = self.functions.setdefault(function_label(function), [0, 0.0, 0.0, 0])
+            totals[0] += calls
+            totals[1] += own
+            totals[2] += cumulative
+            totals[3] += 1
+        for statistic in growth:
+            totals = self.allocations.setdefault(str(statistic.traceback[0]), [0, 0, 0])
+            totals[0] += statistic.size_diff
+            totals[1] += statistic.count_diff
+            totals[2] += 1
+
+    def save_hotspots(self, keep: int = 200):
+        """
+        Store this process's aggregated hot spots (the `keep` heaviest of each kind) for the session summary.
+        """
+        if not self.functions:
+            return
+        functions = dict(sorted(self.functions.items(), key=lambda item: -item[1][1])[:keep])
+        allocations = dict(sorted(self.allocations.items(), key=lambda item: -item[1][0])[:keep])
+        write_json(os.path.join(self.output_dir, f"hotspots-{os.getpid()}.json"),
+                   {"functions": functions, "allocations": allocations})
+
+
+def load_hotspots(output_dir: str) -> dict:
+    """
+    Returns:
+        dict: The hot spots saved by every process, merged ({"functions": {...}, "allocations": {...}}).
+    """
+    merged = {"functions": {}, "allocations": {}}
+    for path in glob.glob(os.path.join(output_dir, "hotspots-*.json")):
+        for kind, entries in read_json(path, {}).items():
+            for label, values in entries.items():
+                totals = merged[kind].setdefault(label, [0] * len(values))
+                merged[kind][label] = [total + value for total, value in zip(totals, values)]
+    return merged
+
+
+def hotspots_table(hotspots: dict, top: int = PROFILE_TOP_N) -> str:
+    """
+    Returns:
+        str: The functions with the most own time and the allocation sites holding the most memory, over all
+        the profiled tests.
+    """
+    lines = [f"{'own s':>9}{'cum s':>9}{'calls':>10}{'tests':>7}  function"]
+    functions = sorted(hotspots["functions"].items(), key=lambda item: -item[1][1])[:top]
+    for label, (calls, own, cumulative, tests) in functions:
+        lines.append(f"{own:>9.3f}{cumulative:>9.3f}{calls:>10}{tests:>7}  {label}")
+    lines.append(f"\n{'KiB':>9}{'blocks':>9}{'tests':>17}  allocation site")
+    allocations = sorted(hotspots["allocations"].items(), key=lambda item: -item[1][0])[:top]
+    for site, (size, blocks, tests) in allocations:
+        lines.append(f"{size / 1024:>9.1f}{blocks:>9}{tests:>17}  {site}")
+    return "\n".join(lines)
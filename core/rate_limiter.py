@@ -0,0 +1,314 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from core.constants import (RATE_LIMIT_RPS, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CONCURRENCY, RATE_LIMIT_MAX_RETRIES,
+                            RATE_LIMIT_BACKOFF_S, RATE_LIMIT_MAX_WAIT_S, RATE_LIMIT_STATUS_CODES)
+from core.shared_storage import (FileLock, get_run_directory, load_process_stats, read_json, save_process_stats,
+                                 write_json)
+
+RATE_LIMITS_FOLDER = "rate_limits"
+
+
+def parse_retry_after(value) -> float:
+    """
+    Returns:
+        float: Seconds to wait from a `Retry-After` header (delay in seconds or HTTP date), None if not usable.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the requests in flight (one per host and process): +1/limit after every success (about +1
+    per round of requests), times `decrease_factor` on a throttled response. Only responses to requests that
+    started after the last decrease lower it again, so one burst of 429s counts as a single signal.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease_factor: float = 0.5):
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = min(max(min_limit, 1), self.max_limit)
+        self.decrease_factor = decrease_factor
+        self.lowest_limit = self.max_limit
+        self._limit = float(self.max_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), self.min_limit)
+
+    def acquire(self) -> float:
+        """
+        Block until a slot is free.
+
+        Returns:
+            float: `time.monotonic()` when the slot was granted (pass it to `on_throttle`).
+        """
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+        return time.monotonic()
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            if self._limit < self.max_limit:
+                self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+                self._condition.notify_all()
+
+    def on_throttle(self, started: float):
+        with self._condition:
+            if started >= self._last_decrease:
+                self._limit = max(self._limit * self.decrease_factor, self.min_limit)
+                self._last_decrease = time.monotonic()
+                self.lowest_limit = min(self.lowest_limit, self.limit)
+
+
+class SharedTokenBucket:
+    """
+    Token bucket of one host, kept in a file of the run directory so every xdist worker draws from the same
+    bucket (`rate` requests/s for the whole run, bursts up to `burst`). It also holds the time until which the
+    host asked to be left alone (`Retry-After`), which every worker honours.
+
+    Without a rate the state file only exists once the host throttled us, so the common path is one
+    `os.path.exists` per request.
+    """
+
+    def __init__(self, host: str, rate: float = RATE_LIMIT_RPS, burst: int = RATE_LIMIT_BURST):
+        self.host = host
+        self.rate = rate
+        self.burst = max(burst, 1)
+        file_name = re.sub(r"[^\w.-]", "_", host) or "default"
+        # created by the first write (FileLock creates the directory)
+        self.path = os.path.join(get_run_directory(RATE_LIMITS_FOLDER, create=False), f"{file_name}.json")
+
+    def wait(self) -> float:
+        """
+        Block until a token is available and the host is not blocked.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self._reserve()
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def _reserve(self) -> float:
+        if not self.rate:
+            if not os.path.exists(self.path):
+                return 0.0
+            return read_json(self.path, {}).get("blocked_until", 0.0) - time.time()
+
+        with FileLock(f"{self.path}.lock"):
+            now = time.time()
+            state = read_json(self.path, {})
+            blocked_until = state.get("blocked_until", 0.0)
+            if blocked_until > now:
+                return blocked_until - now
+            tokens = min(self.burst, state.get("tokens", self.burst) + (now - state.get("updated", now)) * self.rate)
+            delay = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                delay = (1 - tokens) / self.rate
+            state.update(tokens=tokens, updated=now)
+            write_json(self.path, state)
+            return delay
+
+    def block(self, delay_s: float):
+        """
+        Make every worker hold its requests to this host for `delay_s` seconds.
+        """
+        with FileLock(f"{self.path}.lock"):
+            state = read_json(self.path, {})
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), time.time() + delay_s)
+            write_json(self.path, state)
+
+
+@dataclass
+class RateLimiterStats:
+    requests: int = 0  # attempts sent, retries included
+    retries: int = 0
+    gave_up: int = 0  # throttled responses returned to the caller once the retries were exhausted
+    throttled: dict = field(default_factory=dict)  # status code -> count
+    waited_s: float = 0.0  # time spent waiting for tokens / Retry-After
+    started: float = None  # time.time() of the first and last request
+    finished: float = None
+    lowest_limit: int = None  # lowest adaptive concurrency limit reached
+
+    @property
+    def elapsed_s(self) -> float:
+        return (self.finished - self.started) if self.requests else 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed_s if self.elapsed_s else 0.0
+
+    def merge(self, other: "RateLimiterStats"):
+        if not other.requests:
+            return
+        self.requests += other.requests
+        self.retries += other.retries
+        self.gave_up += other.gave_up
+        for status, count in other.throttled.items():
+            self.throttled[str(status)] = self.throttled.get(str(status), 0) + count
+        self.waited_s += other.waited_s
+        self.started = min(filter(None, (self.started, other.started)))
+        self.finished = max(filter(None, (self.finished, other.finished)))
+        self.lowest_limit = min(filter(None, (self.lowest_limit, other.lowest_limit)))
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RateLimiterStats":
+        return cls(**data)
+
+    def summary(self) -> str:
+        throttled = ", ".join(f"{status}: {count}" for status, count in sorted(self.throttled.items())) or "none"
+        return (f"{self.requests} requests in {self.elapsed_s:.1f}s ({self.throughput:.1f} req/s), "
+                f"{self.retries} retries, throttled: {throttled}, gave up: {self.gave_up}, "
+                f"waited {self.waited_s:.1f}s for rate limits, lowest concurrency limit {self.lowest_limit}")
+
+
+class RateLimiter:
+    """
+    Scheduler every request of the transport goes through:
+
+    - a `SharedTokenBucket` per host caps the request rate of the whole run (all xdist workers together);
+    - an `AdaptiveConcurrency` per host lowers the requests in flight when the host answers 429/503 and
+      raises them back while it keeps up;
+    - throttled responses are retried (up to `max_retries`) after `Retry-After` (or an exponential backoff),
+      and the wait applies to every worker through the shared bucket.
+
+        with limiter.slot(url) as started:
+            response = send()
+        retry_after = limiter.on_response(url, response, started, attempt)
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT_RPS, burst: int = RATE_LIMIT_BURST,
+                 max_concurrency: int = RATE_LIMIT_MAX_CONCURRENCY, max_retries: int = RATE_LIMIT_MAX_RETRIES,
+                 backoff_s: float = RATE_LIMIT_BACKOFF_S, max_wait_s: float = RATE_LIMIT_MAX_WAIT_S,
+                 status_codes=RATE_LIMIT_STATUS_CODES):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_wait_s = max_wait_s
+        self.status_codes = frozenset(status_codes)
+        self.stats = RateLimiterStats()
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> tuple:
+        host = urlsplit(url).netloc
+        scheduler = self._hosts.get(host)
+        if scheduler is None:
+            with self._lock:
+                scheduler = self._hosts.get(host)
+                if scheduler is None:
+                    scheduler = (SharedTokenBucket(host, self.rate, self.burst),
+                                 AdaptiveConcurrency(self.max_concurrency))
+                    self._hosts[host] = scheduler
+        return scheduler
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Hold a concurrency slot and a token of the host of `url` while the request runs.
+        """
+        bucket, concurrency = self._host(url)
+        started = concurrency.acquire()
+        try:
+            waited = bucket.wait()
+            with self._lock:
+                stats = self.stats
+                stats.requests += 1
+                stats.waited_s += waited
+                stats.started = stats.started or time.time()
+            yield started
+        finally:
+            concurrency.release()
+            self.stats.finished = time.time()
+
+    def on_response(self, url: str, response, started: float, attempt: int) -> float:
+        """
+        Feed a response back to the scheduler.
+
+        Returns:
+            float: Seconds to wait before retrying (already applied to the shared bucket), None if the response
+            must be returned to the caller.
+        """
+        bucket, concurrency = self._host(url)
+        if response.status_code not in self.status_codes:
+            concurrency.on_success()
+            return None
+
+        concurrency.on_throttle(started)
+        with self._lock:
+            stats = self.stats
+            status = str(response.status_code)
+            stats.throttled[status] = stats.throttled.get(status, 0) + 1
+            stats.lowest_limit = min(filter(None, (stats.lowest_limit, concurrency.lowest_limit)))
+            if attempt >= self.max_retries:
+                stats.gave_up += 1
+                return None
+            stats.retries += 1
+
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = self.backoff_s * 2 ** attempt
+        delay = min(delay, self.max_wait_s)
+        bucket.block(delay)
+        return delay
+
+    def save_stats(self):
+        """
+        Store the stats of this process in the run directory (aggregated by `load_rate_limit_stats`).
+        """
+        if self.stats.requests:
+            self.stats.lowest_limit = min(concurrency.lowest_limit for _, concurrency in list(self._hosts.values()))
+            save_process_stats(RATE_LIMITS_FOLDER, self.stats.to_dict())
+
+
+def load_rate_limit_stats() -> RateLimiterStats:
+    """
+    Returns:
+        RateLimiterStats: The stats saved by every process of the run, merged.
+    """
+    total = RateLimiterStats()
+    for stats in load_process_stats(RATE_LIMITS_FOLDER):
+        total.merge(RateLimiterStats.from_dict(stats))
+    return total
+
+
+_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    return _rate_limiter
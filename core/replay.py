@@ -0,0 +1,227 @@
+import argparse
+import functools
+import math
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+from core.constants import TRAFFIC_LOG_FILE
+from core.json_stream import STREAM_CHUNK_SIZE
+from core.latency_histogram import LatencyHistogram
+from core.request_builder import http_request
+from core.traffic import body_digest, read_traffic
+
+MAX_SPEED = math.inf  # every request sent as soon as a slot is free, no inter-arrival gaps
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+# replayed requests reach the server (no HTTP cache) and are not captured again
+replay_request = functools.partial(http_request, cache=False, capture=False)
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """
+    Endpoint of a request with its ids and query values left out (E.g. "GET /posts/{id}/comments").
+    """
+    parts = urlsplit(url)
+    name = f"{method} {_ID_SEGMENT.sub('/{id}', parts.path)}"
+    query = "&".join(f"{key}=" for key, _ in parse_qsl(parts.query, keep_blank_values=True))
+    return f"{name}?{query}" if query else name
+
+
+def rebase_url(url: str, base_url: str) -> str:
+    """
+    `url` sent to `base_url` instead of its own host (the path of `base_url` is prepended).
+    """
+    target, parts = urlsplit(base_url), urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, target.path.rstrip("/") + parts.path, parts.query, ""))
+
+
+def peak_concurrency(entries: list) -> int:
+    """
+    Returns:
+        int: The highest number of captured requests in flight at the same time.
+    """
+    events = sorted([(entry["ts"], 1) for entry in entries]
+                    + [(entry["ts"] + entry["latency_ms"] / 1000, -1) for entry in entries])
+    peak = in_flight = 0
+    for _, change in events:  # at equal times, a request ends before the next one starts
+        in_flight += change
+        peak = max(peak, in_flight)
+    return peak
+
+
+@dataclass
+class EndpointDiff:
+    captured: LatencyHistogram = field(default_factory=LatencyHistogram)
+    replayed: LatencyHistogram = field(default_factory=LatencyHistogram)
+    status_mismatches: int = 0
+    body_mismatches: int = 0
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.captured.total_count
+
+
+@dataclass
+class ReplayReport:
+    speed: float
+    concurrency: int
+    captured_span_s: float
+    endpoints: dict = field(default_factory=dict)  # endpoint name -> EndpointDiff
+    mismatches: list = field(default_factory=list)  # (captured entry, replayed status, replayed digest or error)
+    elapsed_s: float = 0.0
+    max_lag_ms: float = 0.0  # latest start against the schedule (all `concurrency` slots busy)
+
+    @property
+    def requests(self) -> int:
+        return sum(diff.requests for diff in self.endpoints.values())
+
+    @property
+    def status_mismatches(self) -> int:
+        return sum(diff.status_mismatches for diff in self.endpoints.values())
+
+    @property
+    def body_mismatches(self) -> int:
+        return sum(diff.body_mismatches for diff in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(diff.errors for diff in self.endpoints.values())
+
+    def record(self, entry: dict, latency_us: int, status: int, digest: str, error: str = None):
+        name = endpoint_name(entry["method"], entry["url"])
+        diff = self.endpoints.get(name)
+        if diff is None:
+            diff = self.endpoints[name] = EndpointDiff()
+        diff.captured.record(round(entry["latency_ms"] * 1000))
+        if error is not None:
+            diff.errors += 1
+            self.mismatches.append((entry, None, error))
+            return
+        diff.replayed.record(latency_us)
+        status_differs = status != entry["status"]
+        body_differs = None not in (digest, entry.get("body_digest")) and digest != entry["body_digest"]
+        diff.status_mismatches += status_differs
+        diff.body_mismatches += body_differs
+        if status_differs or body_differs:
+            self.mismatches.append((entry, status, digest))
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Per endpoint table of the status / body differences and of the captured and replayed latencies.
+        """
+        speed = "max speed" if self.speed == MAX_SPEED else f"{self.speed:g}x"
+        lines = [f"{'endpoint':<36}{'count':>7}{'status':>8}{'body':>6}{'errors':>8}"
+                 f"{'p50 cap':>9}{'p50 rep':>9}{'delta':>8}{'p99 cap':>9}{'p99 rep':>9}{'delta':>8}  (ms)"]
+        for name, diff in sorted(self.endpoints.items()):
+            captured, replayed = diff.captured.summary_ms(), diff.replayed.summary_ms()
+            lines.append(f"{name:<36}{diff.requests:>7}{diff.status_mismatches:>8}{diff.body_mismatches:>6}"
+                         f"{diff.errors:>8}{captured['p50']:>9.2f}{replayed['p50']:>9.2f}"
+                         f"{replayed['p50'] - captured['p50']:>+8.2f}{captured['p99']:>9.2f}"
+                         f"{replayed['p99']:>9.2f}{replayed['p99'] - captured['p99']:>+8.2f}")
+        lines.append(f"{self.requests} requests replayed at {speed} with up to {self.concurrency} in flight in "
+                     f"{self.elapsed_s:.2f}s (captured over {self.captured_span_s:.2f}s, max start lag "
+                     f"{self.max_lag_ms:.1f}ms): {self.status_mismatches} status and {self.body_mismatches} body "
+                     f"mismatches, {self.errors} errors")
+        return "\n".join(lines)
+
+
+class TrafficReplay:
+    """
+    Re-issue a captured traffic log (`core.traffic`) against any server and diff the outcome with the capture.
+
+    Requests start at their captured offsets divided by `speed` (1 = real time, 2 = twice as fast, `MAX_SPEED`
+    = back to back), so the inter-arrival gaps are kept, with at most `concurrency` in flight: by default the
+    peak concurrency of the capture. Every response is compared with the captured one (status and body digest),
+    and the latencies are reported per endpoint against the captured ones.
+
+        replay = TrafficReplay.from_file(TRAFFIC_LOG_FILE, base_url="http://127.0.0.1:8000", speed=2)
+        report = replay.run()
+        pytest.logger.info(report.report())
+
+    Or from the command line: `python -m core.replay output/traffic.jsonl --base-url URL --speed max`.
+    """
+
+    def __init__(self, entries: list, base_url: str = None, speed: float = 1.0, concurrency: int = None,
+                 request_fn=replay_request):
+        if not speed > 0:
+            raise ValueError(f"The replay speed must be positive, got {speed}")
+        self.entries = sorted(entries, key=lambda entry: entry["ts"])
+        self.base_url = base_url
+        self.speed = speed
+        self.concurrency = concurrency or max(1, peak_concurrency(self.entries))
+        self.request_fn = request_fn
+
+    @classmethod
+    def from_file(cls, path: str = TRAFFIC_LOG_FILE, **kwargs) -> "TrafficReplay":
+        return cls(read_traffic(path), **kwargs)
+
+    def run(self) -> ReplayReport:
+        first_ts = self.entries[0]["ts"] if self.entries else 0.0
+        captured_span_s = max((entry["ts"] + entry["latency_ms"] / 1000 for entry in self.entries),
+                              default=first_ts) - first_ts
+        report = ReplayReport(self.speed, self.concurrency, captured_span_s)
+        lock = threading.Lock()
+
+        started_s = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="replay") as executor:
+            for entry in self.entries:
+                scheduled_s = started_s + (0.0 if self.speed == MAX_SPEED else (entry["ts"] - first_ts) / self.speed)
+                delay_s = scheduled_s - time.perf_counter()
+                if delay_s > 0:
+                    time.sleep(delay_s)
+                executor.submit(self._replay, entry, scheduled_s, report, lock)
+        report.elapsed_s = time.perf_counter() - started_s
+        return report
+
+    def _replay(self, entry: dict, scheduled_s: float, report: ReplayReport, lock: threading.Lock):
+        url = rebase_url(entry["url"], self.base_url) if self.base_url else entry["url"]
+        lag_ms = (time.perf_counter() - scheduled_s) * 1000
+        status = digest = error = None
+        started_ns = perf_counter_ns()
+        try:
+            response = self.request_fn(entry["method"], url, headers=entry.get("headers") or None,
+                                       json=entry.get("json"), stream=entry.get("stream", False))
+            latency_us = (perf_counter_ns() - started_ns) // 1000  # headers only when streamed, like the capture
+            status = response.status_code
+            with response:
+                chunks = response.iter_content(STREAM_CHUNK_SIZE) if entry.get("stream") else [response.content]
+                digest, _ = body_digest(chunks)
+        except Exception as exception:
+            latency_us = (perf_counter_ns() - started_ns) // 1000
+            error = type(exception).__name__
+        with lock:
+            report.max_lag_ms = max(report.max_lag_ms, lag_ms)
+            report.record(entry, latency_us, status, digest, error)
+
+
+def main():
+    """
+    Replay a traffic log and print the per endpoint report, exit with 1 on any status/body mismatch or error:
+        python -m core.replay output/traffic.jsonl --base-url http://127.0.0.1:8000 --speed 2
+    """
+    parser = argparse.ArgumentParser(description="Replay a captured traffic log (TRAFFIC_CAPTURE=1)")
+    parser.add_argument("path", nargs="?", default=TRAFFIC_LOG_FILE)
+    parser.add_argument("--base-url", help="Server to replay against (default: the captured URLs)")
+    parser.add_argument("--speed", default="1", help="Time scale of the captured gaps (E.g. 1, 2, 0.5) or 'max'")
+    parser.add_argument("--concurrency", type=int, help="Requests in flight (default: peak of the capture)")
+    args = parser.parse_args()
+
+    speed = MAX_SPEED if args.speed == "max" else float(args.speed)
+    replay = TrafficReplay.from_file(args.path, base_url=args.base_url, speed=speed, concurrency=args.concurrency)
+    report = replay.run()
+    print(report.report())
+    for entry, status, outcome in report.mismatches[:20]:
+        print(f"  {entry['method']} {entry['url']}: captured {entry['status']} {entry.get('body_digest')}, "
+              f"replayed {status} {outcome}")
+    sys.exit(1 if report.mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
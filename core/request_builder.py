@@ -1,6 +1,160 @@
+import itertools
+import time
+from contextlib import contextmanager
+from time import perf_counter_ns
 import requests
+from core.constants import (HTTP_KEEP_ALIVE, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES,
+                            HTTP_RETRY_BACKOFF, HTTP_TIMEOUT_S, HTTP_CACHE, HTTP_BACKEND, TRAFFIC_CAPTURE)
+from core.http_backends import HTTPBackend, create_backend
+from core.http_cache import HTTPCache
+from core.rate_limiter import RateLimiter, get_rate_limiter
+from core.request_timing import start_timing, finish_timing
+from core.traffic import TrafficRecorder
 
 
-def http_request(method, url, headers=None, json=None, files=None):
-    return requests.request(method=method, url=url, headers=headers, json=json, files=files)
+class HTTPTransport:
+    """
+    Managed HTTP transport holding one keep-alive connection pool per process.
 
+    Every xdist worker is a separate process, so each worker ends up with its own connection pool.
+    With `keep_alive=False` every request runs on a fresh connection that is closed right after,
+    which makes the TCP/TLS setup cost part of each request again (useful to tell server latency
+    apart from connection setup cost).
+
+    The requests are sent by one of the `core.http_backends` (`backend`, `HTTP_BACKEND`): `requests`
+    (default), `urllib3`, `http.client` or `asyncio`. Every backend returns a `requests.Response`, so the
+    callers do not depend on the backend.
+
+    Every request is timed phase by phase (see `core.request_timing`): the returned response carries a
+    `timing` attribute and the registered timing observers are notified once the body is downloaded.
+
+    Every request goes through a `core.rate_limiter.RateLimiter` (shared by all the transports of the
+    process): 429/503 responses lower the concurrency, and with `RATE_LIMIT_MAX_RETRIES` they are retried after
+    `Retry-After` instead of being returned to the caller.
+
+    With a `core.http_cache.HTTPCache` (`HTTP_CACHE=1`), GET requests are revalidated against the stored body
+    and a 304 is answered from disk. `request(..., cache=False)` or `cache.bypass()` skip it.
+
+    With a `core.traffic.TrafficRecorder` (`TRAFFIC_CAPTURE=1`), every request is appended to the traffic log
+    as the caller saw it (cache and retries included). `request(..., capture=False)` leaves it out.
+    """
+
+    def __init__(self, keep_alive: bool = HTTP_KEEP_ALIVE, pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_factor: float = HTTP_RETRY_BACKOFF, timeout: float = HTTP_TIMEOUT_S,
+                 rate_limiter: RateLimiter = None, cache: HTTPCache = None, backend: str = HTTP_BACKEND,
+                 recorder: TrafficRecorder = None):
+        self.keep_alive = keep_alive
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.cache = cache
+        self.recorder = recorder
+        self.backend: HTTPBackend = create_backend(
+            backend, keep_alive=keep_alive, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            max_retries=max_retries, backoff_factor=backoff_factor, timeout=timeout)
+
+    def request(self, method, url, headers=None, json=None, files=None, stream=False,
+                cache: bool = True, capture: bool = True) -> requests.Response:
+        """
+        With `stream=True` the body is not read: the caller consumes it (e.g. `response.iter_content()`) and
+        closes the response. Such a request is timed up to the response headers (no download phase).
+
+        Throttled responses (429/503) are retried by the rate limiter when `RATE_LIMIT_MAX_RETRIES` allows it,
+        every attempt is timed on its own.
+        """
+        if self.recorder is None or not capture:
+            return self._request(method, url, headers, json, files, stream, cache)
+        started_s, started_ns = time.time(), perf_counter_ns()
+        response = self._request(method, url, headers, json, files, stream, cache)
+        return self.recorder.record(method, url, headers, json, stream, started_s, perf_counter_ns() - started_ns,
+                                    response)
+
+    def _request(self, method, url, headers, json, files, stream, cache) -> requests.Response:
+        http_cache = self.cache
+        if http_cache is None or method != "GET" or json is not None or files is not None:
+            return self._request_with_retries(method, url, headers, json, files, stream)
+        if not cache or http_cache.bypassed:
+            http_cache.count_bypass()
+            return self._request_with_retries(method, url, headers, json, files, stream)
+
+        entry = http_cache.lookup(url)
+        if entry is not None:
+            conditional_headers = dict(headers or {}, **entry.conditional_headers())
+            response = self._request_with_retries(method, url, conditional_headers, json, files, stream)
+            if response.status_code == 304:
+                cached = http_cache.serve(entry, response, stream)
+                if cached is not None:
+                    return cached
+                # evicted by another worker in the meantime: download it again
+                response = self._request_with_retries(method, url, headers, json, files, stream)
+        else:
+            response = self._request_with_retries(method, url, headers, json, files, stream)
+
+        if http_cache.storable(response):
+            return http_cache.store(url, response, stream)
+        return response
+
+    def _request_with_retries(self, method, url, headers, json, files, stream) -> requests.Response:
+        for attempt in itertools.count():
+            with self.rate_limiter.slot(url) as started:
+                response = self._request_once(method, url, headers, json, files, stream)
+            if self.rate_limiter.on_response(url, response, started, attempt) is None:
+                return response
+            response.close()
+
+    def _request_once(self, method, url, headers, json, files, stream) -> requests.Response:
+        timing = start_timing(method, url)
+        response = None
+        try:
+            response = self.backend.send(timing, method, url, headers, json, files, stream)
+        finally:
+            finish_timing(timing, response.status_code if response is not None else None)
+        return response
+
+    def close(self):
+        self.backend.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+_transport = HTTPTransport(cache=HTTPCache() if HTTP_CACHE else None,
+                           recorder=TrafficRecorder() if TRAFFIC_CAPTURE else None)
+
+
+def get_transport() -> HTTPTransport:
+    return _transport
+
+
+def configure_transport(**kwargs) -> HTTPTransport:
+    """
+    Replace the process wide transport, e.g. `configure_transport(keep_alive=False)`.
+    Accepts the same keyword arguments as `HTTPTransport`.
+    """
+    global _transport
+    _transport.close()
+    _transport = HTTPTransport(**kwargs)
+    return _transport
+
+
+@contextmanager
+def using_transport(**kwargs):
+    """
+    Swap in a transport built with `kwargs` for the block (E.g. another backend in a benchmark), then close it
+    and put the previous one back as it was, with its HTTP cache and traffic recorder.
+    """
+    global _transport
+    previous, _transport = _transport, HTTPTransport(**kwargs)
+    try:
+        yield _transport
+    finally:
+        _transport.close()
+        _transport = previous
+
+
+def http_request(method, url, headers=None, json=None, files=None, stream=False, cache=True, capture=True):
+    return _transport.request(method, url, headers=headers, json=json, files=files, stream=stream, cache=cache,
+                              capture=capture)
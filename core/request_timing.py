@@ -0,0 +1,186 @@
+import html
+import socket
+import threading
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+TIMING_PHASES = ("dns", "connect", "tls", "ttfb", "download", "decode", "total")
+
+
+@dataclass
+class RequestTiming:
+    """
+    perf_counter_ns based phase breakdown of one request. dns/connect/tls stay 0 on a reused connection.
+    `total_ns` goes from the start of the request to the end of the body download; JSON decoding happens later
+    (when the caller decodes the response), so it is recorded separately in `decode_ns`.
+    """
+    method: str
+    url: str
+    status: int = None
+    reused_connection: bool = True
+    dns_ns: int = 0
+    connect_ns: int = 0
+    tls_ns: int = 0
+    ttfb_ns: int = 0
+    download_ns: int = 0
+    decode_ns: int = 0
+    total_ns: int = 0
+    _request_start_ns: int = field(default=0, repr=False)
+    _connected_ns: int = field(default=0, repr=False)
+
+    def as_ms(self) -> dict:
+        return {phase: getattr(self, f"{phase}_ns") / 1e6 for phase in TIMING_PHASES}
+
+
+_current = threading.local()
+_observers = []
+
+
+def add_timing_observer(callback):
+    """
+    Register `callback(timing: RequestTiming)`, called (from the requesting thread) when a request completes.
+    """
+    _observers.append(callback)
+
+
+def remove_timing_observer(callback):
+    if callback in _observers:
+        _observers.remove(callback)
+
+
+def current_timing():
+    return getattr(_current, "timing", None)
+
+
+def start_timing(method: str, url: str) -> RequestTiming:
+    timing = RequestTiming(method=method, url=url, _request_start_ns=perf_counter_ns())
+    _current.timing = timing
+    return timing
+
+
+def finish_timing(timing: RequestTiming, status: int = None):
+    timing.status = status
+    timing.total_ns = perf_counter_ns() - timing._request_start_ns
+    _current.timing = None
+    for observer in list(_observers):
+        observer(timing)
+
+
+class _TimedConnectionMixin:
+    """
+    Records the connection phases of the request running on the current thread into its `RequestTiming`.
+    """
+
+    def _new_conn(self):
+        timing = current_timing()
+        if timing is None:
+            return super()._new_conn()
+
+        timing.reused_connection = False
+        started_ns = perf_counter_ns()
+        try:
+            address = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror:
+            address = None  # let urllib3 resolve again and raise its own NameResolutionError
+        resolved_ns = perf_counter_ns()
+        timing.dns_ns += resolved_ns - started_ns
+
+        dns_host = self._dns_host
+        if address:
+            self._dns_host = address
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        timing.connect_ns += perf_counter_ns() - resolved_ns
+        return sock
+
+    def connect(self):
+        timing = current_timing()
+        started_ns = perf_counter_ns()
+        socket_before_ns = (timing.dns_ns + timing.connect_ns) if timing else 0
+        super().connect()
+        if timing is not None:
+            timing._connected_ns = perf_counter_ns()
+            if isinstance(self, HTTPSConnection):
+                # whatever connect() spent on top of DNS + TCP connect is the TLS handshake
+                socket_ns = timing.dns_ns + timing.connect_ns - socket_before_ns
+                timing.tls_ns += timing._connected_ns - started_ns - socket_ns
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        timing = current_timing()
+        if timing is not None:
+            # request sent (after connecting, if a connection had to be opened) -> response headers parsed
+            timing.ttfb_ns = perf_counter_ns() - max(timing._request_start_ns, timing._connected_ns)
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    `HTTPAdapter` whose connection pools use the instrumented connection classes.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool,
+                                                   "https": TimedHTTPSConnectionPool}
+
+
+class TimedResponse(requests.Response):
+    """
+    `requests.Response` that adds the JSON decoding time to its `timing`.
+    """
+    timing = None
+
+    def json(self, **kwargs):
+        started_ns = perf_counter_ns()
+        try:
+            return super().json(**kwargs)
+        finally:
+            if self.timing is not None:
+                self.timing.decode_ns += perf_counter_ns() - started_ns
+
+
+def timings_summary(timings: list) -> dict:
+    """
+    Returns:
+        dict: Number of requests, new connections and the sum/max (ms) of every phase.
+    """
+    summary = {"requests": len(timings), "new_connections": sum(not timing.reused_connection for timing in timings)}
+    for phase in TIMING_PHASES:
+        values = [getattr(timing, f"{phase}_ns") / 1e6 for timing in timings]
+        summary[f"{phase}_sum_ms"] = round(sum(values), 3)
+        summary[f"{phase}_max_ms"] = round(max(values, default=0), 3)
+    return summary
+
+
+def timings_html_table(timings: list, limit: int = 50) -> str:
+    header = "".join(f"<th>{phase} (ms)</th>" for phase in TIMING_PHASES)
+    rows = []
+    for timing in timings[:limit]:
+        cells = "".join(f"<td>{value:.2f}</td>" for value in timing.as_ms().values())
+        rows.append(f"<tr><td>{html.escape(timing.method)} {html.escape(timing.url)}</td>"
+                    f"<td>{timing.status}</td>{cells}</tr>")
+    hidden = f"<p>... {len(timings) - limit} more requests</p>" if len(timings) > limit else ""
+    return f"<table><tr><th>request</th><th>status</th>{header}</tr>{''.join(rows)}</table>{hidden}"
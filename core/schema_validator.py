@@ -0,0 +1,173 @@
+import re
+from collections import namedtuple
+from core.constants import COMMENT_STRUCTURE, EMAIL_REGEX
+
+Violation = namedtuple("Violation", "index item_id field rule message")
+
+REQUIRED = "required"
+TYPE = "type"
+POSITIVE = "positive"
+NON_EMPTY = "non_empty"
+PATTERN = "pattern"
+MATCH = "match"
+UNIQUE = "unique"
+EXTRA = "extra"
+
+
+class SchemaValidator:
+    """
+    Batch validator compiled once from a structure (`{field: type}`) plus value rules.
+
+    The rules are turned into the source of one specialized function (fields unrolled, regexes precompiled,
+    lookups bound to locals), so a batch is validated in a single pass and every violation is returned,
+    instead of stopping at the first failed assertion.
+
+        violations = COMMENT_VALIDATOR.validate(comments, expected={"postId": post_id})
+        assert not violations, format_violations(violations)
+
+    Rules:
+        - required / type: every field of `structure` exists and is an instance of its type.
+        - positive: numeric fields that must be > 0.
+        - non_empty: fields that must not be empty.
+        - patterns: `{field: regex}` the field must match.
+        - match_fields: fields that must equal the value given for them in `validate(..., expected=...)`.
+        - unique: fields whose values must be unique within the batch.
+        - allow_extra: when False, fields that are not in `structure` are reported as `extra`.
+    """
+
+    def __init__(self, structure: dict, positive=(), non_empty=(), patterns: dict = None, match_fields=(),
+                 unique=(), allow_extra: bool = True, id_field: str = "id"):
+        self.structure = dict(structure)
+        self.positive = tuple(positive)
+        self.non_empty = tuple(non_empty)
+        self.patterns = dict(patterns or {})
+        self.match_fields = tuple(match_fields)
+        self.unique = tuple(unique)
+        self.allow_extra = allow_extra
+        self.id_field = id_field
+        self.source = self._generate_source()
+        self._validate = self._compile()
+
+    def _generate_source(self) -> str:
+        lines = [
+            "def validate(items, expected):",
+            "    violations = []",
+            "    add = violations.append",
+            "    expected = expected or {}",
+        ]
+        for number, field in enumerate(self.match_fields):
+            lines.append(f"    expected_{number} = expected.get({field!r}, MISSING)")
+        for number, _ in enumerate(self.unique):
+            lines.append(f"    seen_{number} = set()")
+        lines += [
+            "    for index, item in enumerate(items):",
+            "        if not isinstance(item, dict):",
+            "            add(Violation(index, None, None, 'type', f'Item is not an object: {item!r}'))",
+            "            continue",
+            f"        item_id = item.get({self.id_field!r})",
+        ]
+        if not self.allow_extra:
+            lines += [
+                "        if len(item) != FIELD_COUNT or not ALLOWED_FIELDS.issuperset(item):",
+                "            extra = [key for key in item if key not in ALLOWED_FIELDS]",
+                "            if extra:",
+                "                add(Violation(index, item_id, None, 'extra', f'Unexpected fields: {extra}'))",
+            ]
+
+        for number, (field, expected_type) in enumerate(self.structure.items()):
+            lines += [
+                f"        value = item.get({field!r}, MISSING)",
+                "        if value is MISSING:",
+                f"            add(Violation(index, item_id, {field!r}, 'required', "
+                f"\"Missing '{field}' field\"))",
+                f"        elif not isinstance(value, TYPE_{number}):",
+                f"            add(Violation(index, item_id, {field!r}, 'type', "
+                f"f\"Field '{field}' has incorrect type. Expected: {expected_type.__name__}, "
+                f"Got: {{type(value).__name__}}\"))",
+                "        else:",
+            ]
+            checks = []
+            if field in self.positive:
+                checks += [
+                    "if value <= 0:",
+                    f"    add(Violation(index, item_id, {field!r}, 'positive', "
+                    f"f\"Field '{field}' should be positive: {{value!r}}\"))",
+                ]
+            if field in self.non_empty:
+                checks += [
+                    "if not value:",
+                    f"    add(Violation(index, item_id, {field!r}, 'non_empty', \"Field '{field}' is empty\"))",
+                ]
+            if field in self.patterns:
+                checks += [
+                    f"if value and not PATTERN_{number}(value):",
+                    f"    add(Violation(index, item_id, {field!r}, 'pattern', "
+                    f"f\"Field '{field}' has an invalid format: {{value!r}}\"))",
+                ]
+            if field in self.match_fields:
+                match_number = self.match_fields.index(field)
+                checks += [
+                    f"if expected_{match_number} is not MISSING and value != expected_{match_number}:",
+                    f"    add(Violation(index, item_id, {field!r}, 'match', "
+                    f"f\"Field '{field}' mismatch. Expected: {{expected_{match_number}!r}}, Got: {{value!r}}\"))",
+                ]
+            if field in self.unique:
+                unique_number = self.unique.index(field)
+                checks += [
+                    f"if value in seen_{unique_number}:",
+                    f"    add(Violation(index, item_id, {field!r}, 'unique', "
+                    f"f\"Duplicate '{field}' found: {{value!r}}\"))",
+                    "else:",
+                    f"    seen_{unique_number}.add(value)",
+                ]
+            lines += [f"            {check}" for check in checks or ["pass"]]
+
+        lines.append("    return violations")
+        return "\n".join(lines)
+
+    def _compile(self):
+        namespace = {
+            "Violation": Violation,
+            "MISSING": object(),
+            "FIELD_COUNT": len(self.structure),
+            "ALLOWED_FIELDS": frozenset(self.structure),
+        }
+        for number, (field, expected_type) in enumerate(self.structure.items()):
+            namespace[f"TYPE_{number}"] = expected_type
+            if field in self.patterns:
+                namespace[f"PATTERN_{number}"] = re.compile(self.patterns[field]).match
+        exec(compile(self.source, f"<schema validator {list(self.structure)}>", "exec"), namespace)
+        return namespace["validate"]
+
+    def validate(self, items, expected: dict = None) -> list:
+        """
+        Validate a whole batch in one pass.
+
+        Args:
+            items (iterable): The objects to validate (e.g. the comments of one or many posts).
+            expected (dict): Values the `match_fields` must have (E.g. {"postId": 1}).
+
+        Returns:
+            list: Every `Violation` found, empty if the batch is valid.
+        """
+        return self._validate(items, expected)
+
+
+def format_violations(violations: list, limit: int = 20) -> str:
+    lines = [f"{len(violations)} violation(s):"]
+    lines += [f"  item #{violation.index} (id={violation.item_id}) [{violation.rule}] {violation.message}"
+              for violation in violations[:limit]]
+    if len(violations) > limit:
+        lines.append(f"  ... and {len(violations) - limit} more")
+    return "\n".join(lines)
+
+
+COMMENT_VALIDATOR = SchemaValidator(
+    COMMENT_STRUCTURE,
+    positive=("id",),
+    non_empty=("name", "email", "body"),
+    patterns={"email": EMAIL_REGEX},
+    match_fields=("postId",),
+    unique=("id",),
+    allow_extra=False,
+)
@@ -0,0 +1,153 @@
+import glob
+import json
+import os
+import shutil
+import threading
+import uuid
+from core.constants import ROOT_WORKING_DIRECTORY, LOGS_FOLDER, RUNS_FOLDER
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Inter-process exclusive lock backed by a lock file (fcntl on POSIX, msvcrt on Windows).
+    Used to coordinate xdist workers that share files in the run directory.
+
+        with FileLock(path + ".lock"):
+            ...
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 seconds
+                    continue
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def get_run_id() -> str:
+    """
+    Id of the current test run. The first process (xdist controller) generates it and stores it in the
+    environment, so all the workers spawned afterwards share it.
+    """
+    if not os.environ.get("PYTEST_RUN_ID"):
+        os.environ["PYTEST_RUN_ID"] = uuid.uuid4().hex
+    return os.environ["PYTEST_RUN_ID"]
+
+
+def get_run_directory(*parts, create: bool = True) -> str:
+    """
+    Scratch directory of the current run (output/runs/<run id>/...), created on demand.
+    """
+    path = os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, RUNS_FOLDER, get_run_id(), *parts)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def remove_run_directory():
+    shutil.rmtree(os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, RUNS_FOLDER, get_run_id()),
+                  ignore_errors=True)
+
+
+def read_json(path: str, default=None):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+
+def write_json(path: str, data):
+    """
+    Write JSON atomically (temp file + rename), so readers never see a partially written file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+def save_process_stats(folder: str, stats: dict):
+    """
+    Store the stats of this process in the `folder` of the run directory, one file per process (xdist worker).
+    """
+    write_json(os.path.join(get_run_directory(folder), f"stats-{os.getpid()}.json"), stats)
+
+
+def load_process_stats(folder: str) -> list:
+    """
+    Returns:
+        list: The stats saved by every process of the run in `folder` (see `save_process_stats`).
+    """
+    return [read_json(path) for path in sorted(glob.glob(os.path.join(get_run_directory(folder), "stats-*.json")))]
+
+
+class MergeableStats:
+    """
+    Mixin of the counter dataclasses saved by every process: `merge` adds the counters of another one.
+    """
+
+    def merge(self, other):
+        for name in self.__dataclass_fields__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class BypassCounter:
+    """
+    Thread-safe count of the `with` blocks running a bypass, from any thread of the process and nested or not.
+
+        bypass = BypassCounter()
+        with bypass:
+            assert bypass
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._depth = 0
+
+    def __bool__(self) -> bool:
+        return self._depth > 0
+
+    def __enter__(self):
+        with self._lock:
+            self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self._depth -= 1
@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from core.constants import HELPER_SINGLE_FLIGHT, HELPER_MEMO_TTL_S, HELPER_MEMO_MAX_ENTRIES
+from core.shared_storage import BypassCounter, MergeableStats, load_process_stats, save_process_stats
+
+SINGLE_FLIGHT_FOLDER = "single_flight"
+
+
+@dataclass
+class SingleFlightStats(MergeableStats):
+    misses: int = 0  # calls that ran (sent their request)
+    coalesced: int = 0  # calls that waited for an identical call in flight and shared its result
+    hits: int = 0  # calls answered from the memo
+    expired: int = 0  # memo entries dropped at lookup because of their age
+    evicted: int = 0  # memo entries dropped because the memo was full (least recently used first)
+    bypassed: int = 0
+
+    @property
+    def calls(self) -> int:
+        return self.misses + self.coalesced + self.hits
+
+    @property
+    def saved_ratio(self) -> float:
+        return (self.coalesced + self.hits) / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.calls} helper fetches: {self.misses} sent, {self.coalesced} joined an identical request "
+                f"in flight, {self.hits} answered from the memo ({self.saved_ratio:.1%} not sent), "
+                f"{self.expired} memo entries expired, {self.evicted} evicted, {self.bypassed} bypassed")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    In-flight call coalescing plus a per-key memo, for the helper fetches (`HELPER_SINGLE_FLIGHT=1`).
+
+    `do(key, fn)` runs `fn` once for any number of threads asking for the same key at the same time: the first
+    caller runs it, the others wait and get the same result (or the same exception). A completed result is then
+    kept for `ttl_s` seconds in a memo of at most `max_entries` keys, evicting the least recently used first.
+    Callers share the returned object: treat it as read-only.
+
+        single_flight = get_single_flight()
+        posts = single_flight.do(("GET", url), lambda: http_request("GET", url).json())
+
+    The memo is cleared before every test (a test about the request itself still sends it), and `bypass()`
+    runs every call of a block directly (tests of data freshness).
+    """
+
+    def __init__(self, ttl_s: float = HELPER_MEMO_TTL_S, max_entries: int = HELPER_MEMO_MAX_ENTRIES,
+                 enabled: bool = HELPER_SINGLE_FLIGHT):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.stats = SingleFlightStats()
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> _Call
+        self._memo = OrderedDict()  # key -> (expiry as monotonic time, result), least recently used first
+        self._bypass = BypassCounter()
+
+    @property
+    def bypassed(self) -> bool:
+        return bool(self._bypass)
+
+    def bypass(self) -> BypassCounter:
+        """
+        Run every call of the block (from any thread of the process) without coalescing or memo.
+        """
+        return self._bypass
+
+    def do(self, key, fn, memoize=None):
+        """
+        Args:
+            key: Hashable identity of the call (E.g. method and URL).
+            fn: Callable without arguments producing the result.
+            memoize: Predicate on the result deciding whether it is memoized (every result by default).
+
+        Returns:
+            The result of `fn`, from this call, from an identical call in flight or from the memo.
+        """
+        if not self.enabled:
+            return fn()
+        if self._bypass:
+            with self._lock:
+                self.stats.bypassed += 1
+            return fn()
+
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._memo.move_to_end(key)
+                    self.stats.hits += 1
+                    return entry[1]
+                del self._memo[key]
+                self.stats.expired += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error  # every waiter fails the same way, nothing is memoized
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if call.error is None and self.ttl_s > 0 and (memoize is None or memoize(call.result)):
+                    self._memo[key] = (time.monotonic() + self.ttl_s, call.result)
+                    self._memo.move_to_end(key)
+                    while len(self._memo) > self.max_entries:
+                        self._memo.popitem(last=False)
+                        self.stats.evicted += 1
+            call.done.set()
+        return call.result
+
+    def forget(self, key):
+        with self._lock:
+            self._memo.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every memoized result (calls in flight still complete and are shared).
+        """
+        with self._lock:
+            self._memo.clear()
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def save_stats(self):
+        """
+        Store the stats of this process in the run directory (aggregated by `load_single_flight_stats`).
+        """
+        if self.stats.calls or self.stats.bypassed:
+            save_process_stats(SINGLE_FLIGHT_FOLDER, self.stats.__dict__)
+
+
+def load_single_flight_stats() -> SingleFlightStats:
+    """
+    Returns:
+        SingleFlightStats: The stats saved by every process of the run, merged.
+    """
+    total = SingleFlightStats()
+    for stats in load_process_stats(SINGLE_FLIGHT_FOLDER):
+        total.merge(SingleFlightStats(**stats))
+    return total
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
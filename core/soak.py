@@ -0,0 +1,226 @@
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from core.constants import (ROOT_WORKING_DIRECTORY, LOGS_FOLDER, SOAK_FOLDER, SOAK_WINDOW_S, SOAK_RATE,
+                            SOAK_CONCURRENCY, SOAK_WARMUP_WINDOWS, SOAK_MAX_LATENCY_DRIFT, SOAK_MIN_LATENCY_DRIFT_MS,
+                            SOAK_MAX_MEMORY_DRIFT_MB, SOAK_TRACEMALLOC, PROFILE_TOP_N)
+from core.load_generator import LoadGenerator, LoadProfile, LoadResult, RATE_MODE, uncached_request
+from core.profiling import SNAPSHOT_FILTERS
+
+MAX_FIT_POINTS = 500  # pairwise slopes of the trend fit grow with the square of the windows
+
+
+def current_rss_bytes() -> int:
+    """
+    Returns:
+        int: Resident set size of this process (None where /proc is not available).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def open_sockets() -> int:
+    """
+    Returns:
+        int: Sockets held by this process (None where /proc is not available).
+    """
+    try:
+        descriptors = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    count = 0
+    for descriptor in descriptors:
+        try:
+            count += os.readlink(f"/proc/self/fd/{descriptor}").startswith("socket:")
+        except OSError:  # closed in the meantime
+            pass
+    return count
+
+
+def theil_sen_slope(xs: list, ys: list) -> float:
+    """
+    Median of the slopes between every pair of points: a trend a few outlier windows (a GC pause, a slow
+    response) cannot bend, unlike a least squares fit. Fitted on at most MAX_FIT_POINTS evenly spaced points.
+    """
+    step = max(1, len(xs) // MAX_FIT_POINTS)
+    xs, ys = xs[::step], ys[::step]
+    slopes = [(ys[j] - ys[i]) / (xs[j] - xs[i])
+              for i in range(len(xs)) for j in range(i + 1, len(xs)) if xs[j] != xs[i]]
+    return statistics.median(slopes) if slopes else 0.0
+
+
+@dataclass
+class SoakSample:
+    elapsed_s: float  # end of the window, from the start of the run
+    requests: int
+    throughput: float
+    error_rate: float
+    p50_ms: float
+    p99_ms: float
+    rss_bytes: int = None
+    open_sockets: int = None
+    traced_bytes: int = None  # held by Python allocations (tracemalloc)
+
+
+@dataclass
+class SoakDrift:
+    metric: str
+    change: float  # fitted change over the analysed windows, in `unit`
+    limit: float
+    unit: str
+
+    @property
+    def drifted(self) -> bool:
+        return self.change > self.limit
+
+    def __str__(self) -> str:
+        return f"{self.metric}: {self.change:+.2f} {self.unit} over the run (limit {self.limit:.2f} {self.unit})"
+
+
+@dataclass
+class SoakResult:
+    path: str  # time series, one JSON line per window
+    load: LoadResult
+    samples: list = field(default_factory=list)
+    drifts: list = field(default_factory=list)
+    top_growth: list = field(default_factory=list)  # allocation sites that grew the most after the warm-up
+
+    @property
+    def regressions(self) -> list:
+        return [drift for drift in self.drifts if drift.drifted]
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: The windows, the fitted drifts and the top growing allocation sites.
+        """
+        lines = [f"{'t (s)':>8}{'requests':>10}{'req/s':>9}{'errors':>8}{'p50':>9}{'p99':>9}{'RSS MiB':>9}"
+                 f"{'sockets':>9}{'traced MiB':>12}"]
+        for sample in self.samples:
+            lines.append(f"{sample.elapsed_s:>8.1f}{sample.requests:>10}{sample.throughput:>9.1f}"
+                         f"{sample.error_rate:>8.1%}{sample.p50_ms:>9.2f}{sample.p99_ms:>9.2f}"
+                         f"{_mib(sample.rss_bytes):>9}{_value(sample.open_sockets):>9}{_mib(sample.traced_bytes):>12}")
+        lines += [f"{'DRIFT' if drift.drifted else 'ok':<7}{drift}" for drift in self.drifts]
+        if self.top_growth:
+            lines.append("Top growing allocation sites after the warm-up:")
+            lines += [f"  {site}" for site in self.top_growth]
+        lines.append(f"time series: {self.path}")
+        return "\n".join(lines)
+
+
+def _mib(value) -> str:
+    return "-" if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+def _value(value) -> str:
+    return "-" if value is None else str(value)
+
+
+class SoakRunner:
+    """
+    Sustained open loop load over `targets` for `duration_s`, sampled every `window_s`: windowed p50/p99,
+    throughput and error rate of the requests (`core.load_generator.LoadGenerator`, one run per window) plus the
+    RSS, the open sockets and the traced Python memory of the process. Every sample is appended to a JSONL time
+    series under `output/soak/` as soon as its window ends, so an interrupted run keeps its data.
+
+    At the end, the trend of the p99 and of the memory is fitted over the windows after `warmup_windows`
+    (Theil-Sen slope). The p99 drifts when it rises by more than `max_latency_drift` of its median and by
+    `min_latency_drift_ms`; the memory drifts when the RSS or the traced memory grows by more than
+    `max_memory_drift_mb`. The allocation sites that grew the most between the end of the warm-up and the end of
+    the run (tracemalloc, `trace_allocations`) point at the leak.
+
+        result = SoakRunner(targets, duration_s=4 * 3600).run()
+        assert not result.regressions, result.report()
+    """
+
+    def __init__(self, targets: list, duration_s: float, window_s: float = SOAK_WINDOW_S, rate: float = SOAK_RATE,
+                 concurrency: int = SOAK_CONCURRENCY, warmup_windows: int = SOAK_WARMUP_WINDOWS,
+                 max_latency_drift: float = SOAK_MAX_LATENCY_DRIFT,
+                 min_latency_drift_ms: float = SOAK_MIN_LATENCY_DRIFT_MS,
+                 max_memory_drift_mb: float = SOAK_MAX_MEMORY_DRIFT_MB, trace_allocations: bool = SOAK_TRACEMALLOC,
+                 name: str = "soak", output_dir: str = None, request_fn=uncached_request, top: int = PROFILE_TOP_N):
+        self.targets = targets
+        self.duration_s = duration_s
+        self.window_s = min(window_s, duration_s)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.warmup_windows = warmup_windows
+        self.max_latency_drift = max_latency_drift
+        self.min_latency_drift_ms = min_latency_drift_ms
+        self.max_memory_drift_mb = max_memory_drift_mb
+        self.trace_allocations = trace_allocations
+        self.name = name
+        self.output_dir = output_dir or os.path.join(ROOT_WORKING_DIRECTORY, LOGS_FOLDER, SOAK_FOLDER)
+        self.request_fn = request_fn
+        self.top = top
+
+    def run(self) -> SoakResult:
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().isoformat(timespec="seconds").replace(":", "-")
+        result = SoakResult(os.path.join(self.output_dir, f"{timestamp}-{self.name}.jsonl"), LoadResult())
+        profile = LoadProfile(mode=RATE_MODE, rate=self.rate, concurrency=self.concurrency, duration_s=self.window_s)
+
+        started_tracing = self.trace_allocations and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        warmed_up = None
+        try:
+            started_s = time.perf_counter()
+            with open(result.path, "a", encoding="utf-8") as series:
+                while time.perf_counter() - started_s < self.duration_s:
+                    window = LoadGenerator(self.targets, profile, self.request_fn).run()
+                    sample = self._sample(window, time.perf_counter() - started_s)
+                    result.samples.append(sample)
+                    result.load.merge(window)
+                    result.load.elapsed_s = time.perf_counter() - started_s  # windows run one after the other
+                    series.write(json.dumps(asdict(sample), separators=(",", ":")) + "\n")
+                    series.flush()
+                    if self.trace_allocations and len(result.samples) == self.warmup_windows:
+                        warmed_up = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            if self.trace_allocations:
+                final = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+                baseline = warmed_up or tracemalloc.Snapshot([], final.traceback_limit)
+                result.top_growth = [f"{statistic.size_diff / 1024:+10.1f} KiB {statistic.count_diff:+8} blocks  "
+                                     f"{statistic.traceback[0]}"
+                                     for statistic in final.compare_to(baseline, "lineno")
+                                     if statistic.size_diff > 0][:self.top]
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        result.drifts = self._drifts(result.samples[self.warmup_windows:])
+        return result
+
+    def _sample(self, window: LoadResult, elapsed_s: float) -> SoakSample:
+        summary = window.histogram.summary_ms()
+        return SoakSample(elapsed_s=round(elapsed_s, 3), requests=window.requests,
+                          throughput=round(window.throughput, 3), error_rate=window.error_rate,
+                          p50_ms=summary["p50"], p99_ms=summary["p99"], rss_bytes=current_rss_bytes(),
+                          open_sockets=open_sockets(),
+                          traced_bytes=tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None)
+
+    def _drifts(self, samples: list) -> list:
+        """
+        Returns:
+            list: `SoakDrift` of the p99 and of every memory metric sampled, fitted over `samples`.
+        """
+        if len(samples) < 3:  # too few windows to tell a trend from noise
+            return []
+        times = [sample.elapsed_s for sample in samples]
+        span_s = times[-1] - times[0]
+        p99s = [sample.p99_ms for sample in samples]
+        drifts = [SoakDrift("p99 latency", theil_sen_slope(times, p99s) * span_s,
+                            max(self.min_latency_drift_ms, self.max_latency_drift * statistics.median(p99s)), "ms")]
+        for metric, attribute in (("RSS", "rss_bytes"), ("traced memory", "traced_bytes")):
+            values = [getattr(sample, attribute) for sample in samples]
+            if None not in values:
+                drifts.append(SoakDrift(metric, theil_sen_slope(times, values) * span_s / 1024 / 1024,
+                                        self.max_memory_drift_mb, "MiB"))
+        return drifts
@@ -0,0 +1,181 @@
+import glob
+import hashlib
+import heapq
+import json
+import os
+import queue
+import re
+import threading
+from core.constants import TRAFFIC_LOG_FILE
+from core.log_pipeline import get_worker_id, worker_log_file
+
+DIGEST_SIZE = 16  # bytes of the BLAKE2b body digest
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+def body_digest(chunks) -> tuple:
+    """
+    Returns:
+        tuple: (hex BLAKE2b digest, size) of the body made of `chunks`.
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    size = 0
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class _DigestingBody:
+    """
+    Replaces `iter_content` of a streamed response: the body is digested while the caller reads it, and the
+    entry is queued once it is fully read (or with no digest if the response is closed before the end).
+    """
+
+    def __init__(self, recorder: "TrafficRecorder", entry: dict, response):
+        self.recorder = recorder
+        self.entry = entry
+        self.response = response
+        self.digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        self.size = 0
+        self.done = False
+        self._iter_content = response.iter_content
+        self._close = response.close
+
+    def iter_content(self, *args, **kwargs):
+        for chunk in self._iter_content(*args, **kwargs):
+            self.digest.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+        self.finish(complete=True)
+
+    def close(self):
+        self.finish(complete=False)
+        self._close()
+
+    def finish(self, complete: bool):
+        if self.done:
+            return
+        self.done = True
+        self.entry["body_bytes"] = self.size
+        self.entry["body_digest"] = self.digest.hexdigest() if complete else None
+        self.recorder._queue.put((self.entry, None))
+
+
+class TrafficRecorder:
+    """
+    Capture of the requests sent through an `HTTPTransport` (`TRAFFIC_CAPTURE=1`): one JSON line per request
+    with its start time, method, URL, request headers and body, status, latency and a BLAKE2b digest of the
+    response body, replayable with `core.replay.TrafficReplay`.
+
+    The requesting thread only builds the entry and queues it: the body digest and the buffered writes are done
+    by a background thread, so capturing does not show in the measured latencies. A streamed body is digested
+    as the caller reads it. Each xdist worker writes its own file, merged by `merge_traffic_logs` at the end of
+    the run.
+    """
+
+    def __init__(self, path: str = TRAFFIC_LOG_FILE, worker_id: str = None):
+        self.worker_id = worker_id or get_worker_id()
+        self.path = worker_log_file(path, self.worker_id)
+        self.captured = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str, headers: dict, json_body, stream: bool, started_s: float,
+               latency_ns: int, response):
+        """
+        Queue the entry of a completed request.
+
+        Returns:
+            requests.Response: The response to hand to the caller (a streamed one digests its body as it is read).
+        """
+        entry = {"ts": started_s, "worker": self.worker_id, "method": method, "url": url,
+                 "headers": dict(headers or {}), "json": json_body, "stream": stream,
+                 "status": response.status_code, "latency_ms": round(latency_ns / 1e6, 3)}
+        if self._thread is None:
+            self._start()
+        self.captured += 1
+        if not stream:
+            self._queue.put((entry, response.content))  # digested by the writer thread
+            return response
+        body = _DigestingBody(self, entry, response)
+        response.iter_content, response.close = body.iter_content, body.close
+        return response
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._thread = threading.Thread(target=self._write, name="traffic-recorder", daemon=True)
+                self._thread.start()
+
+    def _write(self):
+        with open(self.path, "a", encoding="utf-8", buffering=WRITE_BUFFER_BYTES) as log:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                entry, content = item
+                if content is not None:
+                    entry["body_digest"], entry["body_bytes"] = body_digest([content])
+                log.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                if self._queue.empty():
+                    log.flush()
+
+    def close(self):
+        """
+        Write the entries still queued and close the file.
+        """
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+
+def read_traffic(path: str) -> list:
+    """
+    Returns:
+        list: The entries of a traffic log, in start time order.
+    """
+    with open(path, encoding="utf-8") as log:
+        return sorted((json.loads(line) for line in log if line.strip()), key=lambda entry: entry["ts"])
+
+
+def reset_traffic_log(path: str = TRAFFIC_LOG_FILE):
+    """
+    Start a new capture: remove the log of a previous run (and the files its workers may have left).
+    """
+    root, extension = os.path.splitext(path)
+    for file in [path] + glob.glob(f"{glob.escape(root)}.gw*{extension}"):
+        if os.path.exists(file):
+            os.remove(file)
+
+
+def merge_traffic_logs(path: str = TRAFFIC_LOG_FILE) -> str:
+    """
+    Merge the traffic files of the xdist workers into `path` in start time order and remove them.
+
+    Returns:
+        str: `path`
+    """
+    root, extension = os.path.splitext(path)
+    worker_files = [file for file in glob.glob(f"{glob.escape(root)}.gw*{extension}")
+                    if re.fullmatch(r"\.gw\d+" + re.escape(extension), file[len(root):])]
+    if not worker_files:
+        return path
+
+    def lines(file):
+        with open(file, encoding="utf-8") as log:
+            yield from log
+
+    sources = worker_files + ([path] if os.path.exists(path) else [])
+    merged_path = f"{path}.merging"
+    with open(merged_path, "w", encoding="utf-8") as merged:
+        # lines are written as the requests complete, so a file is only nearly in start order: `read_traffic` sorts
+        merged.writelines(heapq.merge(*(lines(file) for file in sources), key=lambda line: json.loads(line)["ts"]))
+    for file in worker_files:
+        os.remove(file)
+    os.replace(merged_path, path)
+    return path
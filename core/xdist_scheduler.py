@@ -0,0 +1,140 @@
+import re
+import statistics
+import time
+from collections import OrderedDict
+from xdist.scheduler import LoadScopeScheduling
+from core.constants import TEST_DURATIONS_FILE, TEST_DURATION_DEFAULT_S, TEST_DURATION_SMOOTHING
+from core.shared_storage import FileLock, read_json, write_json
+
+_PARAMETERS = re.compile(r"\[(.+)\]$")
+
+
+def data_key(nodeid: str) -> str:
+    """
+    Data a test works on: tests parametrized with the same values (e.g. every `VALID_USERS` test of user
+    Samantha) fetch the same user, posts and comments. Tests without parameters only share data with themselves.
+    """
+    parameters = _PARAMETERS.search(nodeid)
+    return f"[{parameters.group(1)}]" if parameters else nodeid
+
+
+class _LongestFirstQueue(OrderedDict):
+    """
+    Work queue keeping its units longest first (estimated duration), whatever order they are inserted in:
+    xdist fills it ordered by number of tests and hands the units out from the front.
+    """
+
+    def __init__(self, unit_s: dict):
+        super().__init__()
+        self.unit_s = unit_s  # unit name -> estimated duration
+
+    def __setitem__(self, unit, nodeids):
+        super().__setitem__(unit, nodeids)
+        duration_s = self.unit_s.get(unit, 0.0)
+        for shorter in [name for name in self if name != unit and self.unit_s.get(name, 0.0) < duration_s]:
+            self.move_to_end(shorter)
+
+
+class DurationAwareScheduling(LoadScopeScheduling):
+    """
+    xdist scheduler (`--duration-schedule`) that packs the workers longest-first using the test durations
+    of the previous runs, while keeping tests that share a `data_key` on the same worker so the worker-local
+    caches (helper, user directory, shared dataset) are hit.
+
+    Tests are grouped by data key into work units; a group longer than an even share of the run
+    (total / workers) is split into chunks of about that size so one hot data key cannot set the end of the run.
+    Units are handed out longest first, each worker asking for the next one when it runs out (LPT). Unknown
+    tests are estimated at the median known duration.
+
+    The measured durations are saved to `TEST_DURATIONS_FILE` (smoothed with the previous ones) for the next run.
+
+    Only the extension points of `LoadScopeScheduling` are used: `_split_scope` maps every test to its unit and
+    the `workqueue` orders the units, xdist's own `schedule` does the rest.
+    """
+
+    def __init__(self, config, log=None, durations_file: str = TEST_DURATIONS_FILE):
+        super().__init__(config, log)
+        self.durations_file = durations_file
+        self.durations = read_json(durations_file, {})
+        self.measured = {}
+        self.units = {}  # nodeid -> work unit name
+        self.unit_s = {}  # work unit name -> estimated duration
+        self.workqueue = _LongestFirstQueue(self.unit_s)
+        self.busy_s = {}
+        self.started = None
+        self.finished = None
+
+    def estimate(self, nodeid: str) -> float:
+        if nodeid in self.durations:
+            return self.durations[nodeid]
+        return statistics.median(self.durations.values()) if self.durations else TEST_DURATION_DEFAULT_S
+
+    def build_units(self, collection: list, workers: int) -> OrderedDict:
+        """
+        Returns:
+            OrderedDict: Work unit name -> {nodeid: False}, longest unit first.
+        """
+        groups = OrderedDict()
+        for nodeid in collection:
+            groups.setdefault(data_key(nodeid), []).append(nodeid)
+
+        target_s = sum(map(self.estimate, collection)) / max(workers, 1)
+        units = {}
+        for key, nodeids in groups.items():
+            chunk, chunk_s = [], 0.0
+            for nodeid in nodeids:
+                if chunk and chunk_s + self.estimate(nodeid) > target_s:
+                    units[f"{key}#{len(units)}"] = chunk
+                    chunk, chunk_s = [], 0.0
+                chunk.append(nodeid)
+                chunk_s += self.estimate(nodeid)
+            units[f"{key}#{len(units)}"] = chunk
+
+        workqueue = OrderedDict()
+        for name, nodeids in sorted(units.items(), key=lambda unit: -sum(map(self.estimate, unit[1]))):
+            workqueue[name] = {nodeid: False for nodeid in nodeids}
+            self.unit_s[name] = sum(map(self.estimate, nodeids))
+            for nodeid in nodeids:
+                self.units[nodeid] = name
+        return workqueue
+
+    def _split_scope(self, nodeid: str) -> str:
+        # called by `LoadScopeScheduling.schedule` for every test once the collection is complete
+        if not self.units and self.collection:
+            self.build_units(self.collection, len(self.nodes))
+            self.started = time.monotonic()
+        return self.units.get(nodeid, nodeid)
+
+    def mark_test_complete(self, node, item_index: int, duration: float = 0):
+        nodeid = self.registered_collections[node][item_index]
+        self.measured[nodeid] = duration
+        worker_id = node.gateway.id
+        self.busy_s[worker_id] = self.busy_s.get(worker_id, 0.0) + duration
+        self.finished = time.monotonic()
+        super().mark_test_complete(node, item_index, duration)
+
+    @property
+    def makespan_s(self) -> float:
+        return (self.finished - self.started) if self.started and self.finished else 0.0
+
+    def summary(self) -> str:
+        makespan_s = self.makespan_s
+        idle = {worker: max(makespan_s - busy_s, 0.0) for worker, busy_s in sorted(self.busy_s.items())}
+        workers = ", ".join(f"{worker} {idle_s:.1f}s" for worker, idle_s in idle.items())
+        return (f"makespan {makespan_s:.1f}s for {len(self.measured)} tests in {len(set(self.units.values()))} "
+                f"work units, worker idle time {sum(idle.values()):.1f}s ({workers})")
+
+    def save_durations(self):
+        """
+        Merge the durations measured in this run into `durations_file` (exponential smoothing).
+        """
+        if not self.measured:
+            return
+        with FileLock(f"{self.durations_file}.lock"):
+            durations = read_json(self.durations_file, {})
+            for nodeid, duration in self.measured.items():
+                previous = durations.get(nodeid)
+                durations[nodeid] = round(duration if previous is None else
+                                          TEST_DURATION_SMOOTHING * duration
+                                          + (1 - TEST_DURATION_SMOOTHING) * previous, 4)
+            write_json(self.durations_file, durations)
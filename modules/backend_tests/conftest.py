@@ -1,8 +1,48 @@
 import pytest
+from urllib.parse import urlsplit
+
+from core import BENCHMARK_COMMENTS
+from core.performance_history import PerformanceHistory, performance_history_key
 
 from modules.backend_tests.general.helper.helper_user_comments import HelperUserComments
+from modules.backend_tests.general.helper.shared_dataset import SharedUserCommentsDataset
+from modules.backend_tests.general.request_builder_user_comments import jsonplaceholder_base_url
+from modules.stub_server import iter_benchmark_comments
 
 
 @pytest.fixture(scope="session")
 def user_comments_helper():
     yield HelperUserComments()
+
+
+@pytest.fixture(scope="session")
+def user_comments_dataset(user_comments_helper):
+    """
+    User, posts and comments fetched once per run and shared between xdist workers.
+    Use `user_comments_helper` instead when the test is about the request itself.
+    """
+    yield SharedUserCommentsDataset(user_comments_helper)
+
+
+@pytest.fixture
+def performance_baseline(request):
+    """
+    `performance_baseline(load_result)` compares the result against the previous runs of the test (rolling
+    baseline, see `core.performance_history`), adds it to the history and returns the comparison. Runs against
+    different servers (API or local stand-in) have separate histories. The trend table goes to the HTML report.
+    """
+    def compare(result):
+        key = performance_history_key(request.node.name, urlsplit(jsonplaceholder_base_url()).hostname)
+        request.node.performance_comparison = PerformanceHistory().record(key, result)
+        return request.node.performance_comparison
+
+    yield compare
+
+
+@pytest.fixture(scope="session")
+def synthetic_comments():
+    """
+    BENCHMARK_COMMENTS JSONPlaceholder-like comments (100 per post) for the benchmarks, built in memory
+    from 10k generated templates with unique ids (`modules.stub_server.iter_benchmark_comments`).
+    """
+    yield list(iter_benchmark_comments(BENCHMARK_COMMENTS))
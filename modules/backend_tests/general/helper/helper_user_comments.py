@@ -1,13 +1,53 @@
+import asyncio
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from modules.backend_tests.general.request_builder_user_comments import (JSONPlaceholderController,
-                                                                         JSONPlaceholderEndpoints)
-from core import HTTPStatusCodes
+                                                                         JSONPlaceholderEndpoints,
+                                                                         JSONPLACEHOLDER_ROUTES,
+                                                                         jsonplaceholder_base_url)
+from core import HTTPStatusCodes, FETCH_CONCURRENCY
+from core.json_stream import iter_json_array, STREAM_CHUNK_SIZE
+from core.single_flight import SingleFlight, get_single_flight
+from modules.backend_tests.general.helper.user_directory import UserDirectory
 
 
 class HelperUserComments:
 
-    def __init__(self):
+    def __init__(self, single_flight: SingleFlight = None):
         self.controller = JSONPlaceholderController()
+        # shared by every helper of the process, so identical fetches of different helpers coalesce too
+        self.single_flight = single_flight if single_flight is not None else get_single_flight()
+        self._user_directory = None
+
+    def get_user_directory(self, expected_status_code: int = HTTPStatusCodes.OK.value,
+                           refresh: bool = False) -> UserDirectory:
+        """
+        Fetch `/users` once per helper (i.e. once per session) and index it.
+
+        Only the default expected status (200) is answered from the index: any other expected status sends the
+        request again so its status code is always checked, and that response is not kept.
+
+        Args:
+            expected_status_code (int): Expected status code for request (E.g. 200, 201 etc.)
+            refresh (bool): Fetch and index the users again.
+
+        Returns:
+            UserDirectory: Indexed view over the users payload.
+        """
+        cacheable = expected_status_code == HTTPStatusCodes.OK.value
+        if self._user_directory is None or refresh or not cacheable:
+            response = self.controller.jsonplaceholder_request_controller(
+                JSONPlaceholderEndpoints.GET_USERS.switcher
+            )
+
+            assert response.status_code == expected_status_code, \
+                (f"Failed to fetch users. Expected status code {expected_status_code}. "
+                 f"Actual status code: {response.status_code}")
+            directory = UserDirectory(response.json())
+            if not cacheable:
+                return directory
+            self._user_directory = directory
+        return self._user_directory
 
     def get_user(self, expected_status_code: int = HTTPStatusCodes.OK.value, **filters) -> dict:
         """
@@ -15,39 +55,26 @@ class HelperUserComments:
 
         Args:
             expected_status_code (int): Expected status code for request (E.g. 200, 201 etc.)
-            **filters: Arbitrary keyword arguments to filter users by. Supported filters include:
+            **filters: Arbitrary keyword arguments to filter users by (case insensitive). Nested fields are
+                given either with underscores (one level, e.g. `address_city`) or as dotted paths of any depth
+                (e.g. `**{"address.geo.lat": "-37.3159"}`). Supported filters include:
                 - name (str, optional): The full name of the user.
                 - username (str, optional): The username of the user.
                 - email (str, optional): The email address of the user.
                 - phone (str, optional): The phone number of the user.
                 - website (str, optional): The website associated with the user.
-                - company (str, optional): The company name associated with the user.
+                - company_name (str, optional): The company name associated with the user.
                 - address_city (str, optional): The city of the user's address.
 
         Returns:
             dict: The full user details if found.
         """
-        response = self.controller.jsonplaceholder_request_controller(
-            JSONPlaceholderEndpoints.GET_USERS.switcher
-        )
+        user = self.get_user_directory(expected_status_code).find(**filters)
+        if user:
+            pytest.logger.info("User found: %s", user)
+            return user
 
-        assert response.status_code == expected_status_code, \
-            (f"Failed to fetch users. Expected status code {expected_status_code}. "
-             f"Actual status code: {response.status_code}")
-        users = response.json()
-
-        for user in users:
-            match = all(
-                str(user.get(key.split("_")[0], "")).lower() == str(value).lower()
-                if "_" not in key else
-                str(user.get(key.split("_")[0], {}).get(key.split("_")[1], "")).lower() == str(value).lower()
-                for key, value in filters.items()
-            )
-            if match:
-                pytest.logger.info(f"User found: {user}")
-                return user
-
-        pytest.logger.error(f"No user found matching criteria: {filters}")
+        pytest.logger.error("No user found matching criteria: %s", filters)
 
     def get_user_posts(self, user_id: int, expected_status_code: str = HTTPStatusCodes.OK.value) -> list:
         """
@@ -58,17 +85,16 @@ class HelperUserComments:
             expected_status_code (str): Expected status code for request (E.g. 200, 201 etc.)
 
         Returns:
-            list: A list of post
+            list: A list of post (shared with the concurrent callers of the same user, see `_fetch_json`)
         """
-        response = self.controller.jsonplaceholder_request_controller(
-            JSONPlaceholderEndpoints.GET_USER_POSTS.switcher, user_id=user_id
-        )
+        status_code, posts = self._fetch_json(JSONPlaceholderEndpoints.GET_USER_POSTS, user_id=user_id)
 
-        assert response.status_code == expected_status_code, \
+        assert status_code == expected_status_code, \
             (f"Failed to fetch user {user_id} posts. Expected status code {expected_status_code}. "
-             f"Actual status code: {response.status_code}")
-        posts = response.json()
-        pytest.logger.info(f"User {user_id} has {len(posts)} posts.")
+             f"Actual status code: {status_code}")
+        assert isinstance(posts, list), \
+            f"Expected a JSON list of posts for user {user_id}, but the body was not JSON or not a list: {posts!r}"
+        pytest.logger.info("User %s has %d posts.", user_id, len(posts))
         return posts
 
     def get_post_comments(self, post_id: int, expected_status_code: str = HTTPStatusCodes.OK.value) -> list:
@@ -80,23 +106,144 @@ class HelperUserComments:
             expected_status_code (str): Expected status code for request (E.g. 200, 201 etc.)
 
         Returns:
-            list: A list of comments associated with the given post.
+            list: A list of comments associated with the given post (shared with the concurrent callers of the
+            same post, see `_fetch_json`).
 
         Raises:
-            AssertionError: If the post has no comments or the request fails.
+            AssertionError: If the post has no comments, the request fails or the body is not a JSON list.
         """
-        response = self.controller.jsonplaceholder_request_controller(
-            JSONPlaceholderEndpoints.GET_POST_COMMENTS.switcher, post_id=post_id
-        )
+        status_code, comments = self._fetch_json(JSONPlaceholderEndpoints.GET_POST_COMMENTS, post_id=post_id)
 
-        assert response.status_code == expected_status_code, \
+        assert status_code == expected_status_code, \
             (f"Failed to fetch comments for post id {post_id}. Expected status code {expected_status_code}. "
-             f"Actual status code: {response.status_code}")
-        comments = response.json()
-        pytest.logger.info(f"Post {post_id} has {len(comments)} comments.")
+             f"Actual status code: {status_code}")
+        assert isinstance(comments, list), \
+            (f"Expected a JSON list of comments for post id {post_id}, but the body was not JSON or not a list: "
+             f"{comments!r}")
+        pytest.logger.info("Post %s has %d comments.", post_id, len(comments))
 
         return comments
 
+    def _fetch_json(self, endpoint: JSONPlaceholderEndpoints, **params) -> tuple:
+        """
+        Request through the single-flight layer (`core.single_flight`): identical calls in flight at the same
+        time (same endpoint and parameters) share one request and one decoded body, and a successful result is
+        memoized for HELPER_MEMO_TTL_S. Every caller checks the status code on its own.
+
+        Returns:
+            tuple: (status code, decoded JSON body or None if the body is not JSON)
+        """
+        url = JSONPLACEHOLDER_ROUTES[endpoint.switcher].url(jsonplaceholder_base_url(), params)
+
+        def fetch():
+            response = self.controller.jsonplaceholder_request_controller(endpoint.switcher, **params)
+            try:
+                body = response.json()
+            except ValueError:  # e.g. an HTML error page: only its status code is checked
+                body = None
+            return response.status_code, body
+
+        return self.single_flight.do((endpoint.request_type, url), fetch, memoize=lambda result: result[0] < 400)
+
+    def iter_user_posts(self, user_id: int, expected_status_code: int = HTTPStatusCodes.OK.value):
+        """
+        Streaming variant of `get_user_posts`: posts are decoded from the socket and yielded one at a time.
+
+        Args:
+            user_id (int): The ID of the user whose posts need to be fetched.
+            expected_status_code (int): Expected status code for request (E.g. 200, 201 etc.)
+
+        Yields:
+            dict: The posts of the user.
+        """
+        response = self.controller.jsonplaceholder_request_controller(
+            JSONPlaceholderEndpoints.GET_USER_POSTS.switcher, user_id=user_id, stream=True
+        )
+        yield from self._iter_response_items(response, expected_status_code, f"user {user_id}", "posts")
+
+    def iter_post_comments(self, post_id: int, expected_status_code: int = HTTPStatusCodes.OK.value):
+        """
+        Streaming variant of `get_post_comments`: comments are decoded from the socket and yielded one at
+        a time, so counting or validating them runs in constant memory whatever the response size.
+
+        Args:
+            post_id (int): The ID of the post whose comments need to be fetched.
+            expected_status_code (int): Expected status code for request (E.g. 200, 201 etc.)
+
+        Yields:
+            dict: The comments of the post.
+        """
+        response = self.controller.jsonplaceholder_request_controller(
+            JSONPlaceholderEndpoints.GET_POST_COMMENTS.switcher, post_id=post_id, stream=True
+        )
+        yield from self._iter_response_items(response, expected_status_code, f"post {post_id}", "comments")
+
+    @staticmethod
+    def _iter_response_items(response, expected_status_code: int, owner: str, item_name: str):
+        with response:
+            assert response.status_code == expected_status_code, \
+                (f"Failed to fetch {owner} {item_name}. Expected status code {expected_status_code}. "
+                 f"Actual status code: {response.status_code}")
+            count = 0
+            for item in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE)):
+                count += 1
+                yield item
+        pytest.logger.info("Streamed %d %s for %s.", count, item_name, owner)
+
+    async def get_comments_for_posts_async(self, post_ids: list, concurrency: int = FETCH_CONCURRENCY,
+                                           expected_status_code: int = HTTPStatusCodes.OK.value) -> dict:
+        """
+        Fetch comments for many posts in parallel on the running event loop.
+
+        The blocking requests run on a thread pool of `concurrency` workers, so every request still goes
+        through `get_post_comments` (same status code assertions and logging, identical fetches in flight
+        coalesced) and the pooled transport.
+
+        Args:
+            post_ids (list): The IDs of the posts whose comments need to be fetched (a repeated ID is fetched once).
+            concurrency (int): Maximum number of requests in flight at the same time.
+            expected_status_code (int): Expected status code for every request (E.g. 200, 201 etc.)
+
+        Returns:
+            dict: Comments keyed by post ID, in the order of the first occurrence of each ID in `post_ids`.
+
+        Raises:
+            AssertionError: If any of the requests fails.
+        """
+        unique_post_ids = list(dict.fromkeys(post_ids))
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            comments = await asyncio.gather(*(
+                loop.run_in_executor(executor, self.get_post_comments, post_id, expected_status_code)
+                for post_id in unique_post_ids
+            ))
+        return dict(zip(unique_post_ids, comments))
+
+    def get_comments_for_posts(self, post_ids: list, concurrency: int = FETCH_CONCURRENCY,
+                               expected_status_code: int = HTTPStatusCodes.OK.value) -> dict:
+        """
+        Synchronous wrapper over `get_comments_for_posts_async` for regular (non async) tests.
+
+        Args:
+            post_ids (list): The IDs of the posts whose comments need to be fetched.
+            concurrency (int): Maximum number of requests in flight at the same time.
+            expected_status_code (int): Expected status code for every request (E.g. 200, 201 etc.)
+
+        Returns:
+            dict: Comments keyed by post ID, in the order of the first occurrence of each ID in `post_ids`.
+
+        Raises:
+            RuntimeError: If called from a running event loop (await `get_comments_for_posts_async` there).
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("get_comments_for_posts cannot run inside a running event loop: "
+                               "await get_comments_for_posts_async instead")
+        return asyncio.run(self.get_comments_for_posts_async(post_ids, concurrency, expected_status_code))
+
     def get_user_with_posts(self, expected_status_code: int = HTTPStatusCodes.OK.value, **filters) -> dict:
         """
         Fetch user details and their posts in a single method.
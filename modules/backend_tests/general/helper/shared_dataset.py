@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import pytest
+from core import DATASET_LIVE, FETCH_CONCURRENCY, FileLock, get_run_directory, read_json, write_json
+
+
+class SharedUserCommentsDataset:
+    """
+    Fetch-once view over `HelperUserComments` for tests that only need the data, not a fresh request.
+
+    Every resource (user + posts, comments of a post) is requested once per run and stored as JSON in the
+    run directory. xdist workers share the run directory, so the first worker that needs a resource fetches
+    it under a file lock and the others read it from disk. Results are also kept in memory per process.
+
+    Pass `live=True` (or set `DATASET_LIVE=1` for the whole run) to always go to the API.
+    """
+
+    def __init__(self, helper, live: bool = DATASET_LIVE):
+        self.helper = helper
+        self.live = live
+        self.users_dir = get_run_directory("dataset", "users")
+        self.comments_dir = get_run_directory("dataset", "comments")
+        self._users = {}
+        self._comments = {}
+
+    @staticmethod
+    def _filters_key(filters: dict) -> str:
+        return hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get_user_with_posts(self, live: bool = None, **filters) -> dict:
+        """
+        Same contract as `HelperUserComments.get_user_with_posts`, fetched once per run.
+
+        Args:
+            live (bool): Skip the cache and request the API. Defaults to the dataset mode.
+            **filters: Arbitrary keyword arguments to filter users by.
+
+        Returns:
+            dict: A dictionary containing user details and their posts.
+        """
+        if self.live if live is None else live:
+            return self.helper.get_user_with_posts(**filters)
+
+        key = self._filters_key(filters)
+        if key in self._users:
+            return self._users[key]
+
+        path = os.path.join(self.users_dir, f"{key}.json")
+        user_data = read_json(path)
+        if user_data is None:
+            with FileLock(f"{path}.lock"):
+                user_data = read_json(path)
+                if user_data is None:
+                    user_data = self.helper.get_user_with_posts(**filters)
+                    write_json(path, user_data)
+        else:
+            pytest.logger.info("User data for filters %s loaded from the shared dataset.", filters)
+
+        self._users[key] = user_data
+        return user_data
+
+    def get_comments_for_posts(self, post_ids: list, concurrency: int = FETCH_CONCURRENCY,
+                               live: bool = None) -> dict:
+        """
+        Same contract as `HelperUserComments.get_comments_for_posts`, fetched once per run.
+
+        Args:
+            post_ids (list): The IDs of the posts whose comments need to be fetched.
+            concurrency (int): Maximum number of requests in flight for the posts that are not cached yet.
+            live (bool): Skip the cache and request the API. Defaults to the dataset mode.
+
+        Returns:
+            dict: Comments keyed by post ID, in the same order as `post_ids`.
+        """
+        if self.live if live is None else live:
+            return self.helper.get_comments_for_posts(post_ids, concurrency)
+
+        missing = [post_id for post_id in post_ids if not self._load_comments(post_id)]
+        if missing:
+            # one lock for the whole batch: the other workers wait and then read what this one fetched
+            with FileLock(os.path.join(self.comments_dir, "comments.lock")):
+                missing = [post_id for post_id in missing if not self._load_comments(post_id)]
+                fetched = self.helper.get_comments_for_posts(missing, concurrency) if missing else {}
+                for post_id, comments in fetched.items():
+                    write_json(self._comments_path(post_id), comments)
+                    self._comments[post_id] = comments
+
+        return {post_id: self._comments[post_id] for post_id in post_ids}
+
+    def get_post_comments(self, post_id: int, live: bool = None) -> list:
+        return self.get_comments_for_posts([post_id], live=live)[post_id]
+
+    def _comments_path(self, post_id) -> str:
+        return os.path.join(self.comments_dir, f"{self._filters_key(post_id)}.json")
+
+    def _load_comments(self, post_id) -> bool:
+        if post_id in self._comments:
+            return True
+        comments = read_json(self._comments_path(post_id))
+        if comments is None:
+            return False
+        self._comments[post_id] = comments
+        return True
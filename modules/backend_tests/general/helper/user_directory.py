@@ -0,0 +1,106 @@
+from functools import lru_cache
+
+MISSING = ""  # like the original lookup: a missing field compares as an empty string
+
+
+@lru_cache(maxsize=None)
+def parse_path(key: str) -> tuple:
+    """
+    Filter key -> path in the user object. Dotted keys can go any level deep (`address.geo.lat`); keys without
+    dots keep the keyword friendly underscore form (`address_city` -> `address.city`).
+    """
+    return tuple(key.split(".") if "." in key else key.split("_"))
+
+
+@lru_cache(maxsize=None)
+def compile_getter(path: tuple):
+    """
+    Returns:
+        callable: user -> case-folded string value at `path` (MISSING if any level is absent).
+    """
+    if len(path) == 1:
+        field = path[0]
+
+        def getter(user):
+            return str(user.get(field, MISSING)).casefold()
+        return getter
+
+    def nested_getter(user):
+        value = user
+        for part in path:
+            if not isinstance(value, dict):
+                return MISSING
+            value = value.get(part, MISSING)
+        return str(value).casefold()
+    return nested_getter
+
+
+def normalize(value) -> str:
+    return str(value).casefold()
+
+
+class UserDirectory:
+    """
+    Case-folded hash indexes over a `/users` payload.
+
+    Every field that is filtered on gets indexed the first time it is used (one pass over the users), so
+    afterwards a lookup by that field is a dict access whatever the number of users. When several filters are
+    given, the smallest index bucket is scanned and the remaining filters run as compiled predicates.
+
+        directory = UserDirectory(users)
+        directory.find(username="Samantha")
+        directory.find(**{"address.geo.lat": "-68.6102", "company.name": "Romaguera-Jacobson"})
+    """
+
+    def __init__(self, users: list, indexed_fields=("username",)):
+        self.users = users
+        self._indexes = {}
+        for field in indexed_fields:
+            self.index(field)
+
+    def index(self, key: str) -> dict:
+        """
+        Returns:
+            dict: case-folded value -> users having it (payload order), built on first use.
+        """
+        path = parse_path(key)
+        index = self._indexes.get(path)
+        if index is None:
+            index = {}
+            getter = compile_getter(path)
+            for user in self.users:
+                index.setdefault(getter(user), []).append(user)
+            self._indexes[path] = index
+        return index
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _compile_predicate(filters: tuple):
+        checks = tuple((compile_getter(parse_path(key)), normalize(value)) for key, value in filters)
+
+        def predicate(user):
+            return all(getter(user) == expected for getter, expected in checks)
+        return predicate
+
+    def find_all(self, **filters) -> list:
+        """
+        Returns:
+            list: Every user matching all the filters (case insensitive), in payload order.
+        """
+        if not filters:
+            return list(self.users)
+        buckets = [(self.index(key).get(normalize(value), []), key) for key, value in filters.items()]
+        candidates, indexed_key = min(buckets, key=lambda bucket: len(bucket[0]))
+        remaining = tuple(sorted((key, str(value)) for key, value in filters.items() if key != indexed_key))
+        if not candidates or not remaining:
+            return list(candidates)
+        predicate = self._compile_predicate(remaining)
+        return [user for user in candidates if predicate(user)]
+
+    def find(self, **filters):
+        """
+        Returns:
+            dict: The first user matching all the filters, None if there is none.
+        """
+        matches = self.find_all(**filters)
+        return matches[0] if matches else None
@@ -0,0 +1,58 @@
+import itertools
+import json
+import pytest
+import tracemalloc
+
+from core import BENCHMARK_COMMENTS
+from core.comment_store import CommentStore
+from modules.stub_server import iter_benchmark_comments
+
+COMMENTS_PER_POST = 100
+DICT_SAMPLE = 100_000  # the list of dicts is measured on a sample and scaled to a million
+
+
+def decoded_posts(total: int):
+    """
+    Comments decoded post by post from JSON, like the responses of the API (every string is its own object).
+    """
+    comments = iter_benchmark_comments(total, COMMENTS_PER_POST)
+    for start in range(0, total, COMMENTS_PER_POST):
+        yield json.loads(json.dumps(list(itertools.islice(comments, COMMENTS_PER_POST))))
+
+
+def traced_bytes(build) -> tuple:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        value = build()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, after - before
+
+
+@pytest.mark.benchmark
+def test_comment_store_memory():
+    """
+    Memory per million comments of the columnar store against a list of decoded dicts, plus the aggregations
+    the tests run on it.
+    """
+    store = CommentStore()
+    for comments in decoded_posts(BENCHMARK_COMMENTS):
+        store.extend(comments)
+    store_bytes = store.nbytes  # the buffers are all the store holds
+    dicts, dict_bytes = traced_bytes(lambda: [comment for comments in decoded_posts(DICT_SAMPLE)
+                                              for comment in comments])
+
+    store_per_million = store_bytes / len(store) * 1_000_000 / 1024 / 1024
+    dicts_per_million = dict_bytes / len(dicts) * 1_000_000 / 1024 / 1024
+    pytest.logger.info("Memory per million comments: columnar store %.0f MiB (%.0f B/comment), list of dicts "
+                       "%.0f MiB (%.0f B/comment)", store_per_million, store_bytes / len(store), dicts_per_million,
+                       dict_bytes / len(dicts))
+
+    assert len(store) == BENCHMARK_COMMENTS
+    assert set(store.count_by_post().values()) == {COMMENTS_PER_POST}
+    assert list(store.group_by_post()[2]) == list(range(COMMENTS_PER_POST, 2 * COMMENTS_PER_POST))
+    assert store.is_unique("id") and not store.is_unique("body")
+    assert dict(store[DICT_SAMPLE - 1]) == dicts[-1]
+    assert store_per_million < dicts_per_million / 2, "The columnar store should at least halve the memory"
@@ -0,0 +1,72 @@
+import pytest
+import time
+import tracemalloc
+
+from core import BENCHMARK_COMMENTS
+from core.dedupe import COMMENT_CONTENT_FIELDS, DuplicateDetector
+from modules.stub_server import benchmark_comment
+
+MEMORY_BUDGET = 4 * 1024 * 1024
+DUPLICATE_EVERY = 100_000  # a copy of an older comment is injected every DUPLICATE_EVERY comments
+TRACED_COMMENTS = 200_000  # tracemalloc slows the detector down a lot: the memory bound is checked on fewer
+
+
+def comments_with_duplicates(total: int):
+    """
+    `total` distinct comments plus, every DUPLICATE_EVERY comments, a copy of the content of an older comment
+    posted again on the current post (with an id of its own).
+    """
+    copies = 0
+    for index in range(total):
+        comment = benchmark_comment(index)
+        yield comment
+        if index and index % DUPLICATE_EVERY == 0:
+            copies += 1
+            yield dict(benchmark_comment(index // 2), id=total + copies, postId=comment["postId"])
+
+
+def same_content(comment: dict, earlier: dict) -> bool:
+    return all(comment[field] == earlier[field] for field in COMMENT_CONTENT_FIELDS)
+
+
+@pytest.mark.benchmark
+def test_global_duplicate_detection(tmp_path):
+    """
+    Every comment posted again on another post should be found across the whole synthetic dataset, with the seen
+    digests spilling to disk past the memory budget and a Bloom filter in front.
+    """
+    with DuplicateDetector(memory_budget=MEMORY_BUDGET, bloom_capacity=BENCHMARK_COMMENTS,
+                           directory=str(tmp_path)) as detector:
+        start_time = time.perf_counter()
+        duplicates = detector.find_duplicates(comments_with_duplicates(BENCHMARK_COMMENTS))
+        elapsed_s = time.perf_counter() - start_time
+
+    pytest.logger.info("Deduplicated %d comments in %.1fs (%.0f/s): %s", detector.stats.items, elapsed_s,
+                       detector.stats.items / elapsed_s, detector.stats.summary())
+    assert len(duplicates) == (BENCHMARK_COMMENTS - 1) // DUPLICATE_EVERY
+    assert all(same_content(comment, earlier) for comment, earlier in duplicates)
+    assert detector.stats.spilled_runs, "The memory budget should have been exceeded"
+
+
+@pytest.mark.benchmark
+def test_duplicate_detection_memory_budget(tmp_path):
+    """
+    The traced memory of the detector should stay within its budget however many comments it has seen.
+    """
+    budget = MEMORY_BUDGET // 2
+    tracemalloc.start()
+    try:
+        with DuplicateDetector(memory_budget=budget, bloom_capacity=TRACED_COMMENTS,
+                               directory=str(tmp_path)) as detector:
+            before_bytes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            duplicates = detector.find_duplicates(comments_with_duplicates(TRACED_COMMENTS))
+            _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    pytest.logger.info("Peak traced memory over %d comments: %.1f MiB for a %.0f MiB budget (%d runs spilled)",
+                       detector.stats.items, (peak_bytes - before_bytes) / 1024 / 1024, budget / 1024 / 1024,
+                       detector.stats.spilled_runs)
+    assert len(duplicates) == (TRACED_COMMENTS - 1) // DUPLICATE_EVERY
+    assert peak_bytes - before_bytes < 2 * budget, "The detector should stay within its memory budget"
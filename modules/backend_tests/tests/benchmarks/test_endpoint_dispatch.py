@@ -0,0 +1,61 @@
+import pytest
+import time
+from functools import partial
+
+from core.endpoint_registry import Endpoint, compile_routes
+from modules.backend_tests.general.request_builder_user_comments import (JSONPLACEHOLDER_ROUTES,
+                                                                         JSONPlaceholderEndpoints,
+                                                                         jsonplaceholder_base_url)
+
+CALLS = 20_000
+
+
+def switcher_dispatch(key, **kwargs):
+    """
+    The dispatch `JSONPlaceholderController` used before the route table: every endpoint formatted and
+    wrapped in a partial on every call, then one of them picked (the request itself is left out).
+    """
+    endpoints = JSONPlaceholderEndpoints
+    switcher = {
+        endpoints.GET_USERS.switcher: partial(str, endpoints.GET_USERS.path),
+        endpoints.GET_USER_POSTS.switcher: partial(str, endpoints.GET_USER_POSTS.path.format(
+            user_id=kwargs.get("user_id"))),
+        endpoints.GET_POST_COMMENTS.switcher: partial(str, endpoints.GET_POST_COMMENTS.path.format(
+            post_id=kwargs.get("post_id"))),
+    }
+    return switcher[key]()
+
+
+def route_dispatch(routes, key, **kwargs):
+    return routes[key].url(jsonplaceholder_base_url(), kwargs)
+
+
+def time_per_call_us(function, *args, **kwargs) -> float:
+    start_time = time.perf_counter()
+    for _ in range(CALLS):
+        function(*args, **kwargs)
+    return (time.perf_counter() - start_time) / CALLS * 1e6
+
+
+@pytest.mark.benchmark
+def test_endpoint_dispatch_overhead():
+    """
+    Compare the compiled route table against the per-call switcher, and check the dispatch cost does not grow
+    with the number of registered endpoints.
+    """
+    assert switcher_dispatch("GET_COMMENTS", post_id=7) == route_dispatch(JSONPLACEHOLDER_ROUTES, "GET_COMMENTS",
+                                                                          post_id=7)
+
+    switcher_us = time_per_call_us(switcher_dispatch, "GET_COMMENTS", post_id=7)
+    route_us = time_per_call_us(route_dispatch, JSONPLACEHOLDER_ROUTES, "GET_COMMENTS", post_id=7)
+
+    large_routes = dict(JSONPLACEHOLDER_ROUTES)
+    large_routes.update(compile_routes(
+        Endpoint("GET", f"/resource_{number}/{{item_id}}", f"GET_RESOURCE_{number}") for number in range(1000)
+    ))
+    large_route_us = time_per_call_us(route_dispatch, large_routes, "GET_COMMENTS", post_id=7)
+
+    pytest.logger.info("Dispatch per call: switcher %.2fus, route table %.2fus, route table with %d endpoints %.2fus",
+                       switcher_us, route_us, len(large_routes), large_route_us)
+    assert route_us < switcher_us, "The route table should dispatch faster than rebuilding the switcher"
+    assert large_route_us < route_us * 2, "Dispatch cost should not depend on the number of endpoints"
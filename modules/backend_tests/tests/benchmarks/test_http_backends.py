@@ -0,0 +1,81 @@
+import pytest
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import BENCHMARK_HTTP_REQUESTS, ROOT_WORKING_DIRECTORY
+from core.http_backends import HTTP_BACKENDS
+from core.latency_histogram import LatencyHistogram
+from core.rate_limiter import RateLimiter
+from core.request_builder import HTTPTransport
+
+THREADS = 8
+POSTS_PER_USER = 5
+COMMENTS_PER_POST = 5
+
+
+@pytest.fixture(scope="module")
+def stub_server_url():
+    """
+    Stand-in server in its own process, so the CPU time measured in the test process is the client's only.
+    """
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen([sys.executable, "-m", "modules.stub_server", "--port", str(port),
+                               "--posts-per-user", str(POSTS_PER_USER),
+                               "--comments-per-post", str(COMMENTS_PER_POST)],
+                              cwd=ROOT_WORKING_DIRECTORY, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            assert time.monotonic() < deadline and server.poll() is None, "The stand-in server did not start"
+            time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.terminate()
+    server.wait()
+
+
+def run_requests(transport: HTTPTransport, urls: list, threads: int) -> dict:
+    latencies_us, statuses = [], []
+
+    def send(url):
+        started_ns = time.perf_counter_ns()
+        response = transport.request("GET", url)
+        latencies_us.append((time.perf_counter_ns() - started_ns) // 1000)
+        statuses.append(response.status_code)
+
+    cpu_started_s, started_s = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(send, urls))
+    elapsed_s, cpu_s = time.perf_counter() - started_s, time.process_time() - cpu_started_s
+    histogram = LatencyHistogram()
+    for latency_us in latencies_us:
+        histogram.record(latency_us)
+    return {"throughput": len(urls) / elapsed_s, "cpu_us": cpu_s / len(urls) * 1e6,
+            "statuses": set(statuses), **histogram.summary_ms()}
+
+
+@pytest.mark.benchmark
+def test_http_backend_comparison(stub_server_url):
+    """
+    Requests/s, latency percentiles and client CPU time per request of every HTTP backend, one request at a
+    time and from a thread pool, against the same stand-in server.
+    """
+    urls = [f"{stub_server_url}/comments?postId={index % 50 + 1}" for index in range(BENCHMARK_HTTP_REQUESTS)]
+    lines = [f"{'backend':<13}{'threads':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'CPU us/req':>12}"]
+    for backend in sorted(HTTP_BACKENDS):
+        transport = HTTPTransport(backend=backend, rate_limiter=RateLimiter(), pool_maxsize=THREADS)
+        transport.request("GET", urls[0])  # connect outside the measurement
+        for threads in (1, THREADS):
+            result = run_requests(transport, urls, threads)
+            assert result["statuses"] == {200}, f"{backend}: unexpected statuses {result['statuses']}"
+            lines.append(f"{backend:<13}{threads:>8}{result['throughput']:>10.0f}{result['p50']:>9.2f}"
+                         f"{result['p99']:>9.2f}{result['cpu_us']:>12.0f}")
+        transport.close()
+    pytest.logger.info("HTTP backends, %d requests each:\n%s", BENCHMARK_HTTP_REQUESTS, "\n".join(lines))
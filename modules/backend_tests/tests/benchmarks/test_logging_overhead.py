@@ -0,0 +1,82 @@
+import logging
+import os
+import pytest
+import time
+from time import perf_counter_ns
+
+from core.log_pipeline import FILE_TEXT_FORMAT, LoggingPipeline, merge_worker_logs
+
+REQUESTS = 2000
+REQUEST_TIME_S = 0.0002  # stands in for the network wait of a request, when the listener thread catches up
+COMMENT = {"postId": 1, "id": 1, "name": "id labore ex et quam laborum", "email": "Eliseo@gardner.biz",
+           "body": "laudantium enim quasi est quidem magnam voluptate ipsam eos"}
+
+
+def logging_cost_us(log_call) -> float:
+    """
+    Time spent in the log calls only, per simulated request.
+    """
+    spent_ns = 0
+    for index in range(REQUESTS):
+        time.sleep(REQUEST_TIME_S)
+        started_ns = perf_counter_ns()
+        log_call(index)
+        spent_ns += perf_counter_ns() - started_ns
+    return spent_ns / REQUESTS / 1e3
+
+
+def synchronous_logger(log_file: str) -> logging.Logger:
+    """
+    The previous `pytest.logger` setup: the caller formats and writes the record to the file itself.
+    """
+    logger = logging.getLogger("benchmark-synchronous")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = logging.FileHandler(log_file, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(FILE_TEXT_FORMAT.replace(" [%(worker_id)s]", "")))
+    logger.addHandler(handler)
+    return logger
+
+
+@pytest.mark.benchmark
+def test_logging_overhead_per_request(tmp_path):
+    """
+    Compare the logging cost per request of the synchronous file handler with eager f-strings against the
+    queue based pipeline with lazy formatting (text and JSONL), and check the per-worker files merge in order.
+    """
+    synchronous = synchronous_logger(str(tmp_path / "synchronous.log"))
+    synchronous_us = logging_cost_us(
+        lambda index: synchronous.info(f"Post {index} has comments: {COMMENT}")
+    )
+    for handler in list(synchronous.handlers):
+        synchronous.removeHandler(handler)
+        handler.close()
+
+    results = {}
+    for structured in (False, True):
+        pipeline = LoggingPipeline(f"benchmark-pipeline-{structured}", str(tmp_path / f"pipeline-{structured}.log"),
+                                   structured=structured, console=False, worker_id="main")
+        logger = pipeline.start()
+        logger.propagate = False
+        results[structured] = logging_cost_us(lambda index: logger.info("Post %d has comments: %s", index, COMMENT))
+        pipeline.stop()
+
+    pytest.logger.info("Logging cost per request: synchronous %.2fus, queued %.2fus, queued + JSONL %.2fus",
+                       synchronous_us, results[False], results[True])
+    assert results[False] < synchronous_us, "The queued pipeline should cost the caller less than writing itself"
+
+    run_log = tmp_path / "run.log"
+    for worker in ("main", "gw0", "gw1"):
+        pipeline = LoggingPipeline(f"benchmark-merge-{worker}", str(run_log), console=False, worker_id=worker)
+        logger = pipeline.start()
+        logger.propagate = False
+        for index in range(3):
+            logger.info("record %d of %s\nsecond line", index, worker)
+        pipeline.stop()
+    merge_worker_logs(str(run_log))
+
+    lines = run_log.read_text(encoding="utf-8").splitlines()
+    assert sorted(os.listdir(tmp_path)) == sorted(["run.log", "synchronous.log", "pipeline-False.log",
+                                                   "pipeline-True.log", "pipeline-True.jsonl"])
+    assert len(lines) == 18 and lines[1::2] == ["second line"] * 9
+    assert lines[::2] == sorted(lines[::2], key=lambda line: line[:23]), "Merged records should be in time order"
@@ -0,0 +1,38 @@
+import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import HTTPStatusCodes
+from core.rate_limiter import RateLimiter
+from core.request_builder import HTTPTransport
+from modules.stub_server import StubServer, StubServerConfig
+
+REQUESTS = 300
+THREADS = 20
+
+
+@pytest.mark.benchmark
+def test_rate_limited_throughput():
+    """
+    Against a stand-in server throttling 30% of the requests (429 + Retry-After), every request should end up
+    succeeding through the rate limiter's retries, with the adaptive concurrency backing off.
+    """
+    config = StubServerConfig(rate_limit_rate=0.3, retry_after_s=0.05)
+    limiter = RateLimiter(max_concurrency=THREADS, max_retries=10)
+    transport = HTTPTransport(rate_limiter=limiter)
+
+    with StubServer(config) as server, ThreadPoolExecutor(THREADS) as executor:
+        start_time = time.perf_counter()
+        statuses = list(executor.map(
+            lambda index: transport.request("GET", f"{server.base_url}/comments?postId={index % 100 + 1}").status_code,
+            range(REQUESTS)
+        ))
+        elapsed_s = time.perf_counter() - start_time
+    transport.close()
+
+    stats = limiter.stats
+    pytest.logger.info("%d requests succeeded in %.2fs (%.1f req/s): %s", REQUESTS, elapsed_s, REQUESTS / elapsed_s,
+                       stats.summary())
+    assert statuses.count(HTTPStatusCodes.OK.value) == REQUESTS, "Throttled requests should have been retried"
+    assert stats.retries > 0 and stats.gave_up == 0
+    assert stats.lowest_limit < THREADS, "The concurrency should back off on 429s"
@@ -0,0 +1,34 @@
+import pytest
+import re
+import time
+
+from core import COMMENT_STRUCTURE, EMAIL_REGEX
+from core.schema_validator import COMMENT_VALIDATOR
+
+
+@pytest.mark.benchmark
+def test_compiled_validator_throughput(synthetic_comments):
+    """
+    Validate the whole synthetic dataset in one pass with the compiled comment validator and compare it
+    with the hand written per-comment checks it replaced.
+    """
+    start_time = time.perf_counter()
+    violations = COMMENT_VALIDATOR.validate(synthetic_comments)
+    compiled_s = time.perf_counter() - start_time
+    assert not violations, f"Synthetic dataset should be valid, got {len(violations)} violations"
+
+    start_time = time.perf_counter()
+    seen_comment_ids = set()
+    for comment in synthetic_comments:
+        for field, expected_type in COMMENT_STRUCTURE.items():
+            assert field in comment and isinstance(comment[field], expected_type)
+        assert comment["id"] > 0 and comment["name"] and comment["email"] and comment["body"]
+        assert re.match(EMAIL_REGEX, comment["email"])
+        assert comment["id"] not in seen_comment_ids
+        seen_comment_ids.add(comment["id"])
+    hand_written_s = time.perf_counter() - start_time
+
+    total = len(synthetic_comments)
+    pytest.logger.info("Validated %d comments: compiled %.2fs (%.0f/s), hand written loop %.2fs (%.0f/s)", total,
+                       compiled_s, total / compiled_s, hand_written_s, total / hand_written_s)
+    assert compiled_s < hand_written_s, "Compiled validator should be faster than the per-comment loop"
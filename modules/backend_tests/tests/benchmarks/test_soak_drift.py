@@ -0,0 +1,54 @@
+import pytest
+import time
+from types import SimpleNamespace
+
+from core.load_generator import LoadTarget
+from core.soak import SoakRunner
+
+TARGETS = [LoadTarget("GET_USERS", "GET", "http://soak.invalid/users")]
+RESPONSE = SimpleNamespace(status_code=200)
+LEAK_BYTES = 256 * 1024
+
+
+def short_soak(request_fn, tmp_path) -> SoakRunner:
+    return SoakRunner(TARGETS, duration_s=3, window_s=0.25, rate=40, concurrency=4, warmup_windows=1,
+                      max_memory_drift_mb=5, name="drift", output_dir=str(tmp_path), request_fn=request_fn)
+
+
+@pytest.mark.benchmark
+def test_soak_detects_latency_drift_and_leak(tmp_path):
+    """
+    A client that gets slower and keeps every response should fail the soak run on both the p99 and the memory
+    trend, with the leaking line at the top of the growing allocation sites.
+    """
+    leaked = []
+    started_s = time.perf_counter()
+
+    def leaky_request(method, url, headers=None):
+        time.sleep(0.001 + (time.perf_counter() - started_s) * 0.01)
+        leaked.append(bytearray(LEAK_BYTES))
+        return RESPONSE
+
+    result = short_soak(leaky_request, tmp_path).run()
+    pytest.logger.info("Soak run of a leaking, slowing client:\n%s", result.report())
+
+    assert {drift.metric for drift in result.regressions} == {"p99 latency", "RSS", "traced memory"}
+    assert "test_soak_drift.py" in result.top_growth[0]
+    with open(result.path, encoding="utf-8") as series:
+        assert sum(1 for _ in series) == len(result.samples) >= 10
+
+
+@pytest.mark.benchmark
+def test_soak_steady_client(tmp_path):
+    """
+    A steady client should go through the same soak run without any drift.
+    """
+    def steady_request(method, url, headers=None):
+        time.sleep(0.002)
+        return RESPONSE
+
+    result = short_soak(steady_request, tmp_path).run()
+    pytest.logger.info("Soak run of a steady client:\n%s", result.report())
+
+    assert result.drifts and not result.regressions, result.report()
+    assert result.load.requests == sum(sample.requests for sample in result.samples)
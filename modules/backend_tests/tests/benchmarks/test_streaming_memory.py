@@ -0,0 +1,58 @@
+import pytest
+import subprocess
+import sys
+
+from core import BENCHMARK_COMMENTS, ROOT_WORKING_DIRECTORY
+from modules.stub_server import StubServer, StubServerConfig
+
+# runs in a fresh interpreter, so the peak belongs to one decoding path only. On Linux ru_maxrss is inherited
+# across exec (it would report the pytest worker's peak), so the peak of the new address space (VmHWM) is used.
+PEAK_RSS_SCRIPT = """
+import resource, sys
+from core.json_stream import iter_json_array, STREAM_CHUNK_SIZE
+from core.request_builder import http_request
+
+
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+mode, url = sys.argv[1], sys.argv[2]
+if mode == "buffered":
+    count = len(http_request("GET", url).json())
+else:
+    with http_request("GET", url, stream=True) as response:
+        count = sum(1 for _ in iter_json_array(response.iter_content(STREAM_CHUNK_SIZE)))
+print(count, peak_rss_kb())
+"""
+
+
+def measure_peak_rss(mode: str, url: str) -> tuple:
+    output = subprocess.run([sys.executable, "-c", PEAK_RSS_SCRIPT, mode, url], cwd=ROOT_WORKING_DIRECTORY,
+                            capture_output=True, text=True, check=True).stdout
+    count, peak_kb = map(int, output.split())
+    return count, peak_kb
+
+
+@pytest.mark.benchmark
+def test_streaming_decoding_peak_rss():
+    """
+    Compare the peak RSS of decoding one large comments response with `response.json()` (buffered)
+    and with the incremental `iter_json_array` (streaming).
+    """
+    pytest.importorskip("resource", reason="ru_maxrss is not available on this platform")
+    comments_per_post = max(BENCHMARK_COMMENTS // 5, 1000)
+    with StubServer(StubServerConfig(users=1, posts_per_user=1, comments_per_post=comments_per_post)) as server:
+        url = f"{server.base_url}/comments?postId=1"
+        buffered_count, buffered_kb = measure_peak_rss("buffered", url)
+        streamed_count, streamed_kb = measure_peak_rss("streaming", url)
+
+    pytest.logger.info("Peak RSS decoding %d comments: buffered %.1f MiB, streaming %.1f MiB", comments_per_post,
+                       buffered_kb / 1024, streamed_kb / 1024)
+    assert buffered_count == streamed_count == comments_per_post
+    assert streamed_kb < buffered_kb, "Streaming decoding should use less memory than the buffered path"
@@ -0,0 +1,80 @@
+import pytest
+
+from core.rate_limiter import RateLimiter
+from core.replay import MAX_SPEED, TrafficReplay, peak_concurrency
+from core.request_builder import using_transport
+from core.traffic import TrafficRecorder, read_traffic
+from modules.backend_tests.general.helper.helper_user_comments import HelperUserComments
+from modules.stub_server import StubServer, StubServerConfig
+
+LATENCY_MS = 20
+POSTS_PER_USER = 5
+COMMENTS_PER_POST = 1500  # above the stub's streaming threshold: chunked responses
+
+
+@pytest.fixture(scope="module")
+def captured_traffic(tmp_path_factory):
+    """
+    Traffic of the helper calls (buffered, streamed and parallel fetches) captured against the stand-in server.
+    """
+    path = str(tmp_path_factory.mktemp("traffic") / "traffic.jsonl")
+    config = StubServerConfig(posts_per_user=POSTS_PER_USER, comments_per_post=COMMENTS_PER_POST,
+                              latency_ms=LATENCY_MS)
+    with StubServer(config) as server, pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("JSONPLACEHOLDER_BASE_URL", server.base_url)
+        # closing the capturing transport flushes the capture, the session one is put back as it was
+        with using_transport(rate_limiter=RateLimiter(), recorder=TrafficRecorder(path, worker_id="main")):
+            helper = HelperUserComments()
+            post_ids = [post["id"] for post in helper.get_user_with_posts(username="Samantha")["posts"]]
+            for post_id in post_ids:
+                assert sum(1 for _ in helper.iter_post_comments(post_id)) == COMMENTS_PER_POST
+            helper.get_comments_for_posts(post_ids)
+        yield server, read_traffic(path)
+
+
+@pytest.mark.benchmark
+def test_traffic_capture(captured_traffic):
+    """
+    Every request of the helper calls should be captured with its status, latency and body digest, streamed
+    bodies included.
+    """
+    _, entries = captured_traffic
+    streamed = [entry for entry in entries if entry["stream"]]
+    assert len(entries) == 2 + 2 * POSTS_PER_USER  # user + posts, then every post's comments twice
+    assert len(streamed) == POSTS_PER_USER
+    assert all(entry["status"] == 200 and entry["body_digest"] and entry["latency_ms"] >= LATENCY_MS
+               for entry in entries)
+    assert len({entry["body_digest"] for entry in streamed}) == POSTS_PER_USER
+    assert peak_concurrency(entries) > 1, "The parallel fetch should overlap"
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("speed", [1, 2, MAX_SPEED])
+def test_traffic_replay_speed(captured_traffic, speed):
+    """
+    A replay against the same server should match the capture, keeping the captured gaps scaled by `speed` (it
+    cannot be faster; a loaded machine may make it slower, so there is no upper bound).
+    """
+    server, entries = captured_traffic
+    report = TrafficReplay(entries, base_url=server.base_url, speed=speed).run()
+
+    pytest.logger.info("Replay of the captured traffic:\n%s", report.report())
+    assert report.requests == len(entries)
+    assert not report.mismatches, f"Unexpected differences: {report.mismatches}"
+    if speed != MAX_SPEED:
+        assert report.elapsed_s >= 0.8 * report.captured_span_s / speed
+
+
+@pytest.mark.benchmark
+def test_traffic_replay_diff(captured_traffic):
+    """
+    Replayed against a server with other data, every body should be reported as different, not the statuses.
+    """
+    _, entries = captured_traffic
+    config = StubServerConfig(posts_per_user=POSTS_PER_USER, comments_per_post=COMMENTS_PER_POST, seed=2)
+    with StubServer(config) as other_server:
+        report = TrafficReplay(entries, base_url=other_server.base_url, speed=MAX_SPEED).run()
+
+    pytest.logger.info("Replay against other data:\n%s", report.report())
+    assert report.status_mismatches == 0 and report.errors == 0
+    assert report.body_mismatches == len(entries)
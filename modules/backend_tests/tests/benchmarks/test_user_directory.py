@@ -0,0 +1,52 @@
+import pytest
+import random
+import time
+
+from core import BENCHMARK_USERS
+from modules.backend_tests.general.helper.user_directory import UserDirectory
+from modules.stub_server import SyntheticDataGenerator
+
+
+def linear_scan(users: list, **filters):
+    """
+    The lookup `HelperUserComments.get_user` used before the directory: scan every user for every call.
+    """
+    for user in users:
+        match = all(
+            str(user.get(key.split("_")[0], "")).lower() == str(value).lower()
+            if "_" not in key else
+            str(user.get(key.split("_")[0], {}).get(key.split("_")[1], "")).lower() == str(value).lower()
+            for key, value in filters.items()
+        )
+        if match:
+            return user
+
+
+@pytest.mark.benchmark
+def test_user_directory_lookup():
+    """
+    Compare indexed lookups (username, dotted nested path) against the linear scan on BENCHMARK_USERS users.
+    """
+    users = list(SyntheticDataGenerator(users=BENCHMARK_USERS).iter_users())
+    sample = random.Random(1).sample(users, 50)
+
+    start_time = time.perf_counter()
+    directory = UserDirectory(users)
+    directory.index("address.geo.lat")
+    index_s = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for user in sample:
+        assert directory.find(username=user["username"].upper())["username"] == user["username"]
+        assert directory.find(**{"address.geo.lat": user["address"]["geo"]["lat"],
+                                 "username": user["username"]})["id"] == user["id"]
+    indexed_us = (time.perf_counter() - start_time) / (2 * len(sample)) * 1e6
+
+    start_time = time.perf_counter()
+    for user in sample[:5]:
+        assert linear_scan(users, username=user["username"])["id"] == user["id"]
+    linear_us = (time.perf_counter() - start_time) / 5 * 1e6
+
+    pytest.logger.info("%d users: indexing %.2fs, indexed lookup %.1fus, linear scan %.1fus", len(users), index_s,
+                       indexed_us, linear_us)
+    assert indexed_us * 100 < linear_us, "Indexed lookups should be orders of magnitude faster than a scan"
@@ -0,0 +1,24 @@
+import pytest
+
+from core.comment_store import CommentStore
+
+
+@pytest.mark.framework
+@pytest.mark.parametrize("invalid, message", [
+    ({"id": 2, "postId": 1, "name": "n", "body": "b"}, "Comment 1 of the store has no 'email' field"),
+    ({"id": 2, "postId": 1, "name": "n", "email": None, "body": "b"}, "has a NoneType 'email', expected str"),
+    ({"id": "2", "postId": 1, "name": "n", "email": "e@x.io", "body": "b"}, "has a str 'id', expected int"),
+    (None, "Comment 1 of the store has no fields"),
+])
+def test_comment_store_rejects_invalid_comments(invalid, message):
+    """
+    A comment that misses a field or has a value of another type should be refused with the comment named, and
+    leave the store as it was before it.
+    """
+    valid = {"id": 1, "postId": 1, "name": "n", "email": "e@x.io", "body": "b"}
+    store = CommentStore()
+    with pytest.raises(ValueError, match=message):
+        store.extend([valid, invalid, dict(valid, id=3)])
+
+    assert len(store) == 1 and all(len(column) == 1 for column in store.columns.values())
+    assert dict(store[0]) == valid
@@ -0,0 +1,44 @@
+import pytest
+
+from core.dedupe import ENTRY_BYTES, DuplicateDetector
+from modules.stub_server import benchmark_comment
+
+COMMENTS = 3000
+
+
+@pytest.mark.framework
+def test_duplicate_detection_confirms_collisions(tmp_path):
+    """
+    With 16-bit digests many new comments collide with an older one, in memory or in the spilled runs: each match
+    is checked against the stored record, so only the comments posted again on another post are reported.
+    """
+    comments = [benchmark_comment(index) for index in range(COMMENTS)]
+    copies = [dict(comments[index], id=COMMENTS + index + 1, postId=comments[-1]["postId"]) for index in (10, 2000)]
+    with DuplicateDetector(memory_budget=100 * ENTRY_BYTES, digest_size=2, directory=str(tmp_path)) as detector:
+        duplicates = detector.find_duplicates(comments + copies)
+
+    pytest.logger.info(detector.stats.summary())
+    assert [comment["id"] for comment, _ in duplicates] == [copy["id"] for copy in copies]
+    assert detector.stats.collisions > 0 and detector.stats.spilled_runs > 0
+
+
+@pytest.mark.framework
+@pytest.mark.parametrize("digest_size", [0, 9, 16])
+def test_duplicate_detection_digest_size(digest_size, tmp_path):
+    """
+    Digests that do not fit the 64-bit entries of the spilled runs should be refused up front.
+    """
+    with pytest.raises(ValueError, match="digest_size must be 1 to 8 bytes"):
+        DuplicateDetector(digest_size=digest_size, directory=str(tmp_path))
+
+
+@pytest.mark.framework
+def test_duplicate_detection_missing_fields(tmp_path):
+    """
+    A comment missing content fields should still be checked (as nulls) instead of stopping the detection.
+    """
+    partial = {"id": 1, "postId": 1, "name": "n"}
+    with DuplicateDetector(directory=str(tmp_path)) as detector:
+        assert detector.add(partial) is None
+        assert detector.add(dict(partial, body="b")) is None
+        assert detector.add(dict(partial, id=2)) == {"name": "n", "email": None, "body": None}
@@ -0,0 +1,27 @@
+import pytest
+from types import SimpleNamespace
+
+from core.single_flight import SingleFlight
+from modules.backend_tests.general.helper.helper_user_comments import HelperUserComments
+
+
+def html_response(*args, **kwargs):
+    """
+    A 200 answered with an HTML page (E.g. a proxy error page) instead of JSON.
+    """
+    def not_json():
+        raise ValueError("Expecting value: line 1 column 1 (char 0)")
+    return SimpleNamespace(status_code=200, json=not_json)
+
+
+@pytest.mark.framework
+@pytest.mark.parametrize("fetch, argument", [("get_user_posts", 1), ("get_post_comments", 1)])
+def test_helper_rejects_bodies_that_are_not_json(fetch, argument):
+    """
+    A body that is not JSON with the expected status should fail the test with a readable assertion.
+    """
+    helper = HelperUserComments(SingleFlight())
+    helper.controller = SimpleNamespace(jsonplaceholder_request_controller=html_response)
+
+    with pytest.raises(AssertionError, match="the body was not JSON or not a list: None"):
+        getattr(helper, fetch)(argument)
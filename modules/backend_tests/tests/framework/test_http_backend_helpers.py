@@ -0,0 +1,46 @@
+import pytest
+import requests
+
+from core.http_backends import HTTP_BACKENDS
+from core.rate_limiter import RateLimiter
+from core.request_builder import HTTPTransport, using_transport
+from modules.backend_tests.general.helper.helper_user_comments import HelperUserComments
+from modules.stub_server import StubServer, StubServerConfig
+
+POSTS_PER_USER = 5
+COMMENTS_PER_POST = 5
+
+
+@pytest.mark.framework
+@pytest.mark.parametrize("backend", sorted(HTTP_BACKENDS))
+def test_http_backend_helper_layer(monkeypatch, backend):
+    """
+    The helper layer should work unchanged on every HTTP backend: buffered, streamed and parallel fetches.
+    """
+    config = StubServerConfig(posts_per_user=POSTS_PER_USER, comments_per_post=COMMENTS_PER_POST)
+    with StubServer(config) as server, using_transport(backend=backend):
+        monkeypatch.setenv("JSONPLACEHOLDER_BASE_URL", server.base_url)
+        helper = HelperUserComments()
+        user_data = helper.get_user_with_posts(username="Samantha")
+        post_ids = [post["id"] for post in user_data["posts"]]
+        streamed = [sum(1 for _ in helper.iter_post_comments(post_id)) for post_id in post_ids]
+        parallel = helper.get_comments_for_posts(post_ids)
+
+    assert len(post_ids) == POSTS_PER_USER
+    assert streamed == [COMMENTS_PER_POST] * POSTS_PER_USER
+    assert [len(comments) for comments in parallel.values()] == streamed
+
+
+@pytest.mark.framework
+@pytest.mark.parametrize("backend", sorted(HTTP_BACKENDS))
+def test_http_backend_timeout(backend):
+    """
+    A response slower than the timeout should fail with `requests.Timeout` on every backend.
+    """
+    transport = HTTPTransport(backend=backend, timeout=0.1, max_retries=0, rate_limiter=RateLimiter())
+    with StubServer(StubServerConfig(users=1, latency_ms=500)) as server:
+        try:
+            with pytest.raises(requests.Timeout):
+                transport.request("GET", f"{server.base_url}/users")
+        finally:
+            transport.close()
@@ -0,0 +1,61 @@
+import os
+import pytest
+
+from core.http_cache import HTTPCache
+from core.json_stream import iter_json_array, STREAM_CHUNK_SIZE
+from core.rate_limiter import RateLimiter
+from core.request_builder import HTTPTransport
+from modules.stub_server import StubServer, StubServerConfig
+
+COMMENTS_PER_POST = 2000  # above the stub's streaming threshold: chunked responses
+
+
+@pytest.fixture
+def cached_transport(tmp_path):
+    transport = HTTPTransport(rate_limiter=RateLimiter(), cache=HTTPCache(str(tmp_path / "http_cache")))
+    yield transport
+    transport.close()
+
+
+@pytest.mark.framework
+def test_http_cache_revalidation(cached_transport):
+    """
+    The second fetch of a list should be revalidated with a 304 and served from disk with the same body,
+    buffered or streamed, and a bypassed request should reach the server.
+    """
+    cache = cached_transport.cache
+    with StubServer(StubServerConfig(users=1, posts_per_user=1, comments_per_post=COMMENTS_PER_POST)) as server:
+        url = f"{server.base_url}/comments?postId=1"
+        first = cached_transport.request("GET", url)
+        second = cached_transport.request("GET", url)
+        with cached_transport.request("GET", url, stream=True) as streamed:
+            streamed_comments = list(iter_json_array(streamed.iter_content(STREAM_CHUNK_SIZE)))
+        with cache.bypass():
+            fresh = cached_transport.request("GET", url)
+
+    pytest.logger.info("HTTP cache: %s", cache.stats.summary())
+    assert not getattr(first, "from_cache", False) and second.from_cache and streamed.from_cache
+    assert second.json() == first.json() == streamed_comments
+    assert len(streamed_comments) == COMMENTS_PER_POST
+    assert not getattr(fresh, "from_cache", False) and fresh.content == first.content
+    assert (cache.stats.requests, cache.stats.hits, cache.stats.bypassed) == (3, 2, 1)
+    assert cache.stats.bytes_saved == 2 * len(first.content)
+
+
+@pytest.mark.framework
+def test_http_cache_lru_eviction(tmp_path):
+    """
+    With room for two bodies, the least recently served one should be evicted first.
+    """
+    transport = HTTPTransport(rate_limiter=RateLimiter(), cache=HTTPCache(str(tmp_path / "http_cache")))
+    with StubServer(StubServerConfig(users=3, posts_per_user=1, comments_per_post=100)) as server:
+        urls = [f"{server.base_url}/comments?postId={post_id}" for post_id in (1, 2, 3)]
+        sizes = [len(transport.request("GET", url).content) for url in urls[:2]]
+        transport.cache.max_bytes = sum(sizes) + 100  # fits two of the three bodies
+        os.utime(transport.cache._body_path(transport.cache.lookup(urls[1]).body_hash), (0, 0))
+        transport.request("GET", urls[0])  # served from the cache, most recently used
+        transport.request("GET", urls[2])  # stored, urls[1] goes
+
+        cached = [transport.cache.lookup(url) is not None for url in urls]
+    transport.close()
+    assert cached == [True, False, True]
@@ -0,0 +1,54 @@
+import pytest
+
+from modules.backend_tests.general.request_builder_user_comments import JSONPlaceholderClient, JSONPlaceholderController
+from modules.stub_server import StubServer, StubServerConfig
+
+
+@pytest.mark.framework
+def test_generated_client(monkeypatch):
+    """
+    The generated client should send every endpoint with its path parameters, query and pagination, and the
+    stand-in server should answer a negative page as the first one and a negative limit or a page past the end
+    with an empty list.
+    """
+    config = StubServerConfig(users=3, posts_per_user=4, comments_per_post=5)
+    with StubServer(config) as server:
+        monkeypatch.setenv("JSONPLACEHOLDER_BASE_URL", server.base_url)
+        client = JSONPlaceholderClient()
+
+        assert [user["id"] for user in client.get_users().json()] == [1, 2, 3]
+        posts = client.get_user_posts(user_id=2).json()
+        assert len(posts) == 4 and {post["userId"] for post in posts} == {2}
+        assert client.get_user_posts(user_id=2, page=2, limit=3).json() == posts[3:]
+        comments = client.get_post_comments(post_id=posts[0]["id"], limit=2)
+        assert comments.status_code == 200
+        assert [comment["postId"] for comment in comments.json()] == [posts[0]["id"]] * 2
+        assert client.get_post_comments(post_id=1, page=-1, limit=2).json() == \
+            client.get_post_comments(post_id=1, page=1, limit=2).json()
+        for page, limit in ((1, -5), (9, 2)):
+            response = client.get_post_comments(post_id=1, page=page, limit=limit)
+            assert (response.status_code, response.json()) == (200, [])
+
+
+@pytest.mark.framework
+def test_controller_keeps_missing_parameters_permissive(monkeypatch):
+    """
+    The controller should send a missing path or query parameter as None and ignore the parameters of other
+    endpoints (the API answers and the test asserts on it), while the generated client refuses both.
+    """
+    with StubServer(StubServerConfig(users=2, posts_per_user=2, comments_per_post=2)) as server:
+        monkeypatch.setenv("JSONPLACEHOLDER_BASE_URL", server.base_url)
+        controller = JSONPlaceholderController()
+
+        missing = controller.jsonplaceholder_request_controller("GET_USER_POSTS")
+        assert missing.url.endswith("/users/None/posts") and (missing.status_code, missing.json()) == (200, [])
+        missing = controller.jsonplaceholder_request_controller("GET_COMMENTS", user_id=1)
+        assert missing.url.endswith("/comments?postId=None") and (missing.status_code, missing.json()) == (200, [])
+        assert len(controller.jsonplaceholder_request_controller("GET_COMMENTS", post_id=1, user_id=1).json()) == 2
+        with pytest.raises(ValueError, match="Invalid key: GET_ALBUMS"):
+            controller.jsonplaceholder_request_controller("GET_ALBUMS")
+
+        with pytest.raises(ValueError, match=r"Missing parameters for GET_USER_POSTS: \['user_id'\]"):
+            JSONPlaceholderClient().get_user_posts()
+        with pytest.raises(ValueError, match=r"Unknown parameters for GET_COMMENTS: \['user_id'\]"):
+            JSONPlaceholderClient().get_post_comments(post_id=1, user_id=1)
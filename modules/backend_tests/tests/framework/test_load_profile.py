@@ -0,0 +1,29 @@
+import pytest
+
+from core.load_generator import CONCURRENCY_MODE, RATE_MODE, LoadProfile, ShardedLoadGenerator
+
+
+@pytest.mark.framework
+@pytest.mark.parametrize("rate", [0, -5.0, float("nan")])
+def test_rate_mode_needs_a_rate(rate):
+    """
+    An open loop profile without a positive rate (e.g. LOAD_TEST_RATE=0) should be refused with a clear error,
+    not fail later dividing by the rate.
+    """
+    with pytest.raises(ValueError, match="needs a rate above 0 requests/s"):
+        LoadProfile(mode=RATE_MODE, rate=rate)
+    LoadProfile(mode=CONCURRENCY_MODE, rate=rate)  # the closed loop does not use the rate
+
+
+@pytest.mark.framework
+def test_sharded_profiles_interleave():
+    """
+    The shards should split the rate and be shifted by one arrival each, so together they keep the rate.
+    """
+    generator = ShardedLoadGenerator(["target"], LoadProfile(rate=40, concurrency=5, max_requests=10), processes=4)
+    shards = generator.shard_profiles()
+
+    assert [shard.rate for shard in shards] == [10] * 4
+    assert [shard.phase_s for shard in shards] == [0, 0.025, 0.05, 0.075]
+    assert [shard.concurrency for shard in shards] == [2, 1, 1, 1]
+    assert sum(shard.max_requests for shard in shards) == 10
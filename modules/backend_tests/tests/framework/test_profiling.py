@@ -0,0 +1,81 @@
+import json
+import os
+import pstats
+import pytest
+
+from core.profiling import SPEEDSCOPE_SCHEMA, TestProfiler, hotspots_table, load_hotspots
+
+HELD = []
+
+
+def fibonacci(n: int) -> int:
+    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def profiled_work():
+    HELD.append([bytearray(1024) for _ in range(256)])  # about 256 KiB still held at the end of the test
+    return fibonacci(18)
+
+
+def profile_once(output_dir: str, test_id: str) -> TestProfiler:
+    profiler = TestProfiler(output_dir)
+    with profiler.profile(test_id):
+        profiled_work()
+    return profiler
+
+
+@pytest.mark.framework
+def test_profile_reports(tmp_path):
+    """
+    A profiled test should leave a pstats dump, a speedscope flame graph matching the file format (every sample
+    a stack of known frames, one weight per sample) and a text report naming the hot function and allocation site.
+    """
+    HELD.clear()
+    profile_once(str(tmp_path), "tests/test_profiled.py::test_work[Samantha]")
+    base = str(tmp_path / "tests_test_profiled.py_test_work_Samantha")
+
+    stats = pstats.Stats(f"{base}.prof")
+    assert any(name == "fibonacci" for _, _, name in stats.stats)
+
+    with open(f"{base}.speedscope.json", encoding="utf-8") as speedscope:
+        flame_graph = json.load(speedscope)
+    assert flame_graph["$schema"] == SPEEDSCOPE_SCHEMA
+    frames = flame_graph["shared"]["frames"]
+    assert all({"name", "file", "line"} <= set(frame) for frame in frames)
+    (profile,) = flame_graph["profiles"]
+    assert profile["type"] == "sampled" and profile["unit"] == "seconds"
+    assert profile["samples"] and len(profile["samples"]) == len(profile["weights"])
+    assert all(0 <= index < len(frames) for stack in profile["samples"] for index in stack)
+    assert all(weight > 0 for weight in profile["weights"])
+    assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+    assert any(frames[stack[-1]]["name"].startswith("fibonacci") for stack in profile["samples"])
+
+    with open(f"{base}.txt", encoding="utf-8") as report:
+        text = report.read()
+    assert "fibonacci" in text and "test_profiling.py" in text.split("Top allocation sites")[1]
+
+
+@pytest.mark.framework
+def test_hotspots_merged_across_processes(tmp_path):
+    """
+    The hot spots saved by each process (one file per xdist worker) should be added up in the session summary.
+    """
+    HELD.clear()
+    output_dir = str(tmp_path)
+    first = profile_once(output_dir, "test_first")
+    first.save_hotspots()
+    os.replace(os.path.join(output_dir, f"hotspots-{os.getpid()}.json"), os.path.join(output_dir, "hotspots-1.json"))
+    second = profile_once(output_dir, "test_second")
+    second.save_hotspots()
+
+    hotspots = load_hotspots(output_dir)
+    label = next(label for label in hotspots["functions"] if label.startswith("fibonacci"))
+    calls, own_s, _, tests = hotspots["functions"][label]
+    assert calls == first.functions[label][0] + second.functions[label][0]
+    assert tests == 2
+    assert own_s == pytest.approx(first.functions[label][1] + second.functions[label][1])
+    assert sum(tests for _, _, tests in hotspots["allocations"].values()) >= 2
+
+    table = hotspots_table(hotspots, top=5)
+    pytest.logger.info("Merged hot spots:\n%s", table)
+    assert label in table and "allocation site" in table
@@ -0,0 +1,68 @@
+import pytest
+import random
+
+from core.load_generator import LoadResult
+from core.performance_history import PerformanceHistory
+
+BASELINE_RUNS = 5
+REQUESTS = 2000
+
+
+def synthetic_result(rng: random.Random, median_ms: float) -> LoadResult:
+    """
+    Load result with log-normal latencies (the usual shape of response times) around `median_ms`.
+    """
+    result = LoadResult(elapsed_s=REQUESTS / 100)
+    for index in range(REQUESTS):
+        latency_us = int(rng.lognormvariate(0, 0.3) * median_ms * 1000)
+        result.record(f"endpoint_{index % 2}", latency_us, latency_us)
+    return result
+
+
+@pytest.mark.framework
+def test_regression_gate(tmp_path, monkeypatch):
+    """
+    The gate should stay quiet for a run drawn from the baseline distribution and fail a run whose latencies
+    shifted up by 20%.
+    """
+    rng = random.Random(1)
+    history = PerformanceHistory(str(tmp_path / "history.jsonl"))
+    for run in range(BASELINE_RUNS):
+        monkeypatch.setenv("PYTEST_RUN_ID", f"baseline-{run}")
+        assert not history.record("load_test", synthetic_result(rng, 50)).regressions
+
+    monkeypatch.setenv("PYTEST_RUN_ID", "unchanged")
+    unchanged = history.record("load_test", synthetic_result(rng, 50))
+    monkeypatch.setenv("PYTEST_RUN_ID", "slower")
+    slower = history.record("load_test", synthetic_result(rng, 60))
+
+    pytest.logger.info("Unchanged run:\n%s\nSlower run:\n%s", unchanged.report(), slower.report())
+    assert unchanged.baseline_runs == BASELINE_RUNS and not unchanged.regressions
+    assert {comparison.endpoint for comparison in slower.regressions} == {"endpoint_0", "endpoint_1", "TOTAL"}
+    assert len(slower.trend) == BASELINE_RUNS + 2, "The trend should cover the rolling baseline and the run"
+
+
+@pytest.mark.framework
+def test_regression_gate_excludes_failed_runs(tmp_path, monkeypatch):
+    """
+    Runs that regressed or failed requests should stay out of the baseline: the same slowdown repeated run after
+    run keeps failing instead of being absorbed by the rolling baseline.
+    """
+    rng = random.Random(2)
+    history = PerformanceHistory(str(tmp_path / "history.jsonl"), baseline_runs=BASELINE_RUNS)
+    for run in range(BASELINE_RUNS):
+        monkeypatch.setenv("PYTEST_RUN_ID", f"baseline-{run}")
+        history.record("load_test", synthetic_result(rng, 50))
+
+    monkeypatch.setenv("PYTEST_RUN_ID", "errors")
+    with_errors = synthetic_result(rng, 50)
+    with_errors.record("endpoint_0", 50_000, 50_000, error="HTTP 500")
+    history.record("load_test", with_errors)
+    for run in range(BASELINE_RUNS):
+        monkeypatch.setenv("PYTEST_RUN_ID", f"slower-{run}")
+        slower = history.record("load_test", synthetic_result(rng, 60))
+        assert slower.regressions, f"Slow run {run} should still be compared to the fast runs:\n{slower.report()}"
+
+    entries = history.load("load_test")
+    assert [entry["baseline"] for entry in entries] == [True] * BASELINE_RUNS + [False] * (BASELINE_RUNS + 1)
+    assert not any(run["baseline"] for run in slower.trend)
@@ -0,0 +1,68 @@
+import pytest
+import subprocess
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+from core import ROOT_WORKING_DIRECTORY
+from core.rate_limiter import RateLimiter
+
+RATE = 20
+TOKENS_PER_PROCESS = 20
+
+DRAW_TOKENS = """
+import sys
+import time
+from core.rate_limiter import SharedTokenBucket
+
+bucket = SharedTokenBucket(sys.argv[1], rate=float(sys.argv[2]), burst=1)
+for _ in range(int(sys.argv[3])):
+    bucket.wait()
+    print(time.time(), flush=True)
+"""
+
+
+@pytest.mark.framework
+def test_shared_token_bucket_caps_the_run_rate():
+    """
+    Two processes drawing from the bucket of the same host (like two xdist workers of a run) should be held to
+    `rate` requests/s together, not each.
+    """
+    host = f"bucket-{uuid.uuid4().hex}.test"
+    processes = [subprocess.Popen([sys.executable, "-c", DRAW_TOKENS, host, str(RATE), str(TOKENS_PER_PROCESS)],
+                                  cwd=ROOT_WORKING_DIRECTORY, stdout=subprocess.PIPE, text=True)
+                 for _ in range(2)]
+    sent = []
+    for process in processes:
+        output, _ = process.communicate(timeout=60)
+        assert process.returncode == 0
+        sent.append([float(line) for line in output.split()])
+
+    times = sorted(sent[0] + sent[1])
+    rate = (len(times) - 1) / (times[-1] - times[0])
+    pytest.logger.info("%d tokens drawn by 2 processes at %.1f/s for a %d/s bucket", len(times), rate, RATE)
+    assert [len(process_times) for process_times in sent] == [TOKENS_PER_PROCESS] * 2
+    assert RATE / 2 < rate <= RATE * 1.1, "Both processes together should stay near the bucket's rate"
+
+
+@pytest.mark.framework
+def test_retry_after_blocks_every_limiter_of_the_host():
+    """
+    A `Retry-After` received by one limiter should hold the requests of another limiter (another worker) to the
+    same host, and only that host.
+    """
+    url = f"http://blocked-{uuid.uuid4().hex}.test/comments"
+    throttling, other = RateLimiter(max_retries=1), RateLimiter()
+    with throttling.slot(url) as started:
+        throttled = SimpleNamespace(status_code=429, headers={"Retry-After": "0.3"})
+    assert throttling.on_response(url, throttled, started, attempt=0) == 0.3
+
+    start_time = time.perf_counter()
+    with other.slot(url):
+        waited_s = time.perf_counter() - start_time
+    with other.slot(f"http://other-{uuid.uuid4().hex}.test/comments"):
+        pass
+
+    assert waited_s >= 0.25 and other.stats.waited_s >= 0.25
+    assert other.stats.requests == 2 and other.stats.waited_s < 0.3 + 0.25, "Other hosts should not wait"
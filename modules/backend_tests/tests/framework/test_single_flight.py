@@ -0,0 +1,107 @@
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.request_timing import add_timing_observer, remove_timing_observer
+from core.single_flight import SingleFlight
+from modules.backend_tests.general.helper.helper_user_comments import HelperUserComments
+from modules.stub_server import StubServer, StubServerConfig
+
+CALLERS = 40
+POSTS = 5
+
+
+@pytest.mark.framework
+def test_single_flight_fan_out(monkeypatch):
+    """
+    Many threads asking for the comments of the same few posts at the same moment should send one request per
+    post and share its decoded result, and later calls should be answered from the memo.
+    """
+    single_flight = SingleFlight(ttl_s=60)
+    sent = []
+    config = StubServerConfig(users=1, posts_per_user=POSTS, comments_per_post=20, latency_ms=100)
+    with StubServer(config) as server:
+        monkeypatch.setenv("JSONPLACEHOLDER_BASE_URL", server.base_url)
+        helper = HelperUserComments(single_flight)
+        barrier = threading.Barrier(CALLERS)
+
+        def fetch(index):
+            barrier.wait()
+            return index % POSTS + 1, helper.get_post_comments(index % POSTS + 1)
+
+        add_timing_observer(sent.append)
+        try:
+            with ThreadPoolExecutor(CALLERS) as executor:
+                results = list(executor.map(fetch, range(CALLERS)))
+            coalesced = single_flight.stats.coalesced
+            memoized = helper.get_post_comments(1)
+        finally:
+            remove_timing_observer(sent.append)
+
+    pytest.logger.info("Fan-out of %d callers over %d posts: %s", CALLERS, POSTS, single_flight.stats.summary())
+    assert len(sent) == single_flight.stats.misses == POSTS
+    assert coalesced == CALLERS - POSTS
+    assert single_flight.stats.hits == 1
+    by_post = {}
+    for post_id, comments in results:
+        assert by_post.setdefault(post_id, comments) is comments, "Coalesced callers should share one result"
+    assert memoized is by_post[1]
+
+
+@pytest.mark.framework
+def test_single_flight_memo_ttl_and_lru():
+    """
+    The memo should keep at most `max_entries` keys (least recently used evicted first) for `ttl_s` seconds.
+    """
+    single_flight = SingleFlight(ttl_s=0.2, max_entries=2)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key.upper()
+
+    assert [single_flight.do(key, compute(key)) for key in ("a", "a", "b", "a", "c")] == list("AABAC")
+    assert calls == ["a", "b", "c"]  # "b" evicted by "c": "a" was used more recently
+    single_flight.do("b", compute("b"))
+    time.sleep(0.25)
+    single_flight.do("c", compute("c"))
+
+    assert calls == ["a", "b", "c", "b", "c"]
+    stats = single_flight.stats
+    assert (stats.misses, stats.hits, stats.evicted, stats.expired) == (5, 2, 2, 1)
+
+
+@pytest.mark.framework
+def test_single_flight_errors_are_shared_not_memoized():
+    """
+    Callers waiting on a call that fails should get its exception, and neither failures nor results rejected
+    by `memoize` should be memoized.
+    """
+    single_flight = SingleFlight(ttl_s=60)
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait()
+        raise ConnectionError("server went away")
+
+    def follower_joined() -> bool:
+        with single_flight._lock:
+            return "key" in single_flight._in_flight and single_flight.stats.coalesced == 1
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(single_flight.do, "key", failing)
+        started.wait()
+        follower = executor.submit(single_flight.do, "key", lambda: "not called")
+        deadline = time.monotonic() + 5
+        while not follower_joined():  # the failure is only released once the follower waits on the call
+            assert time.monotonic() < deadline, "The follower should join the call in flight"
+            time.sleep(0.001)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ConnectionError):
+                future.result()
+
+    assert single_flight.do("key", lambda: (404, None), memoize=lambda result: result[0] < 400) == (404, None)
+    assert len(single_flight) == 0
+    assert (single_flight.stats.misses, single_flight.stats.coalesced) == (2, 1)
@@ -0,0 +1,28 @@
+import pytest
+
+from core.request_timing import add_timing_observer, remove_timing_observer
+from modules.backend_tests.general.helper.helper_user_comments import HelperUserComments
+from modules.stub_server import StubServer, StubServerConfig
+
+
+@pytest.mark.framework
+def test_user_directory_expected_status(monkeypatch):
+    """
+    The indexed `/users` should only answer the default expected status: any other one sends the request again
+    and checks its status code.
+    """
+    sent = []
+    with StubServer(StubServerConfig(users=3)) as server:
+        monkeypatch.setenv("JSONPLACEHOLDER_BASE_URL", server.base_url)
+        helper = HelperUserComments()
+        add_timing_observer(sent.append)
+        try:
+            first = helper.get_user(username="Samantha")
+            assert helper.get_user(username="Samantha") is first
+            assert len(sent) == 1, "The second lookup should be answered from the index"
+            with pytest.raises(AssertionError, match="Expected status code 404"):
+                helper.get_user(expected_status_code=404, username="Samantha")
+        finally:
+            remove_timing_observer(sent.append)
+
+    assert len(sent) == 2
@@ -0,0 +1,171 @@
+import json
+import pytest
+from types import SimpleNamespace
+
+from core.constants import ROOT_WORKING_DIRECTORY, TEST_DURATION_DEFAULT_S
+from core.xdist_scheduler import DurationAwareScheduling, data_key
+
+SAMANTHA = "tests/test_comments.py::test_structure[Samantha]"
+SAMANTHA_VALUES = "tests/test_comments.py::test_values[Samantha]"
+BRET = "tests/test_comments.py::test_structure[Bret]"
+BRET_VALUES = "tests/test_comments.py::test_values[Bret]"
+UNPARAMETRIZED = "tests/test_users.py::test_users"
+
+SCHEDULER_CONFTEST = """
+from core.xdist_scheduler import DurationAwareScheduling
+
+
+def pytest_addoption(parser):
+    parser.addoption("--duration-schedule", action="store_true", default=False)
+
+
+def pytest_xdist_make_scheduler(config, log):
+    if config.getoption("--duration-schedule"):
+        config.duration_scheduler = DurationAwareScheduling(config, log)
+        return config.duration_scheduler
+
+
+def pytest_sessionfinish(session):
+    scheduler = getattr(session.config, "duration_scheduler", None)
+    if scheduler:
+        scheduler.save_durations()
+"""
+
+SCHEDULED_TESTS = """
+import pytest
+import time
+
+
+@pytest.mark.parametrize("username", ["Samantha", "Bret"])
+def test_structure(username):
+    time.sleep(0.05)
+
+
+@pytest.mark.parametrize("username", ["Samantha", "Bret"])
+def test_values(username):
+    time.sleep(0.05)
+"""
+
+
+def scheduler(tmp_path, durations: dict) -> DurationAwareScheduling:
+    """
+    Scheduler of a two worker run, reading `durations` as the durations of the previous runs.
+    """
+    durations_file = tmp_path / "durations.json"
+    durations_file.write_text(json.dumps(durations))
+    config = SimpleNamespace(getvalue=lambda name: ["2*popen"] if name == "tx" else None)
+    return DurationAwareScheduling(config, durations_file=str(durations_file))
+
+
+def units(workqueue) -> list:
+    return [list(nodeids) for nodeids in workqueue.values()]
+
+
+class FakeNode:
+    """
+    Worker as seen by the scheduler: records the test indexes it is sent.
+    """
+
+    def __init__(self, worker_id: str):
+        self.gateway = SimpleNamespace(id=worker_id)
+        self.shutting_down = False
+        self.sent = []
+
+    def send_runtest_some(self, indexes):
+        self.sent.append(list(indexes))
+
+    def shutdown(self):
+        pass
+
+
+@pytest.mark.framework
+def test_data_key():
+    """
+    Tests parametrized with the same values should share a data key, other tests only share it with themselves.
+    """
+    assert data_key(SAMANTHA) == data_key(SAMANTHA_VALUES) == "[Samantha]"
+    assert data_key(BRET) != data_key(SAMANTHA)
+    assert data_key(UNPARAMETRIZED) == UNPARAMETRIZED
+
+
+@pytest.mark.framework
+def test_build_units_groups_by_data_key(tmp_path):
+    """
+    Tests sharing a data key should form one work unit, handed out longest first.
+    """
+    durations = {SAMANTHA: 1, SAMANTHA_VALUES: 1, BRET: 1.5, BRET_VALUES: 1, UNPARAMETRIZED: 0.5}
+    duration_scheduler = scheduler(tmp_path, durations)
+    workqueue = duration_scheduler.build_units([SAMANTHA, BRET, UNPARAMETRIZED, SAMANTHA_VALUES, BRET_VALUES], 2)
+
+    assert units(workqueue) == [[BRET, BRET_VALUES], [SAMANTHA, SAMANTHA_VALUES], [UNPARAMETRIZED]]
+    assert duration_scheduler._split_scope(SAMANTHA) == duration_scheduler._split_scope(SAMANTHA_VALUES)
+    assert duration_scheduler._split_scope(BRET) != duration_scheduler._split_scope(SAMANTHA)
+
+
+@pytest.mark.framework
+def test_build_units_splits_hot_data_keys(tmp_path):
+    """
+    A data key longer than an even share of the run (total / workers) should be split into chunks of about
+    that size, so it cannot set the end of the run on its own.
+    """
+    durations = {SAMANTHA: 4, SAMANTHA_VALUES: 3, BRET: 1, BRET_VALUES: 1, UNPARAMETRIZED: 1}
+    workqueue = scheduler(tmp_path, durations).build_units(
+        [SAMANTHA, SAMANTHA_VALUES, BRET, BRET_VALUES, UNPARAMETRIZED], 2)
+
+    assert units(workqueue) == [[SAMANTHA], [SAMANTHA_VALUES], [BRET, BRET_VALUES], [UNPARAMETRIZED]]
+
+
+@pytest.mark.framework
+def test_unknown_tests_estimated_at_median(tmp_path):
+    """
+    A test never run before should be estimated at the median known duration (the default without any).
+    """
+    assert scheduler(tmp_path, {SAMANTHA: 1, BRET: 3, UNPARAMETRIZED: 10}).estimate(BRET_VALUES) == 3
+    assert scheduler(tmp_path, {}).estimate(BRET_VALUES) == TEST_DURATION_DEFAULT_S
+
+    workqueue = scheduler(tmp_path, {SAMANTHA: 1, BRET: 3, UNPARAMETRIZED: 10}).build_units(
+        [SAMANTHA, SAMANTHA_VALUES, BRET, UNPARAMETRIZED], 2)
+    assert units(workqueue) == [[UNPARAMETRIZED], [SAMANTHA, SAMANTHA_VALUES], [BRET]]
+
+
+@pytest.mark.framework
+def test_schedule_hands_out_longest_first(tmp_path):
+    """
+    xdist's own `schedule` should hand out the units longest first by duration, not by number of tests.
+    """
+    collection = [SAMANTHA, SAMANTHA_VALUES, BRET, BRET_VALUES, UNPARAMETRIZED]
+    duration_scheduler = scheduler(tmp_path, {SAMANTHA: 1, SAMANTHA_VALUES: 1, BRET: 1, BRET_VALUES: 1,
+                                              UNPARAMETRIZED: 3})
+    nodes = [FakeNode("gw0"), FakeNode("gw1")]
+    for node in nodes:
+        duration_scheduler.add_node(node)
+    for node in nodes:
+        duration_scheduler.add_node_collection(node, collection)
+    duration_scheduler.schedule()
+
+    assert nodes[0].sent[0] == [collection.index(UNPARAMETRIZED)]
+    assert nodes[1].sent[0] == [collection.index(SAMANTHA), collection.index(SAMANTHA_VALUES)]
+    assert sorted(index for node in nodes for indexes in node.sent for index in indexes) == list(range(5))
+
+
+@pytest.mark.framework
+def test_duration_schedule_run(pytester, monkeypatch, tmp_path):
+    """
+    A `-n 2 --duration-schedule` run should run every test and store its duration, smoothed with the previous one.
+    """
+    pytest.importorskip("xdist")
+    durations_file = tmp_path / "durations.json"
+    previous_nodeid = "test_scheduled.py::test_structure[Samantha]"
+    durations_file.write_text(json.dumps({previous_nodeid: 10.0}))
+    monkeypatch.setenv("TEST_DURATIONS_FILE", str(durations_file))
+    monkeypatch.setenv("PYTHONPATH", ROOT_WORKING_DIRECTORY)
+    pytester.makeconftest(SCHEDULER_CONFTEST)
+    pytester.makepyfile(test_scheduled=SCHEDULED_TESTS)
+
+    result = pytester.runpytest_subprocess("-n", "2", "--duration-schedule", "-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=4)
+    durations = json.loads(durations_file.read_text())
+    assert len(durations) == 4
+    assert 5.0 < durations[previous_nodeid] < 5.5, "Half the last duration plus half the previous one"
+    assert all(0.05 <= duration < 1 for nodeid, duration in durations.items() if nodeid != previous_nodeid)
@@ -25,11 +25,9 @@ def test_get_comments_for_valid_posts(user_comments_helper, test_case, username)
     user_data = user_comments_helper.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
+    post_ids = [post["id"] for post in user_data["posts"]]
+    for post_id, comments in user_comments_helper.get_comments_for_posts(post_ids).items():
         assert comments, f"Expected comments for post {post_id}, but got an empty response."
         assert isinstance(comments, list), f"Response body for post {post_id} is not a JSON array."
 
-        pytest.logger.info(f"Post {post_id} returned {len(comments)} comments.")
+        pytest.logger.info("Post %s returned %d comments.", post_id, len(comments))
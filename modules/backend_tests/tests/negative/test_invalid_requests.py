@@ -12,17 +12,17 @@ def test_get_comments_for_invalid_post_id(user_comments_helper, test_case, post_
     """
     comments = user_comments_helper.get_post_comments(post_id)
     assert comments == [], f"Expected empty list for postId {post_id}, but got: {comments}"
-    pytest.logger.info(f"Invalid postId '{post_id}' correctly returned an empty list.")
+    pytest.logger.info("Invalid postId '%s' correctly returned an empty list.", post_id)
 
 
 @pytest.mark.negative
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_unexpected_status_codes(user_comments_helper, test_case, username):
+def test_unexpected_status_codes(user_comments_helper, user_comments_dataset, test_case, username):
     """
     Verify that the API does not return unexpected HTTP status codes.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
     for post in user_data["posts"]:
@@ -33,17 +33,17 @@ def test_unexpected_status_codes(user_comments_helper, test_case, username):
 
         assert response.status_code == HTTPStatusCodes.OK.value, f"Unexpected status code {response.status_code} for post {post_id}"
 
-        pytest.logger.info(f"Post {post_id} returned expected status code 200.")
+        pytest.logger.info("Post %s returned expected status code 200.", post_id)
 
 
 @pytest.mark.negative
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_unexpected_server_errors(user_comments_helper, test_case, username):
+def test_unexpected_server_errors(user_comments_helper, user_comments_dataset, test_case, username):
     """
     Verify that the API does not return unexpected 5XX errors or rate limits (429).
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
     for post in user_data["posts"]:
@@ -58,4 +58,4 @@ def test_unexpected_server_errors(user_comments_helper, test_case, username):
             HTTPStatusCodes.SERVICE_UNAVAILABLE.value}, \
             f"Unexpected server error {response.status_code} for post {post_id}"
 
-        pytest.logger.info(f"Post {post_id} did not trigger any unexpected server errors.")
+        pytest.logger.info("Post %s did not trigger any unexpected server errors.", post_id)
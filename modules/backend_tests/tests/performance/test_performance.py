@@ -1,12 +1,18 @@
 import pytest
-import time
+from collections import Counter
 
+from modules.backend_tests.general.request_builder_user_comments import jsonplaceholder_load_targets
 from modules.backend_tests.tests.test_data.test_user_comments_data import VALID_USERS
-from core import RESPONSE_TIME_MS, MINIMAL_TOTAL_COMMENTS
+from core import (RESPONSE_TIME_MS, MINIMAL_TOTAL_COMMENTS, LOAD_TEST_RATE, LOAD_TEST_CONCURRENCY, LOAD_TEST_DURATION_S,
+                  LOAD_TEST_RAMP_UP_S, LOAD_TEST_PROCESSES, LOAD_TEST_MIN_THROUGHPUT_RATIO, LOAD_TEST_MIN_THROUGHPUT,
+                  LOAD_TEST_MAX_ERROR_RATE, SOAK_DURATION_S)
+from core.load_generator import LoadGenerator, ShardedLoadGenerator, LoadProfile, RATE_MODE, CONCURRENCY_MODE
+from core.soak import SoakRunner
 
 
 @pytest.mark.performance
 @pytest.mark.regression
+@pytest.mark.no_http_cache
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
 def test_large_api_response(user_comments_helper, test_case, username):
     """
@@ -15,33 +21,121 @@ def test_large_api_response(user_comments_helper, test_case, username):
     user_data = user_comments_helper.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    total_comments = 0
+    # comments are streamed and counted one by one, so memory stays flat whatever the response size
+    comments_per_post = Counter()
     for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
-        total_comments += len(comments)
+        comments_per_post.update(comment["postId"] for comment in user_comments_helper.iter_post_comments(post["id"]))
 
+    total_comments = sum(comments_per_post.values())
     assert total_comments > MINIMAL_TOTAL_COMMENTS, \
         f"Expected more comments in large response, but got only {total_comments}"
-    pytest.logger.info(f"Total comments retrieved across posts: {total_comments}")
+    assert set(comments_per_post) <= {post["id"] for post in user_data["posts"]}, \
+        "Comments were returned for posts that were not requested"
+    pytest.logger.info("Total comments retrieved across posts: %d", total_comments)
 
 
 @pytest.mark.smoke
 @pytest.mark.performance
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_api_response_time(user_comments_helper, test_case, username):
+def test_api_response_time(user_comments_dataset, performance_baseline, test_case, username):
     """
-    Measure API response time for all posts of the user.
+    Drive the user's endpoints at a constant arrival rate (open loop) and check latency percentiles and throughput.
+    Latency is measured from the intended start of each request, so time spent queued behind slow requests counts.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        start_time = time.time()
-        _ = user_comments_helper.get_post_comments(post_id)
-        response_time = (time.time() - start_time) * 1000  # convert to ms
-        assert response_time < RESPONSE_TIME_MS, f"API response time too slow for post {post_id}: {response_time:.2f}ms"
-        pytest.logger.info(f"API response time for post {post_id}: {response_time:.2f}ms")
+    targets = jsonplaceholder_load_targets(user_data["user"]["id"], [post["id"] for post in user_data["posts"]])
+    profile = LoadProfile(mode=RATE_MODE, rate=LOAD_TEST_RATE, concurrency=LOAD_TEST_CONCURRENCY,
+                          duration_s=LOAD_TEST_DURATION_S, ramp_up_s=LOAD_TEST_RAMP_UP_S)
+    result = LoadGenerator(targets, profile).run()
+    pytest.logger.info("Open loop load test at %s req/s for user %s:\n%s", LOAD_TEST_RATE, username, result.report())
+    comparison = performance_baseline(result)
+    pytest.logger.info("Against the performance baseline:\n%s", comparison.report())
+
+    assert result.error_rate <= LOAD_TEST_MAX_ERROR_RATE, f"Too many failed requests: {dict(result.errors)}"
+    assert not comparison.regressions, f"Significant latency regression against the baseline:\n{comparison.report()}"
+    p99_ms = result.histogram.value_at_percentile(99) / 1000
+    assert p99_ms < RESPONSE_TIME_MS, f"API p99 response time too slow: {p99_ms:.2f}ms"
+    min_throughput = profile.offered_rate * LOAD_TEST_MIN_THROUGHPUT_RATIO
+    assert result.throughput >= min_throughput, \
+        f"API could not keep up with the arrival rate: {result.throughput:.2f} < {min_throughput:.2f} req/s"
+
+
+@pytest.mark.performance
+@pytest.mark.regression
+@pytest.mark.parametrize("test_case, username", VALID_USERS)
+def test_api_throughput_fixed_concurrency(user_comments_dataset, performance_baseline, test_case, username):
+    """
+    Send the user's requests back to back from a fixed number of workers (closed loop)
+    and check the throughput and latency percentiles.
+    """
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
+    assert "posts" in user_data, "User has no posts."
+
+    targets = jsonplaceholder_load_targets(user_data["user"]["id"], [post["id"] for post in user_data["posts"]])
+    profile = LoadProfile(mode=CONCURRENCY_MODE, concurrency=LOAD_TEST_CONCURRENCY,
+                          duration_s=LOAD_TEST_DURATION_S, ramp_up_s=LOAD_TEST_RAMP_UP_S)
+    result = LoadGenerator(targets, profile).run()
+    pytest.logger.info("Closed loop load test with %d workers for user %s:\n%s", LOAD_TEST_CONCURRENCY, username,
+                       result.report())
+    comparison = performance_baseline(result)
+    pytest.logger.info("Against the performance baseline:\n%s", comparison.report())
+
+    assert result.error_rate <= LOAD_TEST_MAX_ERROR_RATE, f"Too many failed requests: {dict(result.errors)}"
+    assert not comparison.regressions, f"Significant latency regression against the baseline:\n{comparison.report()}"
+    p99_ms = result.histogram.value_at_percentile(99) / 1000
+    assert p99_ms < RESPONSE_TIME_MS, f"API p99 response time too slow: {p99_ms:.2f}ms"
+    assert result.throughput >= LOAD_TEST_MIN_THROUGHPUT, \
+        f"API throughput too low: {result.throughput:.2f} < {LOAD_TEST_MIN_THROUGHPUT} req/s"
+
+
+@pytest.mark.performance
+@pytest.mark.regression
+@pytest.mark.parametrize("test_case, username", VALID_USERS)
+def test_api_response_time_multi_process(user_comments_dataset, performance_baseline, test_case, username):
+    """
+    Same open loop load as `test_api_response_time`, generated by several load worker processes.
+    The shard histograms are merged exactly, so the percentiles cover every request of every process.
+    """
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
+    assert "posts" in user_data, "User has no posts."
+
+    targets = jsonplaceholder_load_targets(user_data["user"]["id"], [post["id"] for post in user_data["posts"]])
+    profile = LoadProfile(mode=RATE_MODE, rate=LOAD_TEST_RATE, concurrency=LOAD_TEST_CONCURRENCY,
+                          duration_s=LOAD_TEST_DURATION_S, ramp_up_s=LOAD_TEST_RAMP_UP_S)
+    result = ShardedLoadGenerator(targets, profile, processes=LOAD_TEST_PROCESSES).run()
+    pytest.logger.info("Open loop load test at %s req/s from %d processes for user %s:\n%s", LOAD_TEST_RATE,
+                       LOAD_TEST_PROCESSES, username, result.report())
+    comparison = performance_baseline(result)
+    pytest.logger.info("Against the performance baseline:\n%s", comparison.report())
+
+    assert result.error_rate <= LOAD_TEST_MAX_ERROR_RATE, f"Too many failed requests: {dict(result.errors)}"
+    assert not comparison.regressions, f"Significant latency regression against the baseline:\n{comparison.report()}"
+    p99_ms = result.histogram.value_at_percentile(99) / 1000
+    assert p99_ms < RESPONSE_TIME_MS, f"API p99 response time too slow: {p99_ms:.2f}ms"
+    min_throughput = profile.offered_rate * LOAD_TEST_MIN_THROUGHPUT_RATIO
+    assert result.throughput >= min_throughput, \
+        f"API could not keep up with the arrival rate: {result.throughput:.2f} < {min_throughput:.2f} req/s"
+
+
+@pytest.mark.soak
+@pytest.mark.performance
+@pytest.mark.skipif(not SOAK_DURATION_S, reason="Soak runs are opt-in: set SOAK_DURATION_S")
+@pytest.mark.parametrize("test_case, username", VALID_USERS)
+def test_api_soak(user_comments_dataset, test_case, username):
+    """
+    Drive the user's endpoints for SOAK_DURATION_S at a constant arrival rate and check that neither the p99
+    latency nor the client memory drifts over the run (windows sampled to output/soak/).
+    """
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
+    assert "posts" in user_data, "User has no posts."
+
+    targets = jsonplaceholder_load_targets(user_data["user"]["id"], [post["id"] for post in user_data["posts"]])
+    result = SoakRunner(targets, duration_s=SOAK_DURATION_S, name=username).run()
+    pytest.logger.info("Soak run of %.0fs for user %s:\n%s\n%s", SOAK_DURATION_S, username, result.load.report(),
+                       result.report())
+
+    assert result.load.error_rate <= LOAD_TEST_MAX_ERROR_RATE, f"Too many failed requests: {dict(result.load.errors)}"
+    assert not result.regressions, f"Drift over the soak run:\n{result.report()}"
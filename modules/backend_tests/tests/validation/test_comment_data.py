@@ -1,177 +1,148 @@
 import pytest
-import re
 
 from modules.backend_tests.tests.test_data.test_user_comments_data import VALID_USERS
-from core import COMMENT_STRUCTURE, EMAIL_REGEX
+from core.dedupe import DuplicateDetector
+from core.schema_validator import (COMMENT_VALIDATOR, format_violations, REQUIRED, TYPE, POSITIVE, NON_EMPTY,
+                                   PATTERN, MATCH, UNIQUE, EXTRA)
 
 
 @pytest.mark.smoke
 @pytest.mark.validation
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_validate_comment_structure(user_comments_helper, test_case, username):
+def test_validate_comment_structure(user_comments_dataset, test_case, username):
     """
     Verify that each comment contains the required fields, postId matches,
     and each field has the correct data type.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
+    post_ids = [post["id"] for post in user_data["posts"]]
+    for post_id, comments in user_comments_dataset.get_comments_for_posts(post_ids).items():
         assert comments, f"Expected comments for post {post_id}, but got an empty response."
 
-        seen_comment_ids = set()
-        for comment in comments:
-            for field, expected_type in COMMENT_STRUCTURE.items():
-                assert field in comment, f"Missing '{field}' field in comment {comment}"
-                assert isinstance(comment[field], expected_type), \
-                    (f"Field '{field}' in comment {comment} has incorrect type. Expected: {expected_type}, "
-                     f"Got: {type(comment[field])}")
-
-            assert comment["postId"] == post_id, f"postId mismatch in comment: {comment}"
-
-            assert comment["id"] not in seen_comment_ids, f"Duplicate comment ID found: {comment['id']}"
-            seen_comment_ids.add(comment["id"])
+        violations = [violation for violation in COMMENT_VALIDATOR.validate(comments, expected={"postId": post_id})
+                      if violation.rule in (REQUIRED, TYPE, MATCH, UNIQUE)]
+        assert not violations, f"Post {post_id} comments failed structure validation. {format_violations(violations)}"
 
-        pytest.logger.info(f"All comments for post {post_id} passed structure validation.")
+        pytest.logger.info("All comments for post %s passed structure validation.", post_id)
 
 
 @pytest.mark.smoke
 @pytest.mark.validation
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_validate_comment_values(user_comments_helper, test_case, username):
+def test_validate_comment_values(user_comments_dataset, test_case, username):
     """
     Verify that each comment has meaningful values:
     - `postId` should match the requested post.
     - `id` should be a positive integer.
     - `name`, `email`, and `body` should be non-empty strings.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
+    post_ids = [post["id"] for post in user_data["posts"]]
+    for post_id, comments in user_comments_dataset.get_comments_for_posts(post_ids).items():
         assert comments, f"Expected comments for post {post_id}, but got an empty response."
 
-        for comment in comments:
-            # postId is valid and matches
-            assert isinstance(comment["postId"], int), f"Invalid postId type: {comment['postId']}"
-            assert comment["postId"] == post_id, f"postId mismatch in comment: {comment}"
-
-            # id is a valid positive integer
-            assert isinstance(comment["id"], int), f"Invalid id type: {comment['id']}"
-            assert comment["id"] > 0, f"Comment id should be positive: {comment['id']}"
-
-            # name, email, and body are non-empty
-            assert isinstance(comment["name"], str) and comment["name"], f"Invalid name: {comment['name']}"
-            assert isinstance(comment["email"], str) and comment["email"], f"Invalid email: {comment['email']}"
-            assert isinstance(comment["body"], str) and comment["body"], f"Invalid body: {comment['body']}"
+        # postId matches, id is a positive integer, name, email and body are non-empty strings
+        violations = [violation for violation in COMMENT_VALIDATOR.validate(comments, expected={"postId": post_id})
+                      if violation.rule in (REQUIRED, TYPE, POSITIVE, NON_EMPTY, MATCH)]
+        assert not violations, f"Post {post_id} comments failed value validation. {format_violations(violations)}"
 
-        pytest.logger.info(f"All comments for post {post_id} passed value validation.")
+        pytest.logger.info("All comments for post %s passed value validation.", post_id)
 
 
 @pytest.mark.validation
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_comments_missing_required_fields(user_comments_helper, test_case, username):
+def test_comments_missing_required_fields(user_comments_dataset, test_case, username):
     """
     Verify that all comments returned contain required fields.
     If any required field is missing, the test should fail.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
+    post_ids = [post["id"] for post in user_data["posts"]]
+    for post_id, comments in user_comments_dataset.get_comments_for_posts(post_ids).items():
         assert comments, f"Expected comments for post {post_id}, but got an empty response."
 
-        for comment in comments:
-            missing_fields = [field for field in COMMENT_STRUCTURE if field not in comment]
-            assert not missing_fields, f"Comment {comment} is missing required fields: {missing_fields}"
+        violations = [violation for violation in COMMENT_VALIDATOR.validate(comments) if violation.rule == REQUIRED]
+        assert not violations, f"Post {post_id} comments are missing required fields. {format_violations(violations)}"
 
-        pytest.logger.info(f"All comments for post {post_id} contain required fields.")
+        pytest.logger.info("All comments for post %s contain required fields.", post_id)
 
 
 @pytest.mark.validation
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_comments_unexpected_extra_fields(user_comments_helper, test_case, username):
+def test_comments_unexpected_extra_fields(user_comments_dataset, test_case, username):
     """
     Verify that API does not return unexpected extra fields in comments.
     If extra fields appear, we log them as a warning.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
+    post_ids = [post["id"] for post in user_data["posts"]]
+    for post_id, comments in user_comments_dataset.get_comments_for_posts(post_ids).items():
         assert comments, f"Expected comments for post {post_id}, but got an empty response."
 
-        for comment in comments:
-            extra_fields = [field for field in comment if field not in COMMENT_STRUCTURE]
-            if extra_fields:
-                pytest.logger.warning(f"Comment {comment} contains unexpected fields: {extra_fields}")
+        for violation in COMMENT_VALIDATOR.validate(comments):
+            if violation.rule == EXTRA:
+                pytest.logger.warning("Comment %s contains %s", comments[violation.index], violation.message)
 
-        pytest.logger.info(f"Checked for unexpected fields in comments for post {post_id}.")
+        pytest.logger.info("Checked for unexpected fields in comments for post %s.", post_id)
 
 
 @pytest.mark.validation
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_validate_email_format_in_comments(user_comments_helper, test_case, username):
+def test_validate_email_format_in_comments(user_comments_dataset, test_case, username):
     """
     Verify that all emails in comments follow the proper format and have required content.
     """
 
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
+    post_ids = [post["id"] for post in user_data["posts"]]
+    for post_id, comments in user_comments_dataset.get_comments_for_posts(post_ids).items():
         if not comments:
             pytest.skip(f"Skipping test: No comments returned for post {post_id}")
 
-        for comment in comments:
-            assert re.match(EMAIL_REGEX, comment["email"]), f"Invalid email format: {comment['email']}"
-            assert comment["name"], f"Name should not be empty: {comment}"
-            assert comment["email"], f"Email should not be empty: {comment}"
-            assert comment["body"], f"Body should not be empty: {comment}"
+        # a missing or non string email (or name, body) fails too, not only a malformed one
+        violations = [violation for violation in COMMENT_VALIDATOR.validate(comments)
+                      if violation.rule in (PATTERN, NON_EMPTY)
+                      or violation.rule in (REQUIRED, TYPE) and violation.field in ("name", "email", "body")]
+        assert not violations, f"Post {post_id} comments have invalid emails or empty values. " \
+                               f"{format_violations(violations)}"
 
-        pytest.logger.info(f"All emails in comments for post {post_id} are valid.")
+        pytest.logger.info("All emails in comments for post %s are valid.", post_id)
 
 
 @pytest.mark.validation
 @pytest.mark.regression
 @pytest.mark.parametrize("test_case, username", VALID_USERS)
-def test_no_duplicate_comments(user_comments_helper, test_case, username):
+def test_no_duplicate_comments(user_comments_dataset, test_case, username):
     """
-    Verify that the API does not return duplicate comments for any post.
+    Verify that the API does not return the same comment twice, even on different posts of the user, and that
+    every comment ID is unique.
     """
-    user_data = user_comments_helper.get_user_with_posts(username=username)
+    user_data = user_comments_dataset.get_user_with_posts(username=username)
     assert "posts" in user_data, "User has no posts."
 
-    for post in user_data["posts"]:
-        post_id = post["id"]
-        comments = user_comments_helper.get_post_comments(post_id)
-
-        assert comments, f"Expected comments for post {post_id}, but got an empty response."
+    post_ids = [post["id"] for post in user_data["posts"]]
+    with DuplicateDetector() as detector, DuplicateDetector(fields=("id",)) as ids:
+        for post_id, comments in user_comments_dataset.get_comments_for_posts(post_ids).items():
+            assert comments, f"Expected comments for post {post_id}, but got an empty response."
 
-        unique_comments = set()
-        for comment in comments:
-            comment_tuple = (comment["id"], comment["postId"], comment["name"], comment["email"], comment["body"])
-            assert comment_tuple not in unique_comments, f"Duplicate comment found: {comment}"
-            unique_comments.add(comment_tuple)
+            for comment in comments:
+                duplicate = detector.add(comment)
+                assert duplicate is None, f"Duplicate comment found: {comment}, first seen as {duplicate}"
+                assert ids.add(comment) is None, f"Duplicate comment ID found: {comment['id']}"
 
-        pytest.logger.info(f"All comments for post {post_id} are unique.")
+    pytest.logger.info("All %d comments of %s are unique.", detector.stats.items, username)
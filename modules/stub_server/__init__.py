@@ -0,0 +1,2 @@
+from .synthetic_data import SyntheticDataGenerator, benchmark_comment, iter_benchmark_comments
+from .server import StubServer, StubServerConfig
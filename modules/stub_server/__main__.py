@@ -0,0 +1,32 @@
+import argparse
+from modules.stub_server import StubServer, StubServerConfig
+
+
+def main():
+    """
+    Run the stand-in server in the foreground:
+        python -m modules.stub_server --port 8000 --users 1000 --comments-per-post 100
+    then point the tests to it:
+        JSONPLACEHOLDER_BASE_URL=http://127.0.0.1:8000 pytest -m regression
+    """
+    defaults = StubServerConfig.from_env()
+    parser = argparse.ArgumentParser(description="Local stand-in server for the JSONPlaceholder endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    for name, field in StubServerConfig.__dataclass_fields__.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=field.type, default=getattr(defaults, name))
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    server = StubServer(StubServerConfig(**args), host, port)
+    print(f"Serving JSONPlaceholder stand-in on {server.base_url} ({server.config})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from modules.stub_server.synthetic_data import SyntheticDataGenerator
+
+STREAMING_THRESHOLD = 1000  # lists longer than this are sent with chunked transfer encoding
+CHUNK_SIZE = 64 * 1024
+USER_POSTS_ROUTE = re.compile(r"^/users/([^/]+)/posts/?$")
+
+
+@dataclass
+class StubServerConfig:
+    """
+    Size of the synthetic dataset and the faults injected by the stand-in server.
+    Every field can be set through a `STUB_<FIELD>` environment variable (e.g. `STUB_USERS=1000`).
+    """
+    users: int = 10
+    posts_per_user: int = 10
+    comments_per_post: int = 5
+    seed: int = 1
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0  # share of requests answered with 500
+    rate_limit_rate: float = 0.0  # share of requests answered with 429
+    retry_after_s: float = 1.0
+
+    @classmethod
+    def from_env(cls, **overrides):
+        values = {}
+        for name, field in cls.__dataclass_fields__.items():
+            env_value = os.environ.get(f"STUB_{name.upper()}")
+            if env_value is not None:
+                values[name] = field.type(env_value)
+        values.update(overrides)
+        return cls(**values)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # headers and body leave in one write (flushed after every request), otherwise Nagle + delayed ACK
+    # add ~40ms to every keep-alive response
+    wbufsize = CHUNK_SIZE
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.server.config
+        self._inject_latency(config)
+
+        fault = self.server.next_fault()
+        if fault == 429:
+            return self._send_json(429, {"error": "Too Many Requests"},
+                                   {"Retry-After": f"{config.retry_after_s:g}"})
+        if fault == 500:
+            return self._send_json(500, {"error": "Internal Server Error"})
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        data = self.server.data
+
+        if url.path.rstrip("/") == "/users":
+            return self._send_list(*self._paginate(data.iter_users(), data.users, query))
+
+        match = USER_POSTS_ROUTE.match(url.path)
+        if match:
+            user_id = self._parse_id(match.group(1))
+            return self._send_list(*self._paginate(data.iter_user_posts(user_id), data.posts_per_user, query))
+
+        if url.path.rstrip("/") == "/comments":
+            if "postId" not in query:
+                return self._send_list(*self._paginate(data.iter_comments(), data.total_comments, query))
+            post_id = self._parse_id(query["postId"][-1])
+            return self._send_list(*self._paginate(data.iter_post_comments(post_id), data.comments_per_post, query))
+
+        self._send_json(404, {})
+
+    @classmethod
+    def _paginate(cls, items, size: int, query: dict) -> tuple:
+        # like JSONPlaceholder: `_page` (1-based) and `_limit` (10 per page when only `_page` is given); a negative
+        # limit gives an empty page
+        if "_page" not in query and "_limit" not in query:
+            return items, size
+        limit = max(cls._parse_id(query["_limit"][-1]), 0) if "_limit" in query else 10
+        page = max(cls._parse_id(query["_page"][-1]), 1) if "_page" in query else 1
+        start = (page - 1) * limit
+        return itertools.islice(items, start, start + limit), max(min(size - start, limit), 0)
+
+    @staticmethod
+    def _parse_id(value) -> int:
+        # like JSONPlaceholder: an id that does not match anything just produces an empty list
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+
+    @staticmethod
+    def _inject_latency(config: StubServerConfig):
+        if config.latency_ms or config.latency_jitter_ms:
+            delay = config.latency_ms + random.uniform(-config.latency_jitter_ms, config.latency_jitter_ms)
+            time.sleep(max(delay, 0) / 1000)
+
+    def _send_json(self, status: int, payload, headers: dict = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_list(self, items, expected_size: int):
+        # the dataset is a pure function of the config, so the validator needs no body: conditional requests
+        # (If-None-Match) are answered with a 304 without generating the list
+        etag = self.server.etag(self.path)
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        if expected_size <= STREAMING_THRESHOLD:
+            return self._send_json(200, list(items), {"ETag": etag})
+
+        # large lists are encoded and sent incrementally, so the server memory stays flat at any size
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        buffer = bytearray(b"[")
+        for index, item in enumerate(items):
+            if index:
+                buffer += b","
+            buffer += json.dumps(item).encode()
+            if len(buffer) >= CHUNK_SIZE:
+                self._write_chunk(buffer)
+                buffer = bytearray()
+        buffer += b"]"
+        self._write_chunk(buffer)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n" % len(data) + bytes(data) + b"\r\n")
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, config: StubServerConfig):
+        super().__init__(address, StubRequestHandler)
+        self.config = config
+        self.data = SyntheticDataGenerator(config.users, config.posts_per_user, config.comments_per_post,
+                                           config.seed)
+        self._random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+
+    def etag(self, path: str) -> str:
+        config = self.config
+        version = f"{config.users}/{config.posts_per_user}/{config.comments_per_post}/{config.seed}{path}"
+        return f'"{hashlib.sha1(version.encode()).hexdigest()}"'
+
+    def next_fault(self):
+        """
+        Returns:
+            int: 429 or 500 if the next request must fail, None otherwise.
+        """
+        config = self.config
+        if not (config.error_rate or config.rate_limit_rate):
+            return None
+        with self._random_lock:
+            roll = self._random.random()
+        if roll < config.rate_limit_rate:
+            return 429
+        if roll < config.rate_limit_rate + config.error_rate:
+            return 500
+        return None
+
+
+class StubServer:
+    """
+    Local stand-in for the JSONPlaceholder endpoints, served from a background thread.
+
+        with StubServer(StubServerConfig(users=1000)) as server:
+            requests.get(f"{server.base_url}/users")
+    """
+
+    def __init__(self, config: StubServerConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubServerConfig()
+        self.httpd = StubHTTPServer((host, port), self.config)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
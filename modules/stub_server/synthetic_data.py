@@ -0,0 +1,165 @@
+import random
+from functools import lru_cache
+
+# the first users mirror JSONPlaceholder, so the existing test data (e.g. username "Samantha") keeps working
+KNOWN_USERS = [
+    ("Leanne Graham", "Bret"),
+    ("Ervin Howell", "Antonette"),
+    ("Clementine Bauch", "Samantha"),
+    ("Patricia Lebsack", "Karianne"),
+    ("Chelsey Dietrich", "Kamren"),
+    ("Mrs. Dennis Schulist", "Leopoldo_Corkery"),
+    ("Kurtis Weissnat", "Elwyn.Skiles"),
+    ("Nicholas Runolfsdottir V", "Maxime_Nienow"),
+    ("Glenna Reichert", "Delphine"),
+    ("Clementina DuBuque", "Moriah.Stanton"),
+]
+
+FIRST_NAMES = ["Ada", "Boris", "Clara", "Dorin", "Elena", "Filip", "Gina", "Horia", "Ioana", "Jonas", "Kira",
+               "Luca", "Maria", "Nelu", "Olga", "Petra", "Radu", "Sara", "Tudor", "Vera"]
+LAST_NAMES = ["Albu", "Barbu", "Cristea", "Dinu", "Enache", "Florea", "Georgescu", "Hagi", "Ionescu", "Lungu",
+              "Marin", "Nistor", "Oprea", "Popa", "Rusu", "Stan", "Toma", "Ursu", "Vasile", "Zamfir"]
+CITIES = ["Gwenborough", "Wisokyburgh", "McKenziehaven", "South Elvis", "Roscoeview", "South Christy",
+          "Howemouth", "Aliyaview", "Bartholomebury", "Lebsackbury"]
+DOMAINS = ["example.com", "mail.test", "jsonplaceholder.dev", "stub.local", "biz.org"]
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+         "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip "
+         "ex ea commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum fugiat nulla "
+         "pariatur excepteur sint occaecat cupidatat non proident sunt culpa qui officia deserunt mollit anim "
+         "id est laborum").split()
+
+
+class SyntheticDataGenerator:
+    """
+    Deterministic JSONPlaceholder-like data, generated on demand from ids (nothing is kept in memory),
+    so the dataset can scale to millions of comments.
+
+    Ids are laid out like JSONPlaceholder: user `u` owns posts `(u - 1) * posts_per_user + 1 ..`,
+    post `p` owns comments `(p - 1) * comments_per_post + 1 ..`.
+    The same seed and sizes always produce the same payloads.
+    """
+
+    def __init__(self, users: int = 10, posts_per_user: int = 10, comments_per_post: int = 5, seed: int = 1):
+        self.users = users
+        self.posts_per_user = posts_per_user
+        self.comments_per_post = comments_per_post
+        self.seed = seed
+
+    @property
+    def total_posts(self) -> int:
+        return self.users * self.posts_per_user
+
+    @property
+    def total_comments(self) -> int:
+        return self.total_posts * self.comments_per_post
+
+    def _random(self, kind: int, item_id: int) -> random.Random:
+        return random.Random((self.seed << 40) ^ (kind << 36) ^ item_id)
+
+    @staticmethod
+    def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+        return " ".join(rng.choices(WORDS, k=rng.randint(min_words, max_words)))
+
+    def _paragraph(self, rng: random.Random) -> str:
+        return "\n".join(self._sentence(rng, 6, 12) for _ in range(rng.randint(2, 4)))
+
+    def user(self, user_id: int):
+        """
+        Returns:
+            dict: The user with the given ID or None if it is out of range.
+        """
+        if not 1 <= user_id <= self.users:
+            return None
+        rng = self._random(1, user_id)
+        if user_id <= len(KNOWN_USERS):
+            name, username = KNOWN_USERS[user_id - 1]
+        else:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            name, username = f"{first} {last}", f"{first}.{last}{user_id}"
+        local_part = "".join(char for char in username if char.isalnum() or char in "._")
+        return {
+            "id": user_id,
+            "name": name,
+            "username": username,
+            "email": f"{local_part}@{rng.choice(DOMAINS)}",
+            "address": {
+                "street": f"{rng.choice(LAST_NAMES)} Street",
+                "suite": f"Apt. {rng.randint(1, 999)}",
+                "city": rng.choice(CITIES),
+                "zipcode": f"{rng.randint(10000, 99999)}-{rng.randint(1000, 9999)}",
+                "geo": {
+                    "lat": f"{rng.uniform(-90, 90):.4f}",
+                    "lng": f"{rng.uniform(-180, 180):.4f}",
+                },
+            },
+            "phone": f"1-{rng.randint(100, 999)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            "website": f"{username.lower()}.org",
+            "company": {
+                "name": f"{rng.choice(LAST_NAMES)}-{rng.choice(LAST_NAMES)}",
+                "catchPhrase": self._sentence(rng, 3, 5),
+                "bs": self._sentence(rng, 3, 4),
+            },
+        }
+
+    def iter_users(self):
+        for user_id in range(1, self.users + 1):
+            yield self.user(user_id)
+
+    def iter_user_posts(self, user_id: int):
+        if not 1 <= user_id <= self.users:
+            return
+        first_post_id = (user_id - 1) * self.posts_per_user + 1
+        for post_id in range(first_post_id, first_post_id + self.posts_per_user):
+            rng = self._random(2, post_id)
+            yield {
+                "userId": user_id,
+                "id": post_id,
+                "title": self._sentence(rng, 3, 8),
+                "body": self._paragraph(rng),
+            }
+
+    def iter_post_comments(self, post_id: int):
+        if not 1 <= post_id <= self.total_posts:
+            return
+        # one generator per post: comments of the same post are generated sequentially
+        rng = self._random(3, post_id)
+        first_comment_id = (post_id - 1) * self.comments_per_post + 1
+        for comment_id in range(first_comment_id, first_comment_id + self.comments_per_post):
+            yield {
+                "postId": post_id,
+                "id": comment_id,
+                "name": self._sentence(rng, 3, 6),
+                "email": f"{rng.choice(FIRST_NAMES)}.{rng.choice(LAST_NAMES)}{comment_id}@{rng.choice(DOMAINS)}",
+                "body": self._paragraph(rng),
+            }
+
+    def iter_comments(self):
+        for post_id in range(1, self.total_posts + 1):
+            yield from self.iter_post_comments(post_id)
+
+
+@lru_cache(maxsize=None)
+def _comment_templates(comments_per_post: int) -> tuple:
+    return tuple(SyntheticDataGenerator(users=10, posts_per_user=10, comments_per_post=comments_per_post)
+                 .iter_comments())
+
+
+def benchmark_comment(index: int, comments_per_post: int = 100) -> dict:
+    """
+    Comment number `index` (0-based) of the benchmark datasets: text copied from 10k generated templates (much
+    faster than generating every comment), with the id and postId of its position and the id in its name, so
+    no two comments have the same content.
+    """
+    templates = _comment_templates(comments_per_post)
+    template = templates[index % len(templates)]
+    return dict(template, id=index + 1, postId=index // comments_per_post + 1,
+                name=f"{template['name']} {index + 1}")
+
+
+def iter_benchmark_comments(total: int, comments_per_post: int = 100):
+    """
+    Yields:
+        dict: `total` JSONPlaceholder-like comments (`benchmark_comment`), `comments_per_post` per post.
+    """
+    for index in range(total):
+        yield benchmark_comment(index, comments_per_post)